@@ -1,12 +1,25 @@
+from .aio import AsyncMapGenerator
+from .cache import MapCache
+from .edits import BoardEditor
+from .compact import CompactGrid
 from .generator import HexMap
-from .utils import fields_to_matrix_representation
+from .query import PathQueryEngine
+from .rng import canonical_map_id
+from .snapshot import StageSnapshot
+from .spatial import SpatialIndex
+from .batch import generate_map_data_batch
+from .flat_board import FlatBoard
+from .mapped import MappedBoard
+from .stats import GenerationStats
+from .streaming import iter_board_columns, write_map_json
+from .utils import board_to_matrix_representation, fields_to_matrix_representation
 
 # A list of sample map IDs used for testing purposes.
 # This ensures that the map generation logic is tested against a variety of seeds.
 # This list is primarily for internal testing and not part of the public API.
 map_sample_list=[0,10,1000,123456,9999,99999,999999]
 
-def generate_map_data(map_id: int, x_max, y_max) -> list[list[str]]:
+def generate_map_data(map_id: int, x_max, y_max, board_backend: str = "dict", cache: MapCache = None) -> list[list[str]]:
     """
     Generates map data as a 2D list (matrix) of strings for a given seed and dimensions.
 
@@ -18,12 +31,27 @@ def generate_map_data(map_id: int, x_max, y_max) -> list[list[str]]:
         map_id (int): The seed for the random number generator.
         x_max (int): The maximum X-coordinate for the map (width). Defaults to 20.
         y_max (int): The maximum Y-coordinate for the map (height). Defaults to 11.
+        board_backend (str): "dict" or "flat"; see `HexMap`. The output is the same.
+        cache (MapCache, optional): A cache to serve repeated requests from.
 
     Returns:
         list[list[str]]: A 2D list where each element is a string representing
                          the display string of the field (e.g., "water", "land",
                          or a town name).
     """
-    hex_map = HexMap(map_id, x_max, y_max)
+    if cache is not None:
+        return cache.get_or_generate(map_id, x_max, y_max, board_backend=board_backend)
+    hex_map = HexMap(map_id, x_max, y_max, board_backend=board_backend)
     hex_map.generate_map()
-    return fields_to_matrix_representation(hex_map.board.fields, x_max, y_max)
\ No newline at end of file
+    return board_to_matrix_representation(hex_map.board)
+
+def generate_map_grid(map_id: int, x_max, y_max, board_backend: str = "dict", cache: MapCache = None) -> CompactGrid:
+    """
+    Generates a map like `generate_map_data` but returns it as a `CompactGrid`
+    (one byte per field plus a town-name table) without building the string matrix.
+    """
+    if cache is not None:
+        return cache.get_or_generate_grid(map_id, x_max, y_max, board_backend=board_backend)
+    hex_map = HexMap(map_id, x_max, y_max, board_backend=board_backend)
+    hex_map.generate_map()
+    return CompactGrid.from_board(hex_map.board)
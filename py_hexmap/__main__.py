@@ -0,0 +1,117 @@
+import argparse
+import io
+import json
+import struct
+import sys
+import time
+from .batch import generate_map_data_batch
+
+# Each record of the binary format is the map id followed by the serialized
+# `CompactGrid` (see `CompactGrid.write`).
+RECORD_HEADER = struct.Struct("<q")
+
+def parse_seeds(text):
+    """
+    Parses a comma-separated list of seeds and inclusive ranges, e.g.
+    "0-999,123456", into a list of ints. Raises `argparse.ArgumentTypeError`
+    for malformed lists, so it can serve as an argument type.
+    """
+    map_ids = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        try:
+            if sep and start:
+                first, last = int(start), int(end)
+            else:
+                first = last = int(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError("invalid seed or range: " + repr(part)) from None
+        if last < first:
+            raise argparse.ArgumentTypeError("empty seed range: " + part)
+        map_ids.extend(range(first, last + 1))
+    return map_ids
+
+def write_record(stream, output_format, map_id, grid):
+    """Writes one map in the chosen format and returns the number of bytes written."""
+    if output_format == "ndjson":
+        line = json.dumps({"map_id": map_id, "x_max": grid.x_max, "y_max": grid.y_max, "map": grid.to_matrix()},
+                          ensure_ascii=False, separators=(",", ":"))
+        data = line.encode("utf-8") + b"\n"
+        stream.write(data)
+        return len(data)
+    stream.write(RECORD_HEADER.pack(map_id))
+    return RECORD_HEADER.size + grid.write(stream)
+
+def report(stream, count, written, started):
+    """Prints the throughput so far to stream."""
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    stream.write("%d maps, %.1f MB in %.2f s: %.1f maps/s, %.2f MB/s\n"
+                 % (count, written / 1e6, elapsed, count / elapsed, written / 1e6 / elapsed))
+    stream.flush()
+
+def build_parser():
+    """Returns the argument parser of the exporter."""
+    parser = argparse.ArgumentParser(
+        prog="python -m py_hexmap",
+        description="Generate maps for a range of seeds and stream them as NDJSON or compact binary records.")
+    parser.add_argument("seeds", type=parse_seeds, help='seeds and inclusive ranges, e.g. "0-999,123456"')
+    parser.add_argument("-x", "--x-max", type=int, default=20, help="map width (default: 20)")
+    parser.add_argument("-y", "--y-max", type=int, default=11, help="map height (default: 11)")
+    parser.add_argument("-f", "--format", choices=("ndjson", "binary"), default="ndjson",
+                        help="ndjson: one JSON object per line; binary: an 8-byte map id plus a serialized CompactGrid per map")
+    parser.add_argument("-o", "--output", default="-",
+                        help='output file, "-" for stdout (default); a path containing "{map_id}" writes one file per map')
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="worker processes; 0 generates in this process (default)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="seeds per worker task")
+    parser.add_argument("--buffer-size", type=int, default=1 << 20, help="output buffer size in bytes (default: 1 MiB)")
+    parser.add_argument("--progress", type=int, default=0, metavar="N", help="report throughput every N maps")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report throughput")
+    return parser
+
+def main(argv=None):
+    """Runs the exporter with the given command-line arguments."""
+    args = build_parser().parse_args(argv)
+    results = generate_map_data_batch(args.seeds, args.x_max, args.y_max, workers=args.workers,
+                                      chunk_size=args.chunk_size, compact=True)
+    per_map = "{map_id}" in args.output
+    if args.output == "-":
+        stream = io.BufferedWriter(sys.stdout.buffer, args.buffer_size)
+    elif not per_map:
+        stream = open(args.output, "wb", buffering=args.buffer_size)
+    count = 0
+    written = 0
+    started = time.perf_counter()
+    try:
+        for map_id, grid in results:
+            if per_map:
+                with open(args.output.format(map_id=map_id), "wb", buffering=args.buffer_size) as map_stream:
+                    written += write_record(map_stream, args.format, map_id, grid)
+            else:
+                written += write_record(stream, args.format, map_id, grid)
+            count += 1
+            if args.progress and not args.quiet and count % args.progress == 0:
+                report(sys.stderr, count, written, started)
+    finally:
+        results.close()
+        if not per_map:
+            if args.output == "-":
+                stream.flush()
+                # Leave sys.stdout open.
+                stream.detach()
+            else:
+                stream.close()
+    if not args.quiet:
+        report(sys.stderr, count, written, started)
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); exit without a traceback.
+        sys.stderr.close()
+        sys.exit(1)
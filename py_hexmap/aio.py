@@ -0,0 +1,148 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .compact import CompactGrid
+from .generator import HexMap
+from .rng import canonical_map_id
+
+def _generate_grid(map_id, x_max, y_max, board_backend):
+    """Executor entry point: generates one map as a `CompactGrid`."""
+    hex_map = HexMap(map_id, x_max, y_max, board_backend=board_backend)
+    hex_map.generate_map()
+    return CompactGrid.from_board(hex_map.board)
+
+class AsyncMapGenerator:
+    """
+    Generates maps for asyncio code without blocking the event loop.
+
+    Generation runs on an executor (a thread pool of its own unless one is
+    given; a `ProcessPoolExecutor` generates in parallel). Concurrent
+    requests for the same `(canonical_map_id(map_id), x_max, y_max)` share
+    one in-flight generation. Cancelling or timing out a request only stops
+    waiting for it: the shared generation is cancelled once nobody waits for
+    it, which removes it from the executor queue if it has not started.
+
+    Attributes:
+        generated (int): Generations started.
+        coalesced (int): Requests served by a generation already in flight.
+    """
+    def __init__(self, executor=None, max_concurrency=None, cache=None, board_backend="flat"):
+        """
+        Args:
+            executor (concurrent.futures.Executor, optional): Where maps are
+                generated. If omitted, a thread pool is created on first use
+                and shut down by `close`.
+            max_concurrency (int, optional): Maximum number of generations
+                submitted to the executor at once.
+            cache (MapCache, optional): Checked before generating and filled
+                afterwards.
+            board_backend (str): "dict" or "flat"; see `HexMap`.
+        """
+        self.executor = executor
+        self._owns_executor = executor is None
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.board_backend = board_backend
+        self.generated = 0
+        self.coalesced = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._in_flight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Cancels the generations in flight and shuts down the executor if it was created here."""
+        for task, _ in list(self._in_flight.values()):
+            task.cancel()
+        self._in_flight.clear()
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def in_flight(self):
+        """Returns the number of generations currently in flight."""
+        return len(self._in_flight)
+
+    async def generate_map_grid(self, map_id: int, x_max: int, y_max: int, timeout: float = None) -> CompactGrid:
+        """
+        Returns the `CompactGrid` of a map. Raises TimeoutError if it is not
+        ready within timeout seconds, and whatever generation raised (e.g.
+        IndexError for boards that need more towns than there are names).
+        """
+        if self.cache is not None:
+            grid = self.cache.get_grid(map_id, x_max, y_max)
+            if grid is not None:
+                return grid
+        return await self.generate_uncached_grid(map_id, x_max, y_max, timeout)
+
+    async def generate_uncached_grid(self, map_id: int, x_max: int, y_max: int, timeout: float = None) -> CompactGrid:
+        """
+        Like `generate_map_grid`, but joins or starts a generation without
+        checking the cache first, for callers that just missed it. The
+        result is still cached.
+        """
+        key = (canonical_map_id(map_id), x_max, y_max)
+        entry = self._in_flight.get(key)
+        if entry is None:
+            entry = [asyncio.ensure_future(self._generate(key)), 0]
+            self._in_flight[key] = entry
+            entry[0].add_done_callback(lambda _: self._forget(key, entry))
+            self.generated += 1
+        else:
+            self.coalesced += 1
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry[0]), timeout)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+                self._forget(key, entry)
+
+    async def generate_map_data(self, map_id: int, x_max: int, y_max: int, timeout: float = None) -> list[list[str]]:
+        """Returns the matrix of `generate_map_data` for a map; see `generate_map_grid`."""
+        grid = await self.generate_map_grid(map_id, x_max, y_max, timeout)
+        return grid.to_matrix()
+
+    def _forget(self, key, entry):
+        """Drops an in-flight entry unless a newer one has replaced it."""
+        if self._in_flight.get(key) is entry:
+            del self._in_flight[key]
+
+    async def _generate(self, key):
+        """
+        Generates one map on the executor. The concurrency slot is released
+        when the executor job ends (or is cancelled before it starts), not
+        when this task is cancelled, so jobs that already started still count
+        against the limit.
+        """
+        map_id, x_max, y_max = key
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            job = self.executor.submit(_generate_grid, map_id, x_max, y_max, self.board_backend)
+        except BaseException:
+            if self._semaphore is not None:
+                self._semaphore.release()
+            raise
+        if self._semaphore is not None:
+            job.add_done_callback(self._release_from_job(asyncio.get_running_loop()))
+        grid = await asyncio.wrap_future(job)
+        if self.cache is not None:
+            self.cache.put(map_id, x_max, y_max, grid)
+        return grid
+
+    def _release_from_job(self, loop):
+        """Returns an executor-future callback that releases a concurrency slot on loop."""
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._semaphore.release)
+            except RuntimeError:
+                # The loop is closed; nobody can wait for the slot any more.
+                pass
+        return release
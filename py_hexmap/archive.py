@@ -0,0 +1,273 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from .compact import CompactGrid
+from .generator import HexMap
+from .rng import LCG_MODULUS, canonical_map_id
+
+# File layout: a header, then one index entry per canonical seed
+# (0 .. LCG_MODULUS - 1), then the records in the order they were built.
+# An index entry is (offset, length, crc32 of the record); length 0 means the
+# seed has not been built yet.
+ARCHIVE_MAGIC = b"HXA1"
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct("<4sHII")
+INDEX_ENTRY = struct.Struct("<QII")
+INDEX_SIZE = INDEX_ENTRY.size * LCG_MODULUS
+DATA_START = ARCHIVE_HEADER.size + INDEX_SIZE
+
+# A record is this header, the serialized `CompactGrid`, then one signed land
+# id per field (-1 for water) of `land_id_width` bytes in `x * y_max + y` order.
+# Capitals are flat field indexes, -1 where a capital is missing.
+RECORD_HEADER = struct.Struct("<IBI4i")
+LAND_ID_TYPECODES = {2: "h", 4: "i"}
+
+def encode_record(hex_map):
+    """
+    Serializes a generated map into an archive record: its compact grid, the
+    land group of every field and the four capitals.
+    """
+    board = hex_map.board
+    grid = CompactGrid.from_board(board)
+    land_ids = [board.get_field(x, y).land_id for x in range(board.x_max) for y in range(board.y_max)]
+    width = 2 if len(board.land_groups) < 0x7fff else 4
+    capitals = [-1 if field is None else field.f_x * board.y_max + field.f_y for field in board.parties_capitals]
+    grid_bytes = grid.to_bytes()
+    land_bytes = struct.pack("<" + str(len(land_ids)) + LAND_ID_TYPECODES[width], *land_ids)
+    return RECORD_HEADER.pack(len(grid_bytes), width, len(board.land_groups), *capitals) + grid_bytes + land_bytes
+
+def _encode_records(map_ids, x_max, y_max):
+    """Worker entry point: generates and encodes a chunk of maps."""
+    records = []
+    for map_id in map_ids:
+        hex_map = HexMap(map_id, x_max, y_max, board_backend="flat")
+        hex_map.generate_map()
+        records.append((map_id, encode_record(hex_map)))
+    return records
+
+class ArchivedMap:
+    """
+    One map read from a `MapArchive`. The grid codes and land ids are
+    memoryviews into the archive's memory map, not copies, so release the
+    object before closing the archive. On big-endian hosts the land ids
+    are a byte-swapped array copy instead.
+
+    Attributes:
+        map_id (int): The canonical seed.
+        grid (CompactGrid): The map in compact form.
+        land_ids (memoryview or array): The land group of every field, -1 for water.
+        land_group_count (int): Number of land groups.
+        capitals (tuple[int]): Flat field indexes of the four capitals.
+    """
+    __slots__ = ("map_id", "grid", "land_ids", "land_group_count", "capitals")
+
+    def __init__(self, map_id, record):
+        grid_size, width, land_group_count, *capitals = RECORD_HEADER.unpack_from(record, 0)
+        grid_start = RECORD_HEADER.size
+        self.map_id = map_id
+        self.grid = CompactGrid.from_bytes(record[grid_start:grid_start + grid_size])
+        land_bytes = record[grid_start + grid_size:]
+        typecode = LAND_ID_TYPECODES[width]
+        if sys.byteorder == "little":
+            self.land_ids = land_bytes.cast(typecode)
+        else:
+            # The record is little-endian; swap a copy into this host's order.
+            self.land_ids = array(typecode, bytes(land_bytes))
+            self.land_ids.byteswap()
+        self.land_group_count = land_group_count
+        self.capitals = tuple(capitals)
+
+    def to_matrix(self):
+        """Returns the 2D list of strings `generate_map_data` gives for this seed."""
+        return self.grid.to_matrix()
+
+class MapArchive:
+    """
+    Read-only, memory-mapped access to an archive written by `build_archive`.
+    Looking up a seed reads one index entry and maps its record in place.
+    """
+    def __init__(self, path):
+        """Opens and maps the archive at path."""
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        magic, version, self.x_max, self.y_max = ARCHIVE_HEADER.unpack_from(self._mmap, 0)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self.close()
+            raise ValueError("not a map archive: " + str(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmaps the archive. Every `ArchivedMap` read from it must be released first."""
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def _entry(self, map_id):
+        return INDEX_ENTRY.unpack_from(self._mmap, ARCHIVE_HEADER.size + canonical_map_id(map_id) * INDEX_ENTRY.size)
+
+    def __contains__(self, map_id):
+        return self._entry(map_id)[1] > 0
+
+    def __len__(self):
+        """Number of seeds present in the archive."""
+        return sum(1 for map_id in range(LCG_MODULUS) if map_id in self)
+
+    def get(self, map_id, verify=False):
+        """
+        Returns the `ArchivedMap` for any seed (it is reduced to its canonical
+        form). Raises KeyError if the seed was not built and ValueError if
+        verify is set and the record checksum does not match.
+        """
+        offset, length, checksum = self._entry(map_id)
+        if length == 0:
+            raise KeyError(map_id)
+        record = self._view[offset:offset + length]
+        if verify and zlib.crc32(record) != checksum:
+            raise ValueError("checksum mismatch for map " + str(map_id))
+        return ArchivedMap(canonical_map_id(map_id), record)
+
+    def __getitem__(self, map_id):
+        return self.get(map_id)
+
+    def verify(self):
+        """Returns the canonical seeds whose records fail their checksum."""
+        failed = []
+        for map_id in range(LCG_MODULUS):
+            offset, length, checksum = self._entry(map_id)
+            if length and zlib.crc32(self._view[offset:offset + length]) != checksum:
+                failed.append(map_id)
+        return failed
+
+def _open_for_build(path, x_max, y_max):
+    """
+    Opens an archive for writing, creating it if needed. For an existing
+    archive, entries whose records are truncated or fail their checksum are
+    cleared and the file is cut back to the end of the last valid record.
+    Returns the file and the offset where the next record goes.
+    """
+    if not os.path.exists(path):
+        archive = open(path, "w+b")
+        archive.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, x_max, y_max))
+        archive.truncate(DATA_START)
+        return archive, DATA_START
+
+    archive = open(path, "r+b")
+    try:
+        magic, version, archived_x_max, archived_y_max = ARCHIVE_HEADER.unpack(archive.read(ARCHIVE_HEADER.size))
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError("not a map archive: " + str(path))
+        if (archived_x_max, archived_y_max) != (x_max, y_max):
+            raise ValueError("archive holds " + str(archived_x_max) + "x" + str(archived_y_max) + " maps")
+        index = bytearray(archive.read(INDEX_SIZE))
+        file_size = os.fstat(archive.fileno()).st_size
+        end = DATA_START
+        for map_id in range(LCG_MODULUS):
+            offset, length, checksum = INDEX_ENTRY.unpack_from(index, map_id * INDEX_ENTRY.size)
+            if length == 0:
+                continue
+            valid = offset >= DATA_START and offset + length <= file_size
+            if valid:
+                archive.seek(offset)
+                valid = zlib.crc32(archive.read(length)) == checksum
+            if valid:
+                end = max(end, offset + length)
+            else:
+                INDEX_ENTRY.pack_into(index, map_id * INDEX_ENTRY.size, 0, 0, 0)
+        archive.seek(ARCHIVE_HEADER.size)
+        archive.write(index)
+        archive.truncate(end)
+        return archive, end
+    except BaseException:
+        archive.close()
+        raise
+
+def build_archive(path, x_max: int, y_max: int, map_ids=None, workers=0, chunk_size=64, sync_every=1024):
+    """
+    Builds (or resumes building) an archive of maps of one size.
+
+    Records are appended as chunks finish and each index entry is written
+    after its record, so an interrupted build can simply be run again: seeds
+    already present are skipped and damaged tail records are rebuilt.
+
+    Args:
+        path (str): The archive file.
+        x_max (int): The maximum X-coordinate for the map (width).
+        y_max (int): The maximum Y-coordinate for the map (height).
+        map_ids (iterable[int], optional): Seeds to include; all 233280
+                                           canonical seeds by default.
+        workers (int): Worker processes; 0 builds in this process.
+        chunk_size (int): Seeds per worker task.
+        sync_every (int): Flush and fsync after this many records.
+
+    Returns:
+        int: The number of records written by this call.
+    """
+    archive, end = _open_for_build(path, x_max, y_max)
+    try:
+        if map_ids is None:
+            map_ids = range(LCG_MODULUS)
+        seen = set()
+        todo = []
+        for map_id in map_ids:
+            map_id = canonical_map_id(map_id)
+            if map_id in seen:
+                continue
+            seen.add(map_id)
+            archive.seek(ARCHIVE_HEADER.size + map_id * INDEX_ENTRY.size + 8)
+            if struct.unpack("<I", archive.read(4))[0] == 0:
+                todo.append(map_id)
+        chunks = [todo[start:start + chunk_size] for start in range(0, len(todo), chunk_size)]
+
+        written = 0
+        for records in _generate_chunks(chunks, x_max, y_max, workers):
+            for map_id, record in records:
+                archive.seek(end)
+                archive.write(record)
+                archive.seek(ARCHIVE_HEADER.size + map_id * INDEX_ENTRY.size)
+                archive.write(INDEX_ENTRY.pack(end, len(record), zlib.crc32(record)))
+                end += len(record)
+                written += 1
+                if written % sync_every == 0:
+                    archive.flush()
+                    os.fsync(archive.fileno())
+        archive.flush()
+        os.fsync(archive.fileno())
+        return written
+    finally:
+        archive.close()
+
+def _generate_chunks(chunks, x_max, y_max, workers):
+    """Yields the encoded records of each chunk, in completion order."""
+    if workers == 0:
+        for chunk in chunks:
+            yield _encode_records(chunk, x_max, y_max)
+        return
+    chunks = iter(chunks)
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for chunk in chunks:
+                pending.add(executor.submit(_encode_records, chunk, x_max, y_max))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from .compact import CompactGrid
+from .generator import HexMap
+
+def _generate_chunk(memory_name, map_ids, x_max, y_max):
+    """
+    Worker entry point: generates a chunk of maps and writes their codes into
+    the shared memory block, one `x_max * y_max` slot per map. Only the town
+    name tables travel back through pickling.
+    """
+    size = x_max * y_max
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        town_tables = []
+        for slot, map_id in enumerate(map_ids):
+            hex_map = HexMap(map_id, x_max, y_max)
+            hex_map.generate_map()
+            view = memory.buf[slot * size:(slot + 1) * size]
+            try:
+                town_tables.append(CompactGrid.from_board(hex_map.board, out=view).town_names)
+            finally:
+                view.release()
+        return town_tables
+    finally:
+        memory.close()
+
+def _chunks(map_ids, chunk_size):
+    """Splits the seeds into lists of at most chunk_size."""
+    for start in range(0, len(map_ids), chunk_size):
+        yield map_ids[start:start + chunk_size]
+
+def generate_map_data_batch(map_ids, x_max: int, y_max: int, workers=None, chunk_size=None, compact=False):
+    """
+    Generates many maps of one size on a process pool and yields them as they
+    finish, which is not necessarily the order of `map_ids`.
+
+    Each chunk of seeds gets a shared memory block that the worker fills with
+    `CompactGrid` codes, so the grids are never pickled.
+
+    Args:
+        map_ids (iterable[int]): The seeds to generate.
+        x_max (int): The maximum X-coordinate for the map (width).
+        y_max (int): The maximum Y-coordinate for the map (height).
+        workers (int, optional): Number of processes; defaults to the CPU
+                                 count. 0 generates in the calling process.
+        chunk_size (int, optional): Seeds per task; by default the seeds are
+                                    split into about four tasks per worker.
+        compact (bool): Yield a `CompactGrid` instead of the string matrix.
+
+    Yields:
+        tuple: `(map_id, matrix)` with the matrix `generate_map_data` returns,
+               or `(map_id, grid)` when compact is set.
+    """
+    map_ids = list(map_ids)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(256, len(map_ids) // (max(workers, 1) * 4)))
+    size = x_max * y_max
+
+    def result(grid):
+        if compact:
+            return grid
+        return grid.to_matrix()
+
+    if workers == 0:
+        for map_id in map_ids:
+            hex_map = HexMap(map_id, x_max, y_max)
+            hex_map.generate_map()
+            yield map_id, result(CompactGrid.from_board(hex_map.board))
+        return
+
+    chunks = _chunks(map_ids, chunk_size)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                # Keep a bounded number of chunks in flight so the shared
+                # memory in use does not grow with the number of seeds.
+                for chunk in chunks:
+                    memory = shared_memory.SharedMemory(create=True, size=max(1, len(chunk) * size))
+                    future = executor.submit(_generate_chunk, memory.name, chunk, x_max, y_max)
+                    pending[future] = (chunk, memory)
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, memory = pending.pop(future)
+                    try:
+                        town_tables = future.result()
+                        for slot, map_id in enumerate(chunk):
+                            codes = bytes(memory.buf[slot * size:(slot + 1) * size])
+                            yield map_id, result(CompactGrid(x_max, y_max, codes, town_tables[slot]))
+                    finally:
+                        memory.close()
+                        memory.unlink()
+        finally:
+            for future, (chunk, memory) in pending.items():
+                future.cancel()
+            for future, (chunk, memory) in pending.items():
+                try:
+                    future.exception()
+                except BaseException:
+                    pass
+                memory.close()
+                memory.unlink()
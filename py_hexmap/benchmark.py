@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from .generator import STAGE_NAMES as GENERATOR_STAGES, HexMap
+from .utils import fields_to_matrix_representation
+
+# Board sizes of a full run. Boards larger than about 50x50 need more towns
+# than `generate_all_towns` has names, so their runs stop at generate_towns.
+DEFAULT_SIZES = ((20, 11), (45, 40), (100, 100), (200, 200), (500, 500), (1000, 1000), (2000, 2000))
+QUICK_SIZES = ((20, 11), (45, 40), (100, 100))
+
+# The stages of `HexMap.generate_board` from the generator's stage table,
+# each run with `HexMap.run_stages`, followed by the conversion
+# `generate_map_data` applies to the finished board.
+STAGES = tuple((name, lambda hex_map, board, name=name: hex_map.run_stages(name)) for name in GENERATOR_STAGES) + (
+    ("fields_to_matrix_representation",
+     lambda hex_map, board: fields_to_matrix_representation(board.fields, board.x_max, board.y_max)),
+)
+STAGE_NAMES = tuple(name for name, _ in STAGES)
+
+# SHA-256 of the compact JSON (see `map_digest`) of known-good maps, by size
+# and seed. A benchmark of code that changes any of them is not comparable.
+GOLDEN_DIGESTS = {
+    (20, 11): {
+        0: "f39f03e1f10b878484fd46fe09fe937959f0b833f091c6283516365b09c8b2c6",
+        10: "61487b21a91fdf98350e5bbfb9a437f43f880aeb672390663b3137ac535f48c8",
+        1000: "320af4c5994820ac1c65ff7d7286b382cde1d5516e90608870e3e34109fa5adc",
+        9999: "dabebbe0054de6ff3f36cf0b6d2d551bdf6aba3d64969069e4cc31352d872399",
+        99999: "56908a4cbbfb4abea9e50a7b57edc68c2a84fc644e23997d4278da3899081a9e",
+        123456: "6a777c3e36f4274a8b354ef2353030d100d60980ad117dd1c67d187eec1c4a80",
+        999999: "95336c92595d61321208c48877494e682604be6eab6fc1a24921c2976f06edf2",
+    },
+    (45, 40): {
+        0: "78f9a6798db226466e6443ef14bb7109abf45d4119bea228226d3e40deed4ae0",
+        10: "29b2490e388477341eb71350ab332d36d0fe1cad7061e6d0236068fbbc8cb706",
+        1000: "2ee49d34b1c94ebf5176ff6ca7c8777ca7eca175655110f948e42ac44d105926",
+        9999: "88a9343cecc786027b70f0c89ffab93842528944e24bc279055f0d613d1d8c64",
+        99999: "ce8ca0d3a9025e7a5ff8fd6447da2288f0a98c24eeef81775fc66877bd6e6474",
+        123456: "0b732ddc2443a57a97c7b7f29ff92f214da7d70035529584834dd046165f0fd8",
+        999999: "aeb5532717ad435fe9c3d6621b0e5ddfee4b07b96a90dd30054a6ff8c624bf8c",
+    },
+}
+
+def map_digest(matrix):
+    """Returns the SHA-256 hex digest of a map matrix serialized as compact JSON."""
+    data = json.dumps(matrix, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def check_golden(board_backend="dict", path_engine="heap"):
+    """
+    Generates every seed of `GOLDEN_DIGESTS` and returns a list of
+    (x_max, y_max, map_id) for the maps whose digest differs.
+    """
+    failures = []
+    for (x_max, y_max), digests in GOLDEN_DIGESTS.items():
+        for map_id, digest in digests.items():
+            hex_map = HexMap(map_id, x_max, y_max, path_engine=path_engine, board_backend=board_backend)
+            hex_map.generate_map()
+            matrix = fields_to_matrix_representation(hex_map.board.fields, x_max, y_max)
+            if map_digest(matrix) != digest:
+                failures.append((x_max, y_max, map_id))
+    return failures
+
+def run_stages(map_id, x_max, y_max, board_backend="dict", path_engine="heap", trace_memory=False):
+    """
+    Generates one map stage by stage.
+
+    Returns a list with one dict per stage of `STAGES`: "stage" and either
+    "seconds" (plus "peak_bytes", the traced memory peak above the level at
+    the start of the stage, when trace_memory is set), "error" for the stage
+    that raised, or "skipped" for the stages after it. Tracing memory slows
+    the stages down, so time them in a separate run.
+    """
+    hex_map = HexMap(map_id, x_max, y_max, path_engine=path_engine, board_backend=board_backend)
+    board = hex_map.board
+    results = []
+    failed = False
+    for name, run in STAGES:
+        if failed:
+            results.append({"stage": name, "skipped": True})
+            continue
+        if trace_memory:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            run(hex_map, board)
+        except IndexError as error:
+            results.append({"stage": name, "error": type(error).__name__ + ": " + str(error)})
+            failed = True
+            continue
+        result = {"stage": name, "seconds": time.perf_counter() - started}
+        if trace_memory:
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1] - start_bytes
+        results.append(result)
+    return results
+
+def benchmark_size(x_max, y_max, map_id=0, repeat=3, budget=10.0, board_backend="dict", path_engine="heap",
+                   trace_memory=True):
+    """
+    Times the stages of one board size.
+
+    The stages run up to repeat times, stopping early once budget seconds
+    have been spent (there is always at least one run), then once more under
+    tracemalloc if trace_memory is set.
+
+    Returns:
+        dict: "x_max", "y_max", "cells", "runs", "stages" (per stage the
+              minimum and median seconds and the peak bytes, or the error /
+              skipped marker), "total_seconds" (sum of the stage minimums) and
+              "peak_bytes" (traced peak of the whole map).
+    """
+    runs = []
+    spent = 0.0
+    while len(runs) < max(repeat, 1) and (not runs or spent < budget):
+        started = time.perf_counter()
+        runs.append(run_stages(map_id, x_max, y_max, board_backend, path_engine))
+        spent += time.perf_counter() - started
+
+    peaks = None
+    peak_bytes = None
+    if trace_memory:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            peaks = run_stages(map_id, x_max, y_max, board_backend, path_engine, trace_memory=True)
+            peak_bytes = max((stage.get("peak_bytes", 0) for stage in peaks), default=0)
+            peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1] - start_bytes)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    stages = []
+    for index, name in enumerate(STAGE_NAMES):
+        first = runs[0][index]
+        if "seconds" not in first:
+            stages.append(dict(first))
+            continue
+        seconds = [run[index]["seconds"] for run in runs]
+        stage = {"stage": name, "min_seconds": min(seconds), "median_seconds": statistics.median(seconds)}
+        if peaks is not None and "peak_bytes" in peaks[index]:
+            stage["peak_bytes"] = peaks[index]["peak_bytes"]
+        stages.append(stage)
+    return {
+        "x_max": x_max,
+        "y_max": y_max,
+        "cells": x_max * y_max,
+        "runs": len(runs),
+        "stages": stages,
+        "total_seconds": sum(stage.get("min_seconds", 0.0) for stage in stages),
+        "peak_bytes": peak_bytes,
+    }
+
+def scaling_exponents(size_results):
+    """
+    Fits seconds ~ cells ** k per stage by least squares on the log-log points
+    of every size where the stage ran, and returns {stage: k} for the stages
+    with at least two such sizes.
+    """
+    exponents = {}
+    for index, name in enumerate(STAGE_NAMES):
+        points = [(math.log(result["cells"]), math.log(result["stages"][index]["min_seconds"]))
+                  for result in size_results if result["stages"][index].get("min_seconds", 0) > 0]
+        if len({x for x, _ in points}) < 2:
+            continue
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        numerator = sum((x - mean_x) * (y - mean_y) for x, y in points)
+        denominator = sum((x - mean_x) ** 2 for x, _ in points)
+        exponents[name] = numerator / denominator
+    return exponents
+
+def run_benchmark(sizes=DEFAULT_SIZES, map_id=0, repeat=3, budget=10.0, board_backend="flat", path_engine="heap",
+                  trace_memory=True, golden=True, progress=None):
+    """
+    Runs the golden-output check and the stage benchmark for every size and
+    returns the machine-readable report as a dict. progress, if given, is
+    called with each size result as it completes.
+    """
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "map_id": map_id,
+        "board_backend": board_backend,
+        "path_engine": path_engine,
+        "repeat": repeat,
+    }
+    if golden:
+        failures = check_golden(board_backend, path_engine)
+        report["golden"] = {
+            "passed": not failures,
+            "failures": [{"x_max": x_max, "y_max": y_max, "map_id": failed_id} for x_max, y_max, failed_id in failures],
+        }
+    results = []
+    for x_max, y_max in sizes:
+        result = benchmark_size(x_max, y_max, map_id, repeat, budget, board_backend, path_engine, trace_memory)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    report["sizes"] = results
+    report["scaling"] = scaling_exponents(results)
+    return report
+
+def format_size_result(result):
+    """Returns a human-readable table of one size result."""
+    lines = ["%dx%d (%d cells, %d run%s)" % (result["x_max"], result["y_max"], result["cells"], result["runs"],
+                                             "" if result["runs"] == 1 else "s")]
+    for stage in result["stages"]:
+        if "min_seconds" in stage:
+            peak = stage.get("peak_bytes")
+            lines.append("  %-32s %10.4f s  %s" % (stage["stage"], stage["min_seconds"],
+                                                    "" if peak is None else "%10.1f MiB" % (peak / 2 ** 20)))
+        elif "error" in stage:
+            lines.append("  %-32s failed: %s" % (stage["stage"], stage["error"]))
+        else:
+            lines.append("  %-32s skipped" % stage["stage"])
+    return "\n".join(lines)
+
+def parse_sizes(text):
+    """Parses a comma-separated list of sizes such as "20x11,100x100"."""
+    sizes = []
+    for part in text.split(","):
+        part = part.strip()
+        if part:
+            x_max, _, y_max = part.partition("x")
+            sizes.append((int(x_max), int(y_max)))
+    return sizes
+
+def build_parser():
+    """Returns the argument parser of the benchmark."""
+    parser = argparse.ArgumentParser(
+        prog="python -m py_hexmap.benchmark",
+        description="Time every stage of map generation across board sizes and check the golden maps.")
+    parser.add_argument("--sizes", type=parse_sizes, default=None,
+                        help='board sizes, e.g. "20x11,100x100" (default: 20x11 up to 2000x2000)')
+    parser.add_argument("--quick", action="store_true", help="only 20x11, 45x40 and 100x100")
+    parser.add_argument("--seed", type=int, default=0, help="map id to generate (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size (default: 3)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="stop repeating a size after this many seconds (default: 10)")
+    parser.add_argument("--backend", choices=("dict", "flat"), default="flat",
+                        help="board backend (default: flat; dict needs several GB at 2000x2000)")
+    parser.add_argument("--path-engine", choices=("heap", "legacy"), default="heap")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--no-golden", action="store_true", help="skip the golden-output check")
+    parser.add_argument("-o", "--output", default="-", help='JSON report file, "-" for stdout (default)')
+    return parser
+
+def main(argv=None):
+    """
+    Runs the benchmark, writes the JSON report and prints the tables to
+    stderr. Returns 1 if the golden-output check failed.
+    """
+    args = build_parser().parse_args(argv)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    report = run_benchmark(sizes, args.seed, args.repeat, args.budget, args.backend, args.path_engine,
+                           trace_memory=not args.no_memory, golden=not args.no_golden,
+                           progress=lambda result: print(format_size_result(result), file=sys.stderr, flush=True))
+    for stage, exponent in report["scaling"].items():
+        print("  %-32s ~ cells^%.2f" % (stage, exponent), file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    golden = report.get("golden")
+    if golden is not None and not golden["passed"]:
+        for failure in golden["failures"]:
+            print("golden map changed: %(map_id)d at %(x_max)dx%(y_max)d" % failure, file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
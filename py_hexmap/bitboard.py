@@ -0,0 +1,153 @@
+from .flat_board import ESTATE_CODES, TERRAIN_CODES, FlatBoard
+
+# Terrain and estate bytes of a `FlatBoard` column translated to "0"/"1"
+# digits, so `int(digits[::-1], 2)` turns a column into a bitmask.
+LAND_DIGITS = bytes(ord("1") if code == TERRAIN_CODES["land"] else ord("0") for code in range(256))
+WATER_DIGITS = bytes(ord("1") if code == TERRAIN_CODES["water"] else ord("0") for code in range(256))
+ESTATE_DIGITS = bytes(ord("0") if code == ESTATE_CODES[""] else ord("1") for code in range(256))
+
+def _flat_columns(cells, digits, y_max, xs):
+    """
+    Reads the columns xs of a `FlatBoard` cell array into one bitmask per
+    column (bit y is cell y).
+    """
+    columns = []
+    for x in xs:
+        text = bytes(cells[x * y_max:(x + 1) * y_max]).translate(digits)[::-1]
+        columns.append(int(text, 2) if text else 0)
+    return columns
+
+def board_columns(board, test, xs=None):
+    """
+    Returns one bitmask per column with bit y set where test(field) is
+    true, for the columns xs (all by default).
+    """
+    columns = []
+    for x in range(board.x_max) if xs is None else xs:
+        mask = 0
+        for y in range(board.y_max):
+            if test(board.get_field(x, y)):
+                mask |= 1 << y
+        columns.append(mask)
+    return columns
+
+def neighbor_union(columns, y_max, first_x=0):
+    """
+    Returns, per column, the bitmask of cells that have at least one
+    neighbor whose bit is set in columns. In even columns the side
+    neighbors of cell y are y - 1 and y, in odd columns y and y + 1
+    (see `NEIGHBOR_OFFSETS`); in the same column they are y - 1 and y + 1.
+    columns[0] is board column first_x; columns outside the list count
+    as empty.
+    """
+    full = (1 << y_max) - 1
+    x_max = len(columns)
+    result = []
+    for x in range(x_max):
+        column = columns[x]
+        sides = (columns[x - 1] if x > 0 else 0) | (columns[x + 1] if x + 1 < x_max else 0)
+        if (first_x + x) % 2 == 0:
+            sides |= sides << 1
+        else:
+            sides |= sides >> 1
+        result.append((column << 1 | column >> 1 | sides) & full)
+    return result
+
+def iter_bits(mask):
+    """Yields the positions of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def expand_land(board, strip_columns=None):
+    """
+    `HexMap.set_land_fields` on column bitmasks. Water with a land neighbor
+    is marked `is_land` and becomes land, then water left without a water
+    neighbor becomes land.
+
+    The loop version fills water cells one at a time in board order, but
+    filling a cell can never enable another fill: two water cells that are
+    neighbors each keep the other from filling. So the fill depends only on
+    the terrain before it and can be computed for all cells at once.
+
+    With strip_columns the board is processed that many columns at a time,
+    so only a strip and its margin are held as bitmasks. The coast of a
+    column depends on the columns next to it and the fill on the coast of
+    those, so each strip reads two columns on either side; the two columns
+    before a strip were already rewritten and are taken from the terrain
+    read for the previous strip.
+    """
+    x_max = board.x_max
+    y_max = board.y_max
+    full = (1 << y_max) - 1
+    strip_columns = max(1, strip_columns or x_max)
+    flat = isinstance(board, FlatBoard)
+    land_code = TERRAIN_CODES["land"]
+    original = {}
+    for start in range(0, x_max, strip_columns):
+        stop = min(start + strip_columns, x_max)
+        low = max(0, start - 2)
+        high = min(x_max, stop + 2)
+        # The carried-over columns are the first ones of this strip's range.
+        unread = range(low + len(original), high)
+        if flat:
+            masks = _flat_columns(board.terrain, LAND_DIGITS, y_max, unread)
+        else:
+            masks = board_columns(board, lambda field: field.type == "land", unread)
+        original.update(zip(unread, masks))
+        land = [original[x] for x in range(low, high)]
+        coast = [mask & ~column for mask, column in zip(neighbor_union(land, y_max, low), land)]
+        land = [column | grown for column, grown in zip(land, coast)]
+        water = [~column & full for column in land]
+        filled = [column & ~mask for column, mask in zip(water, neighbor_union(water, y_max, low))]
+
+        for x in range(start, stop):
+            for y in iter_bits(coast[x - low]):
+                if flat:
+                    board.is_land[x * y_max + y] = 1
+                    board.terrain[x * y_max + y] = land_code
+                else:
+                    field = board.get_field(x, y)
+                    field.is_land = True
+                    field.type = "land"
+            for y in iter_bits(filled[x - low]):
+                if flat:
+                    board.terrain[x * y_max + y] = land_code
+                else:
+                    board.get_field(x, y).type = "land"
+        for x in range(low, stop - 2):
+            del original[x]
+
+class TownSites:
+    """
+    The neighbor check of `HexMap.generate_towns` on column bitmasks: a
+    field may hold a town only if none of its neighbors is water or has an
+    estate. Fields that gain an estate are recorded with `block`.
+    """
+    __slots__ = ("columns", "x_max")
+
+    def __init__(self, board):
+        """Reads water and estates from a board after `generate_party_capitals`."""
+        if isinstance(board, FlatBoard):
+            xs = range(board.x_max)
+            water = _flat_columns(board.terrain, WATER_DIGITS, board.y_max, xs)
+            estate = _flat_columns(board.estate, ESTATE_DIGITS, board.y_max, xs)
+            self.columns = [a | b for a, b in zip(water, estate)]
+        else:
+            self.columns = board_columns(board, lambda field: field.type == "water" or field.estate != "")
+        self.x_max = board.x_max
+
+    def is_clear(self, x, y):
+        """Tells whether no neighbor of (x, y) is blocked."""
+        columns = self.columns
+        sides = (columns[x - 1] if x > 0 else 0) | (columns[x + 1] if x + 1 < self.x_max else 0)
+        # Shifted up by one so bit y stands for cell y - 1. The neighbors are
+        # y - 1 and y + 1 in the same column, and y - 1 and y (even x) or
+        # y and y + 1 (odd x) in the side columns.
+        if (columns[x] << 1) >> y & 0b101:
+            return False
+        return not (sides << 1) >> y & (0b011 if x % 2 == 0 else 0b110)
+
+    def block(self, x, y):
+        self.columns[x] |= 1 << y
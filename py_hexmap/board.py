@@ -1,3 +1,13 @@
+import functools
+from array import array
+
+# (dx, dy) of the six neighbors, in `Field.neighbors` order, for fields in
+# even and odd columns.
+NEIGHBOR_OFFSETS = (
+    ((1, 0), (0, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)),
+    ((1, 1), (0, 1), (-1, 1), (-1, 0), (0, -1), (1, 0)),
+)
+
 def get_field_key(x, y):
     """
     Generates a unique string key for a map field based on its coordinates.
@@ -17,6 +27,42 @@ def validate_location(x, y, board):
     else:
         return None
 
+@functools.lru_cache(maxsize=16)
+def get_neighbor_table(x_max, y_max):
+    """
+    Returns the neighbor topology of a full x_max by y_max board as a flat
+    array of six indexes per field (`x * y_max + y`), -1 where the neighbor
+    falls off the board. The table depends only on the board shape, so it is
+    built once per shape and shared by every map of that size; treat it as
+    read-only.
+    """
+    table = array("i", [-1]) * (6 * x_max * y_max)
+    position = 0
+    for x in range(x_max):
+        offsets = NEIGHBOR_OFFSETS[x % 2]
+        for y in range(y_max):
+            for dx, dy in offsets:
+                n_x = x + dx
+                n_y = y + dy
+                if 0 <= n_x < x_max and 0 <= n_y < y_max:
+                    table[position] = n_x * y_max + n_y
+                position += 1
+    return table
+
+@functools.lru_cache(maxsize=16)
+def get_neighbor_points(x_max, y_max):
+    """
+    Returns `get_neighbor_table` as one tuple per field of `Point2D`/None
+    entries, the form `Field.neighbors` uses. Each location is a single
+    shared `Point2D`, so these must not be modified.
+    """
+    table = get_neighbor_table(x_max, y_max)
+    points = [Point2D(index // y_max, index % y_max) for index in range(x_max * y_max)]
+    return tuple(
+        tuple(points[index] if index >= 0 else None for index in table[base:base + 6])
+        for base in range(0, len(table), 6)
+    )
+
 class Board:
     """
     A data structure that holds the state of the entire map, including all fields,
@@ -42,6 +88,83 @@ class Board:
         self.towns = []
         self.parties_capitals = [None] * 4
         self.town_names = []
+        # Bumped by every `BoardEditor` edit so compiled views can tell the board changed.
+        self.revision = 0
+        self._editor = None
+
+    def new_field(self, x, y):
+        """
+        Creates the field at (x, y), stores it on the board and returns it.
+        The pixel centre is derived from the hex size here because the board
+        owns the hex geometry.
+        """
+        field = Field()
+        field.f_x = x
+        field.f_y = y
+        field.x = x * (((self.hex_width // 4) * 3)) + (self.hex_width // 2)
+        if x % 2 == 0:
+            field.y = y * self.hex_height + (self.hex_height // 2)
+        else:
+            field.y = y * self.hex_height + self.hex_height
+        self.fields[get_field_key(x, y)] = field
+        return field
+
+    def get_field(self, x, y):
+        """
+        Retrieves the field at (x, y), or None if it does not exist.
+        """
+        return self.fields.get(get_field_key(x, y))
+
+    def is_capital_location(self, x, y):
+        """
+        Tells whether (x, y) is one of the four fields near the corners that
+        always become land and hold the party capitals.
+        """
+        return (x == 1 and y == 1) or (x == self.x_max - 2 and y == 1) or (x == self.x_max - 2 and y == self.y_max - 2) or (x == 1 and y == self.y_max - 2)
+
+    def capital_locations(self):
+        """
+        Returns the distinct on-board (x, y) locations for which
+        `is_capital_location` is true. Tiny boards have fewer than four.
+        """
+        locations = []
+        for location in ((1, 1), (self.x_max - 2, 1), (self.x_max - 2, self.y_max - 2), (1, self.y_max - 2)):
+            if 0 <= location[0] < self.x_max and 0 <= location[1] < self.y_max and location not in locations:
+                locations.append(location)
+        return locations
+
+    def new_land_group(self):
+        """
+        Returns an empty container for the fields of one land group.
+        """
+        return []
+
+    def editor(self):
+        """
+        Returns the `BoardEditor` of this board, created on first use. Edits
+        made through it keep land groups, towns and ports consistent.
+        """
+        if self._editor is None:
+            # Imported here: the editor depends on the pathfinder, which
+            # depends on this module.
+            from .edits import BoardEditor
+            self._editor = BoardEditor(self)
+        return self._editor
+
+    def set_terrain(self, x, y, terrain):
+        """Turns the field at (x, y) into "land" or "water"; see `BoardEditor.set_terrain`."""
+        self.editor().set_terrain(x, y, terrain)
+
+    def set_estate(self, x, y, estate, town_name=""):
+        """Sets the estate of the field at (x, y); see `BoardEditor.set_estate`."""
+        self.editor().set_estate(x, y, estate, town_name)
+
+    def link_neighbors(self, field):
+        """
+        Stores the neighbor locations of a field, taken from the table shared
+        by all boards of this shape.
+        """
+        field.neighbors = get_neighbor_points(self.x_max, self.y_max)[field.f_x * self.y_max + field.f_y]
 
     def get_neighbor_field(self, field, neighbor_index):
         """
@@ -61,6 +184,9 @@ class Field:
     coordinates, and any structures on it (town, port). It is the fundamental
     building block of the map.
     """
+    __slots__ = ("f_x", "f_y", "x", "y", "land_id", "type", "capital",
+                 "neighbors", "is_land", "estate", "town_name")
+
     def __init__(self):
         """Initializes a field with default values."""
         self.f_x = 0
@@ -81,6 +207,8 @@ class Point2D:
     It is used by `validate_location` and is a necessary component for
     representing locations on the map grid.
     """
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         """Initializes a point with X and Y coordinates."""
         self.x = x
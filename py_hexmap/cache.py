@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from .generator import HexMap
+from .rng import canonical_map_id
+from .compact import CompactGrid
+
+class MapCache:
+    """
+    An in-process LRU cache of generated maps keyed by
+    `(canonical_map_id(map_id), x_max, y_max)`, so seeds that differ by a
+    multiple of the RNG modulus share one entry.
+
+    Maps are stored as immutable `CompactGrid`s and decoded on every matrix
+    hit, so callers never share (and cannot modify) a cached matrix.
+    The cache is bounded by entry count, by stored bytes, or both, and is safe
+    to use from several threads.
+    """
+    def __init__(self, max_entries=1024, max_bytes=None):
+        """
+        Args:
+            max_entries (int, optional): Maximum number of maps kept.
+            max_bytes (int, optional): Maximum total size of the stored codes
+                                       and town names.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, map_id, x_max, y_max):
+        """Returns the cache key of a map."""
+        return (canonical_map_id(map_id), x_max, y_max)
+
+    def get(self, map_id, x_max, y_max):
+        """
+        Returns the cached matrix for a map, or None on a miss.
+        """
+        grid = self.get_grid(map_id, x_max, y_max)
+        if grid is None:
+            return None
+        return grid.to_matrix()
+
+    def get_grid(self, map_id, x_max, y_max):
+        """
+        Returns the cached `CompactGrid` for a map, or None on a miss.
+        """
+        key = self.key(map_id, x_max, y_max)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[0]
+
+    def put(self, map_id, x_max, y_max, grid):
+        """
+        Stores the `CompactGrid` of a map, evicting the least recently used
+        maps while a bound is exceeded.
+        """
+        key = self.key(map_id, x_max, y_max)
+        grid = CompactGrid(grid.x_max, grid.y_max, bytes(grid.codes), grid.town_names)
+        entry_bytes = len(grid.codes) + sum(len(name) for name in grid.town_names)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (grid, entry_bytes)
+            self.current_bytes += entry_bytes
+            while self._entries and ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                                     or (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted[1]
+                self.evictions += 1
+
+    def get_or_generate(self, map_id, x_max, y_max, board_backend="dict"):
+        """
+        Returns the matrix for a map, generating and storing it on a miss.
+        """
+        return self.get_or_generate_grid(map_id, x_max, y_max, board_backend).to_matrix()
+
+    def get_or_generate_grid(self, map_id, x_max, y_max, board_backend="dict"):
+        """
+        Returns the `CompactGrid` for a map, generating and storing it on a miss.
+        """
+        grid = self.get_grid(map_id, x_max, y_max)
+        if grid is not None:
+            return grid
+        hex_map = HexMap(canonical_map_id(map_id), x_max, y_max, board_backend=board_backend)
+        hex_map.generate_map()
+        grid = CompactGrid.from_board(hex_map.board)
+        self.put(map_id, x_max, y_max, grid)
+        return grid
+
+    def invalidate(self, map_id=None, x_max=None, y_max=None):
+        """
+        Removes every cached map matching the given seed and/or size; with no
+        arguments the whole cache is cleared. Returns the number removed.
+        """
+        canonical = None if map_id is None else canonical_map_id(map_id)
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (canonical is None or key[0] == canonical)
+                    and (x_max is None or key[1] == x_max)
+                    and (y_max is None or key[2] == y_max)]
+            for key in keys:
+                self.current_bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def clear(self):
+        """Removes every cached map and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Returns the counters and current size as a dictionary."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,201 @@
+import struct
+from .flat_board import FlatBoard, flat_display_strings
+from .utils import get_field_display_string
+
+# Cell codes of a `CompactGrid`. Town k of the grid's name table is stored as
+# TOWN_CODE + k; the 252 town names of `generate_all_towns` always fit in a byte.
+WATER_CODE = 0
+LAND_CODE = 1
+PORT_CODE = 2
+TOWN_CODE = 3
+MAX_TOWNS = 256 - TOWN_CODE
+
+# Serialized layout: magic, x_max, y_max, number of town names, then the
+# x_max * y_max codes and each name as a 2-byte length plus UTF-8 bytes.
+GRID_MAGIC = b"HXG1"
+GRID_HEADER = struct.Struct("<4sIIH")
+NAME_LENGTH = struct.Struct("<H")
+
+# Display strings of the fixed codes, indexed by code.
+CODE_NAMES = ("water", "land", "port")
+
+class CompactGrid:
+    """
+    A map as one byte per field plus a table of town names; the compact
+    counterpart of the string matrix from `fields_to_matrix_representation`.
+
+    Codes are stored column by column (`x * y_max + y`), the same order as the
+    matrix rows. Conversion to and from the matrix is lossless.
+    """
+    __slots__ = ("x_max", "y_max", "codes", "town_names")
+
+    def __init__(self, x_max: int, y_max: int, codes, town_names):
+        """
+        Args:
+            x_max (int): The maximum X-coordinate for the map (width).
+            y_max (int): The maximum Y-coordinate for the map (height).
+            codes (bytes-like): x_max * y_max cell codes.
+            town_names (list[str]): The names town codes refer to.
+        """
+        if len(codes) != x_max * y_max:
+            raise ValueError("expected " + str(x_max * y_max) + " codes, got " + str(len(codes)))
+        self.x_max = x_max
+        self.y_max = y_max
+        self.codes = codes
+        self.town_names = list(town_names)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactGrid):
+            return NotImplemented
+        return (self.x_max == other.x_max and self.y_max == other.y_max
+                and self.codes == other.codes and self.town_names == other.town_names)
+
+    def __repr__(self):
+        return "CompactGrid(" + str(self.x_max) + "x" + str(self.y_max) + ", " + str(len(self.town_names)) + " towns)"
+
+    @classmethod
+    def from_board(cls, board, out=None):
+        """
+        Encodes a generated board directly, without building the string matrix.
+
+        Args:
+            board (Board): A generated board of either backend.
+            out (writable buffer, optional): Where to write the codes, e.g. a
+                                             shared memory block. A new
+                                             bytearray is used when omitted.
+        """
+        size = board.x_max * board.y_max
+        codes = bytearray(size) if out is None else out
+        if isinstance(board, FlatBoard):
+            town_names = _encode_flat_board(board, codes)
+        else:
+            town_names = _encode_board(board, codes)
+        return cls(board.x_max, board.y_max, codes, town_names)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """
+        Encodes a matrix as returned by `generate_map_data`. Every string other
+        than "water", "land" and "port" is a town name.
+        """
+        x_max = len(matrix)
+        y_max = len(matrix[0]) if x_max else 0
+        codes = bytearray(x_max * y_max)
+        town_names = []
+        town_codes = {}
+        index = 0
+        for column in matrix:
+            if len(column) != y_max:
+                raise ValueError("matrix columns differ in length")
+            for display in column:
+                codes[index] = _display_code(display, town_names, town_codes)
+                index += 1
+        return cls(x_max, y_max, codes, town_names)
+
+    def to_matrix(self):
+        """Returns the 2D list of strings `fields_to_matrix_representation` gives."""
+        names = list(CODE_NAMES) + self.town_names
+        y_max = self.y_max
+        codes = self.codes
+        return [[names[code] for code in codes[x * y_max:(x + 1) * y_max]] for x in range(self.x_max)]
+
+    def iter_columns(self):
+        """Yields the matrix of `to_matrix` one column at a time."""
+        names = list(CODE_NAMES) + self.town_names
+        y_max = self.y_max
+        codes = self.codes
+        for x in range(self.x_max):
+            yield [names[code] for code in codes[x * y_max:(x + 1) * y_max]]
+
+    def memoryview(self):
+        """Returns a read-only memoryview of the codes, without copying them."""
+        return memoryview(self.codes).toreadonly()
+
+    def encoded_names(self):
+        """Returns the serialized town-name table."""
+        parts = []
+        for name in self.town_names:
+            data = name.encode("utf-8")
+            parts.append(NAME_LENGTH.pack(len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    def header(self):
+        """Returns the serialized header."""
+        return GRID_HEADER.pack(GRID_MAGIC, self.x_max, self.y_max, len(self.town_names))
+
+    def write(self, stream):
+        """
+        Writes the serialized grid to a binary stream and returns the number
+        of bytes written. The codes are written straight from their buffer.
+        """
+        header = self.header()
+        names = self.encoded_names()
+        stream.write(header)
+        stream.write(self.memoryview())
+        stream.write(names)
+        return len(header) + len(self.codes) + len(names)
+
+    def to_bytes(self):
+        """Returns the serialized grid."""
+        return self.header() + bytes(self.codes) + self.encoded_names()
+
+    def __bytes__(self):
+        return self.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reads a grid serialized by `to_bytes` or `write`. The codes of the
+        returned grid are a memoryview into data, not a copy.
+        """
+        view = memoryview(data)
+        magic, x_max, y_max, name_count = GRID_HEADER.unpack_from(view, 0)
+        if magic != GRID_MAGIC:
+            raise ValueError("not a compact grid")
+        offset = GRID_HEADER.size
+        codes = view[offset:offset + x_max * y_max]
+        offset += x_max * y_max
+        town_names = []
+        for _ in range(name_count):
+            (length,) = NAME_LENGTH.unpack_from(view, offset)
+            offset += NAME_LENGTH.size
+            town_names.append(str(view[offset:offset + length], "utf-8"))
+            offset += length
+        return cls(x_max, y_max, codes, town_names)
+
+def _display_code(display, town_names, town_codes):
+    """Returns the code of a display string, adding new town names to the table."""
+    if display == "water":
+        return WATER_CODE
+    if display == "land":
+        return LAND_CODE
+    if display == "port":
+        return PORT_CODE
+    code = town_codes.get(display)
+    if code is None:
+        if len(town_names) >= MAX_TOWNS:
+            raise ValueError("more than " + str(MAX_TOWNS) + " towns do not fit in a compact grid")
+        code = TOWN_CODE + len(town_names)
+        town_codes[display] = code
+        town_names.append(display)
+    return code
+
+def _encode_board(board, codes):
+    """Fills codes from a `Board` of `Field` objects and returns the name table."""
+    town_names = []
+    town_codes = {}
+    index = 0
+    for x in range(board.x_max):
+        for y in range(board.y_max):
+            codes[index] = _display_code(get_field_display_string(board.get_field(x, y)), town_names, town_codes)
+            index += 1
+    return town_names
+
+def _encode_flat_board(board, codes):
+    """Fills codes straight from the arrays of a `FlatBoard` and returns the name table."""
+    town_names = []
+    town_codes = {}
+    for index, display in enumerate(flat_display_strings(board, 0, board.x_max * board.y_max)):
+        codes[index] = _display_code(display, town_names, town_codes)
+    return town_names
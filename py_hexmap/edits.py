@@ -0,0 +1,415 @@
+from .board import get_neighbor_table
+from .pathfinding import Pathfinder
+from .ports import find_port_routes
+
+TERRAINS = ("land", "water")
+ESTATES = ("", "town", "port")
+
+class BoardEditor:
+    """
+    Applies terrain and estate edits to a generated board and keeps what was
+    derived from them up to date: `land_count`, the land groups
+    (`land_groups` and each field's `land_id`), `towns`, and the ports that
+    `generate_ports` placed along the routes between consecutive towns.
+    Those routes are not kept by generation: the editor finds them when it
+    is created by running the port searches again with `find_port_routes`.
+
+    The work per edit follows the edited region rather than the board:
+    joining land groups relabels the smaller ones, splitting a group walks
+    the pieces in lockstep so only the smaller pieces are visited in full,
+    and only the port routes through the edited field are searched again.
+    Fields leave their group in constant time: the editor keeps every
+    land field's position in its group and fills the gap with the group's
+    last field.
+
+    Land group ids are stable, but the order of the fields in an edited
+    group is not. A group merged into another is left empty, and a piece
+    split off a group gets a new id at the end of `land_groups`.
+
+    Attributes:
+        listeners (list[callable]): Called with each field whose estate
+                                    changes, after the change; see
+                                    `subscribe`.
+        edits (int): Edits applied.
+        fields_visited (int): Fields visited while relabeling land groups.
+        routes_searched (int): Port routes searched again.
+    """
+    def __init__(self, board, pathfinder=None):
+        """
+        Args:
+            board (Board): A board finished by `HexMap.generate_map`.
+            pathfinder (Pathfinder, optional): Used to search port routes
+                again; a heap `Pathfinder` by default.
+        """
+        self.board = board
+        self.pathfinder = pathfinder if pathfinder is not None else Pathfinder()
+        self.neighbor_ids = get_neighbor_table(board.x_max, board.y_max)
+        # (start index, end index) -> [path, port indexes, ports counted]
+        self.routes = {}
+        # field index -> keys of the routes whose path contains it
+        self.route_cells = {}
+        # key of a route without a path -> the towns its search ran into, and
+        # town index -> keys of those routes
+        self.failed = {}
+        self.failed_cells = {}
+        # field index -> number of routes that place a port on it
+        self.port_support = {}
+        # land field index -> its position in its land group
+        self.slots = {}
+        for group in board.land_groups:
+            for position, member in enumerate(group):
+                self.slots[self._index(member)] = position
+        self.port_num = 0
+        self.edits = 0
+        self.fields_visited = 0
+        self.routes_searched = 0
+        self.listeners = []
+        for start, end, path in find_port_routes(board, self.pathfinder):
+            self._add_route((self._index(start), self._index(end)), path, False)
+
+    def subscribe(self, listener):
+        """Calls listener(field) after every estate change."""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """Stops calling a listener added with `subscribe`."""
+        self.listeners.remove(listener)
+
+    def _index(self, field):
+        return field.f_x * self.board.y_max + field.f_y
+
+    def _field(self, index):
+        return self.board.get_field(index // self.board.y_max, index % self.board.y_max)
+
+    def _get(self, x, y):
+        field = self.board.get_field(x, y)
+        if field is None:
+            raise IndexError("no field at (" + str(x) + ", " + str(y) + ")")
+        return field
+
+    def set_terrain(self, x, y, terrain):
+        """
+        Turns the field at (x, y) into "land" or "water". A port flooded by
+        the edit is removed; towns must be removed with `set_estate` before
+        their field can be flooded.
+        """
+        if terrain not in TERRAINS:
+            raise ValueError("terrain must be one of " + ", ".join(TERRAINS))
+        field = self._get(x, y)
+        if field.type == terrain:
+            return
+        if terrain == "water" and field.estate == "town":
+            raise ValueError("remove the town at (" + str(x) + ", " + str(y) + ") before flooding it")
+        self.edits += 1
+        self.board.revision += 1
+        index = self._index(field)
+        if field.estate == "port":
+            self._clear_port(index, field)
+        field.type = terrain
+        if terrain == "land":
+            self.board.land_count += 1
+            self._join(index, field)
+        else:
+            self.board.land_count -= 1
+            self._split(index, field)
+        self._reroute(self.route_cells.get(index, ()))
+
+    def set_estate(self, x, y, estate, town_name=""):
+        """
+        Sets the estate of the land field at (x, y) to "", "town" or "port".
+
+        A new town is appended to `towns` and linked to the previous last
+        town by a port route; routes through its field are searched again.
+        Removing a town joins the routes on either side of it into one, and
+        a removed capital leaves its slot in `parties_capitals` empty. Ports
+        set or removed here are taken as given; routes searched later may
+        still place a port on the field.
+        """
+        if estate not in ESTATES:
+            raise ValueError("estate must be one of " + ", ".join(repr(name) for name in ESTATES))
+        field = self._get(x, y)
+        if estate and field.type != "land":
+            raise ValueError("a " + estate + " needs a land field")
+        if field.estate == estate and (estate != "town" or field.town_name == town_name):
+            return
+        self.edits += 1
+        self.board.revision += 1
+        index = self._index(field)
+        if field.estate == "town":
+            if estate == "town":
+                field.town_name = town_name
+                return
+            self._remove_town(index, field, estate)
+            return
+        if field.estate == "port":
+            self._clear_port(index, field)
+        self._set_estate(field, estate)
+        if estate == "town":
+            field.town_name = town_name
+            self._add_town(index, field)
+
+    def _set_estate(self, field, estate):
+        field.estate = estate
+        for listener in self.listeners:
+            listener(field)
+
+    def _join(self, index, field):
+        """Adds a field that became land to its neighbors' group, merging the groups it connects."""
+        board = self.board
+        groups = []
+        for neighbor in self._land_neighbors(index):
+            land_id = self._field(neighbor).land_id
+            if land_id not in groups:
+                groups.append(land_id)
+        if not groups:
+            field.land_id = len(board.land_groups)
+            board.land_groups.append(board.new_land_group())
+            self._add_member(field.land_id, index, field)
+            return
+        target = max(groups, key=lambda land_id: len(board.land_groups[land_id]))
+        field.land_id = target
+        self._add_member(target, index, field)
+        for land_id in groups:
+            if land_id == target:
+                continue
+            for member in board.land_groups[land_id]:
+                member.land_id = target
+                self._add_member(target, self._index(member), member)
+                self.fields_visited += 1
+            board.land_groups[land_id] = board.new_land_group()
+
+    def _add_member(self, land_id, index, field):
+        """Appends a field to a land group and records its position."""
+        group = self.board.land_groups[land_id]
+        self.slots[index] = len(group)
+        group.append(field)
+
+    def _remove_member(self, land_id, index):
+        """Removes a field from a land group by moving the group's last field into its place."""
+        group = self.board.land_groups[land_id]
+        position = self.slots.pop(index)
+        last = group.pop()
+        if position < len(group):
+            group[position] = last
+            self.slots[self._index(last)] = position
+
+    def _split(self, index, field):
+        """
+        Removes a field that became water from its group and gives every
+        piece the group falls apart into, except one, a new id.
+
+        One breadth-first search starts from each land neighbor and they
+        advance a field at a time in turn. Searches that meet are combined;
+        a search that runs out of fields has found a whole piece. Once at
+        most one search is still running, that one is the piece keeping the
+        old id, so it never has to be walked to its end.
+        """
+        board = self.board
+        land_id = field.land_id
+        field.land_id = -1
+        self._remove_member(land_id, index)
+        starts = self._land_neighbors(index)
+        if len(starts) <= 1:
+            return
+
+        owner = {}
+        parent = list(range(len(starts)))
+        queues = []
+        members = []
+        for search, start in enumerate(starts):
+            owner[start] = search
+            queues.append([start])
+            members.append([start])
+
+        def find(search):
+            while parent[search] != search:
+                parent[search] = parent[parent[search]]
+                search = parent[search]
+            return search
+
+        running = set(range(len(starts)))
+        finished = []
+        positions = [0] * len(starts)
+        while len(running) > 1:
+            for search in list(running):
+                if search not in running:
+                    continue
+                queue = queues[search]
+                if positions[search] == len(queue):
+                    running.discard(search)
+                    finished.append(search)
+                    continue
+                current = queue[positions[search]]
+                positions[search] += 1
+                self.fields_visited += 1
+                for neighbor in self._land_neighbors(current):
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        queue.append(neighbor)
+                        members[search].append(neighbor)
+                        continue
+                    other = find(other)
+                    if other == search:
+                        continue
+                    # Keep the longer queue and move the other one's unvisited rest.
+                    keep, drop = (search, other) if len(members[search]) >= len(members[other]) else (other, search)
+                    parent[drop] = keep
+                    queues[keep].extend(queues[drop][positions[drop]:])
+                    members[keep].extend(members[drop])
+                    queues[drop] = members[drop] = None
+                    running.discard(drop)
+                    search = keep
+                    queue = queues[keep]
+
+        if not running:
+            # Every piece was walked in full; the largest keeps the old id.
+            finished.sort(key=lambda search: len(members[search]))
+            finished.pop()
+        for search in finished:
+            new_id = len(board.land_groups)
+            board.land_groups.append(board.new_land_group())
+            for member in members[search]:
+                member_field = self._field(member)
+                member_field.land_id = new_id
+                self._remove_member(land_id, member)
+                self._add_member(new_id, member, member_field)
+
+    def _land_neighbors(self, index):
+        """Returns the indexes of the land neighbors of a field."""
+        neighbors = []
+        for neighbor in self.neighbor_ids[index * 6:index * 6 + 6]:
+            if neighbor >= 0 and self._field(neighbor).type == "land":
+                neighbors.append(neighbor)
+        return neighbors
+
+    def _add_town(self, index, field):
+        towns = self.board.towns
+        self._reroute(self.route_cells.get(index, ()))
+        towns.append(field)
+        if len(towns) > 1:
+            self._route(self._index(towns[-2]), index)
+
+    def _remove_town(self, index, field, estate):
+        """Removes a town, giving its field the new estate before its routes are searched again."""
+        board = self.board
+        position = board.towns.index(field)
+        previous = self._index(board.towns[position - 1]) if position > 0 else None
+        following = self._index(board.towns[position + 1]) if position + 1 < len(board.towns) else None
+        if previous is not None:
+            self._drop_route((previous, index))
+        if following is not None:
+            self._drop_route((index, following))
+        del board.towns[position]
+        field.town_name = ""
+        if field.capital != -1:
+            board.parties_capitals[field.capital] = None
+            field.capital = -1
+        self._set_estate(field, estate)
+        if previous is not None and following is not None:
+            self._route(previous, following)
+        # The town may have been all that blocked a route; only the searches
+        # that ran into it can get further.
+        blocked = self.failed_cells.get(index, ())
+        self._reroute([key for key in self.routes if key in blocked])
+
+    def _clear_port(self, index, field):
+        """Removes a port and its support from every route that placed it."""
+        self._set_estate(field, "")
+        if self.port_support.pop(index, None) is None:
+            return
+        for key in self.route_cells.get(index, ()):
+            route = self.routes[key]
+            if index in route[1]:
+                route[1].remove(index)
+
+    def _reroute(self, keys):
+        for key in list(keys):
+            if key in self.routes:
+                self._drop_route(key)
+                self._route(key[0], key[1])
+
+    def _route(self, start, end):
+        """
+        Searches the route between two towns with the rule of
+        `generate_ports` (the water-avoiding path unless it is longer than
+        the number of ports counted so far) and places its ports.
+        """
+        start_field = self._field(start)
+        end_field = self._field(end)
+        self.routes_searched += 1
+        path = self.pathfinder.find_path(self.board, start_field, end_field, ["town"], True)
+        if path is None or len(path) > self.port_num:
+            path = self.pathfinder.find_path(self.board, start_field, end_field, ["town"], False)
+        self._add_route((start, end), path, True)
+
+    def _add_route(self, key, path, place):
+        """Indexes a route and counts its ports, placing them if place is true."""
+        ports = []
+        counted = 0
+        if path is not None:
+            for position in range(len(path)):
+                cell = self._index(path[position])
+                self.route_cells.setdefault(cell, set()).add(key)
+                if position == 0 or position == len(path) - 1 or path[position].type != "land":
+                    continue
+                count = (path[position + 1].type == "water") + (path[position - 1].type == "water")
+                if count:
+                    counted += count
+                    ports.append(cell)
+                    self.port_support[cell] = self.port_support.get(cell, 0) + 1
+                    if place:
+                        self._set_estate(path[position], "port")
+        else:
+            self.failed[key] = blockers = self._blocking_towns(key[0])
+            for cell in blockers:
+                self.failed_cells.setdefault(cell, set()).add(key)
+        self.routes[key] = [path, ports, counted]
+        self.port_num += counted
+
+    def _blocking_towns(self, start):
+        """
+        Returns the towns bordering the fields a town-avoiding search from
+        start can walk, which are what keeps a failed search from its end.
+        The search that may cross water walks every non-town field it can
+        reach, so terrain does not matter.
+        """
+        seen = {start}
+        queue = [start]
+        towns = []
+        for index in queue:
+            for neighbor in self.neighbor_ids[index * 6:index * 6 + 6]:
+                if neighbor < 0 or neighbor in seen:
+                    continue
+                seen.add(neighbor)
+                if self._field(neighbor).estate == "town":
+                    towns.append(neighbor)
+                else:
+                    queue.append(neighbor)
+        return towns
+
+    def _drop_route(self, key):
+        """Forgets a route and removes the ports no other route places."""
+        path, ports, counted = self.routes.pop(key)
+        self.port_num -= counted
+        for cell in self.failed.pop(key, ()):
+            keys = self.failed_cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.failed_cells[cell]
+        if path is not None:
+            for field in path:
+                cells = self.route_cells.get(self._index(field))
+                if cells is not None:
+                    cells.discard(key)
+                    if not cells:
+                        del self.route_cells[self._index(field)]
+        for cell in ports:
+            support = self.port_support[cell] - 1
+            if support:
+                self.port_support[cell] = support
+                continue
+            del self.port_support[cell]
+            field = self._field(cell)
+            if field.estate == "port":
+                self._set_estate(field, "")
@@ -0,0 +1,376 @@
+from array import array
+from .board import Board, get_neighbor_points, get_neighbor_table
+
+# Codes stored in `FlatBoard.terrain`. The empty string is the value a field
+# holds before `HexMap.add_field` assigns its type.
+TERRAIN_CODES = {"": 0, "land": 1, "water": 2}
+TERRAIN_NAMES = ("", "land", "water")
+
+# Codes stored in `FlatBoard.estate`.
+ESTATE_CODES = {"": 0, "town": 1, "port": 2}
+ESTATE_NAMES = ("", "town", "port")
+
+def parse_field_key(key):
+    """
+    Splits a key built by `get_field_key` back into its (x, y) coordinates.
+    Returns None for strings that are not field keys.
+    """
+    if not isinstance(key, str) or not key.startswith("f"):
+        return None
+    x, sep, y = key[1:].partition("x")
+    if not sep:
+        return None
+    try:
+        return int(x), int(y)
+    except ValueError:
+        return None
+
+def flat_display_strings(board, start, stop):
+    """
+    Yields the `get_field_display_string` of the cells start to stop - 1 of
+    a `FlatBoard`, applying its rules to the arrays without field views.
+    """
+    terrain = board.terrain
+    estate = board.estate
+    capital = board.capital
+    town_name = board.town_name
+    name_table = board.town_name_table
+    water = TERRAIN_CODES["water"]
+    no_estate = ESTATE_CODES[""]
+    port = ESTATE_CODES["port"]
+    for index in range(start, stop):
+        if terrain[index] == water:
+            yield "water"
+        elif capital[index] == -1 and estate[index] == no_estate:
+            yield "land"
+        elif capital[index] == -1 and estate[index] == port:
+            yield "port"
+        else:
+            yield name_table[town_name[index]] if town_name[index] >= 0 else ""
+
+def group_flat_land(board):
+    """
+    Counts the land of a `FlatBoard` and fills its land groups as
+    `HexMap.generate_land_groups` does, reading the arrays and the neighbor
+    table instead of creating a field view per neighbor.
+    """
+    terrain = board.terrain
+    land_id = board.land_id
+    table = board.neighbor_ids
+    land = TERRAIN_CODES["land"]
+    board.land_count += terrain.count(land)
+    for start in range(len(terrain)):
+        if terrain[start] != land or land_id[start] >= 0:
+            continue
+        number = len(board.land_groups)
+        group = board.new_land_group()
+        board.land_groups.append(group)
+        indexes = group.indexes
+        indexes.append(start)
+        land_id[start] = number
+        # Fields are expanded in the order they joined the group; cells that
+        # were never created have no terrain, so they are never land.
+        position = 0
+        while position < len(indexes):
+            base = indexes[position] * 6
+            for neighbor in table[base:base + 6]:
+                if neighbor >= 0 and terrain[neighbor] == land and land_id[neighbor] < 0:
+                    indexes.append(neighbor)
+                    land_id[neighbor] = number
+            position += 1
+
+class FlatBoard(Board):
+    """
+    A `Board` whose cells live in flat arrays indexed by `x * y_max + y`
+    instead of a dictionary of `Field` objects.
+
+    Callers still see `Field`-compatible objects: `get_field`, `fields[key]`
+    and the neighbor helpers return `FieldView` instances that read and write
+    the arrays. Town names are stored as indexes into `town_name_table`.
+    """
+    def __init__(self, x_max: int, y_max: int):
+        """
+        Allocates the cell arrays for a board of the given dimensions.
+
+        Args:
+            x_max (int): The maximum X-coordinate for the map (width).
+            y_max (int): The maximum Y-coordinate for the map (height).
+        """
+        super().__init__(x_max, y_max)
+        size = x_max * y_max
+        self.fields = FlatFields(self)
+        self.created = bytearray(size)
+        self.terrain = bytearray(size)
+        self.is_land = bytearray(size)
+        self.land_id = array("i", bytes(4 * size))
+        self.estate = bytearray(size)
+        self.capital = array("b", bytes(size))
+        self.town_name = array("h", [-1]) * size
+        self.neighbor_ids = get_neighbor_table(x_max, y_max)
+        self.town_name_table = []
+        self.town_name_ids = {}
+
+    def index_of(self, x, y):
+        """
+        Returns the flat index of (x, y), or -1 if it lies outside the board.
+        """
+        if 0 <= x < self.x_max and 0 <= y < self.y_max:
+            return x * self.y_max + y
+        return -1
+
+    def view(self, index):
+        """Returns a `FieldView` for the cell at a flat index."""
+        return FieldView(self, index)
+
+    def new_field(self, x, y):
+        """
+        Marks the cell at (x, y) as created and returns a view of it.
+        """
+        index = self.index_of(x, y)
+        if index < 0:
+            raise IndexError("field outside the board: " + str((x, y)))
+        self.created[index] = 1
+        return FieldView(self, index)
+
+    def get_field(self, x, y):
+        """
+        Retrieves the field at (x, y), or None if it does not exist.
+        """
+        # `index_of`, inlined: this is the most frequent board call.
+        if 0 <= x < self.x_max and 0 <= y < self.y_max:
+            index = x * self.y_max + y
+            if self.created[index]:
+                return FieldView(self, index)
+        return None
+
+    def new_land_group(self):
+        """
+        Returns an empty `LandGroup` that stores flat indexes.
+        """
+        return LandGroup(self)
+
+    def link_neighbors(self, field):
+        """
+        Nothing to store: neighbors are read from the shared `neighbor_ids`
+        table for this board shape.
+        """
+
+    def get_neighbor_field(self, field, neighbor_index):
+        """
+        Retrieves a specific neighbor of a field through the neighbor table.
+        """
+        index = self.neighbor_ids[field.index * 6 + neighbor_index]
+        if index < 0 or not self.created[index]:
+            return None
+        return FieldView(self, index)
+
+    def town_name_code(self, name):
+        """
+        Returns the index of a town name in `town_name_table`, adding it if needed.
+        The empty string maps to -1.
+        """
+        if name == "":
+            return -1
+        code = self.town_name_ids.get(name)
+        if code is None:
+            code = len(self.town_name_table)
+            self.town_name_table.append(name)
+            self.town_name_ids[name] = code
+        return code
+
+class FieldView:
+    """
+    A `Field`-compatible view of one cell of a `FlatBoard`.
+
+    Views are created on demand, so two views of the same cell compare equal
+    instead of being the same object.
+    """
+    __slots__ = ("board", "index")
+
+    def __init__(self, board, index):
+        """Binds the view to a board and a flat index."""
+        self.board = board
+        self.index = index
+
+    def __eq__(self, other):
+        if not isinstance(other, FieldView):
+            return NotImplemented
+        return self.index == other.index and self.board is other.board
+
+    def __hash__(self):
+        return hash((id(self.board), self.index))
+
+    def __repr__(self):
+        return "FieldView(" + str(self.f_x) + ", " + str(self.f_y) + ")"
+
+    @property
+    def f_x(self):
+        return self.index // self.board.y_max
+
+    @property
+    def f_y(self):
+        return self.index % self.board.y_max
+
+    @property
+    def x(self):
+        """The pixel X of the hex centre."""
+        hex_width = self.board.hex_width
+        return self.f_x * ((hex_width // 4) * 3) + (hex_width // 2)
+
+    @property
+    def y(self):
+        """The pixel Y of the hex centre."""
+        hex_height = self.board.hex_height
+        if self.f_x % 2 == 0:
+            return self.f_y * hex_height + (hex_height // 2)
+        return self.f_y * hex_height + hex_height
+
+    @property
+    def type(self):
+        return TERRAIN_NAMES[self.board.terrain[self.index]]
+
+    @type.setter
+    def type(self, value):
+        self.board.terrain[self.index] = TERRAIN_CODES[value]
+
+    @property
+    def is_land(self):
+        return self.board.is_land[self.index] != 0
+
+    @is_land.setter
+    def is_land(self, value):
+        self.board.is_land[self.index] = 1 if value else 0
+
+    @property
+    def land_id(self):
+        return self.board.land_id[self.index]
+
+    @land_id.setter
+    def land_id(self, value):
+        self.board.land_id[self.index] = value
+
+    @property
+    def estate(self):
+        return ESTATE_NAMES[self.board.estate[self.index]]
+
+    @estate.setter
+    def estate(self, value):
+        self.board.estate[self.index] = ESTATE_CODES[value]
+
+    @property
+    def capital(self):
+        return self.board.capital[self.index]
+
+    @capital.setter
+    def capital(self, value):
+        self.board.capital[self.index] = value
+
+    @property
+    def town_name(self):
+        code = self.board.town_name[self.index]
+        if code < 0:
+            return ""
+        return self.board.town_name_table[code]
+
+    @town_name.setter
+    def town_name(self, value):
+        self.board.town_name[self.index] = self.board.town_name_code(value)
+
+    @property
+    def neighbors(self):
+        """The neighbor locations as `Point2D` objects, like `Field.neighbors`."""
+        board = self.board
+        return get_neighbor_points(board.x_max, board.y_max)[self.index]
+
+class LandGroup:
+    """
+    The fields of one land group on a `FlatBoard`, stored as flat indexes.
+    Supports the list operations `HexMap` and `BoardEditor` use: append,
+    remove, pop, len, indexing, item assignment and iteration.
+    """
+    __slots__ = ("board", "indexes")
+
+    def __init__(self, board):
+        """Creates an empty group on the given board."""
+        self.board = board
+        self.indexes = array("i")
+
+    def append(self, field):
+        self.indexes.append(field.index)
+
+    def remove(self, field):
+        self.indexes.remove(field.index)
+
+    def pop(self):
+        return FieldView(self.board, self.indexes.pop())
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, position):
+        return FieldView(self.board, self.indexes[position])
+
+    def __setitem__(self, position, field):
+        self.indexes[position] = field.index
+
+    def __iter__(self):
+        board = self.board
+        for index in self.indexes:
+            yield FieldView(board, index)
+
+class FlatFields:
+    """
+    A read-only mapping over a `FlatBoard` keyed by `get_field_key` strings,
+    so code written against `Board.fields` keeps working.
+    """
+    __slots__ = ("board",)
+
+    def __init__(self, board):
+        """Binds the mapping to a board."""
+        self.board = board
+
+    def _index(self, key):
+        location = parse_field_key(key)
+        if location is None:
+            return -1
+        index = self.board.index_of(location[0], location[1])
+        if index < 0 or not self.board.created[index]:
+            return -1
+        return index
+
+    def __getitem__(self, key):
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        return FieldView(self.board, index)
+
+    def get(self, key, default=None):
+        index = self._index(key)
+        if index < 0:
+            return default
+        return FieldView(self.board, index)
+
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    def __len__(self):
+        return sum(self.board.created)
+
+    def keys(self):
+        board = self.board
+        for index in range(len(board.created)):
+            if board.created[index]:
+                yield "f" + str(index // board.y_max) + "x" + str(index % board.y_max)
+
+    def __iter__(self):
+        return self.keys()
+
+    def values(self):
+        board = self.board
+        for index in range(len(board.created)):
+            if board.created[index]:
+                yield FieldView(board, index)
+
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
@@ -1,8 +1,34 @@
 import math
+from .bitboard import TownSites, expand_land
 from .board import Board, Field, Point2D, get_field_key, validate_location
+from .flat_board import TERRAIN_CODES, FlatBoard, group_flat_land
+from .mapped import MappedBoard
 from .pathfinding import Pathfinder
+from .ports import place_ports
+from .rng import WARM_UP_DRAWS, draw_block, draws_between, jump_state
+from .stats import GenerationStats
 from .towns import generate_all_towns
 
+# Names accepted by `HexMap(terrain_engine=...)`.
+TERRAIN_ENGINES = ("bitboard", "legacy")
+# The stages of `generate_board`, in order, with the `HexMap` method each
+# one calls on the board. `HexMap.stage` holds the last one that ran.
+STAGES = (
+    ("add_field", "generate_fields"),
+    ("find_neighbors", "generate_neighbors"),
+    ("set_land_fields", "set_land_fields"),
+    ("generate_land_groups", "generate_land_groups"),
+    ("generate_party_capitals", "generate_party_capitals"),
+    ("generate_towns", "generate_towns"),
+    ("shuffle", "shuffle_towns"),
+    ("generate_ports", "generate_ports"),
+)
+STAGE_NAMES = tuple(name for name, _ in STAGES)
+# `generate_terrain` runs the stages before this one, `generate_estates` the rest.
+FIRST_ESTATE_STAGE = STAGE_NAMES.index("generate_party_capitals")
+# Terrain codes of the `_rand(10)` draws of `add_field`: 0 and 1 are land.
+DRAW_TERRAIN = bytes([TERRAIN_CODES["land"]] * 2 + [TERRAIN_CODES["water"]] * 254)
+
 class HexMap:
     """
     The main class that orchestrates the entire map generation process.
@@ -10,7 +36,8 @@ class HexMap:
     the necessary methods to build the map from scratch. It must be kept
     as it is the core of the project.
     """
-    def __init__(self, map_number: int, x_max: int, y_max: int):
+    def __init__(self, map_number: int, x_max: int, y_max: int, path_engine: str = "heap", board_backend: str = "dict",
+                 stats: GenerationStats = None, terrain_engine: str = "bitboard", board_options: dict = None):
         """
         Initializes the HexMap with a specific seed (map_number) and dimensions.
         This setup is crucial for generating a deterministic, reproducible map.
@@ -19,12 +46,39 @@ class HexMap:
             map_number (int): The seed for the random number generator.
             x_max (int): The maximum X-coordinate for the map (width).
             y_max (int): The maximum Y-coordinate for the map (height).
+            path_engine (str): The `Pathfinder` engine used by `generate_ports`
+                               ("heap" or "legacy").
+            board_backend (str): "dict" for the `Board` of `Field` objects,
+                                 "flat" for the array-backed `FlatBoard` or
+                                 "mapped" for the file-backed `MappedBoard`.
+            stats (GenerationStats, optional): Collects per-stage timings and
+                                               search statistics when given.
+            terrain_engine (str): "bitboard" runs `set_land_fields` and the
+                                  neighbor check of `generate_towns` on
+                                  column bitmasks; "legacy" keeps the
+                                  field-by-field loops. The maps are the same.
+            board_options (dict, optional): Keyword arguments for the
+                                            `MappedBoard`, e.g. directory
+                                            and memory_budget.
         """
         self.random_seed = map_number
-        self.board = Board(x_max, y_max)
+        self.rand_draws = 0
+        self.stats = stats
+        self.stage = None
+        if board_backend == "dict":
+            self.board = Board(x_max, y_max)
+        elif board_backend == "flat":
+            self.board = FlatBoard(x_max, y_max)
+        elif board_backend == "mapped":
+            self.board = MappedBoard(x_max, y_max, **(board_options or {}))
+        else:
+            raise ValueError("unknown board backend: " + str(board_backend))
         self.board.map_number = map_number
         self.board.town_names = generate_all_towns()
-        self.pathfinder = Pathfinder()
+        self.pathfinder = Pathfinder(path_engine, stats=stats)
+        if terrain_engine not in TERRAIN_ENGINES:
+            raise ValueError("unknown terrain engine: " + str(terrain_engine))
+        self.terrain_engine = terrain_engine
 
     def _rand(self, n):
         """
@@ -36,34 +90,49 @@ class HexMap:
         self.random_seed = (self.random_seed * 9301 + 49297) % 233280
         return int(math.floor((self.random_seed / 233280) * n))
 
+    @property
+    def rand_draws(self):
+        """
+        The number of `_rand` draws made so far. `_rand` does not count its
+        draws: they are found from how far `random_seed` has moved since the
+        count was last read or set, so the count costs nothing unless
+        something (`stats`, snapshots) asks for it. Read it at least once
+        every `LCG_MODULUS` draws.
+        """
+        draws = draws_between(self._counted_seed, self.random_seed)
+        if draws:
+            self._counted_draws += draws
+            self._counted_seed = self.random_seed
+        return self._counted_draws
+
+    @rand_draws.setter
+    def rand_draws(self, value):
+        """Sets the count of the draws that led to the current `random_seed`."""
+        self._counted_draws = value
+        self._counted_seed = self.random_seed
+
     def get_field(self, x, y, board):
         """
-        Retrieves a field from the board's dictionary.
+        Retrieves a field from the board.
         A necessary helper for many map generation methods.
         """
-        key = get_field_key(x, y)
-        return board.fields.get(key)
+        return board.get_field(x, y)
 
-    def add_field(self, x, y, board):
+    def add_field(self, x, y, board, terrain_draws=None):
         """
         Creates a new field and adds it to the board.
         This is a fundamental step in the `generate_board` process.
+
+        The land/water decision consumes one `_rand(10)` draw, or the next
+        value of `terrain_draws` when an iterator of pre-drawn values is given.
         """
-        key = get_field_key(x, y)
-        board.fields[key] = Field()
-        field = board.fields[key]
-        field.f_x = x
-        field.f_y = y
-        field.x = x * (((board.hex_width // 4) * 3)) + (board.hex_width // 2)
-        if x % 2 == 0:
-            field.y = y * board.hex_height + (board.hex_height // 2)
-        else:
-            field.y = y * board.hex_height + board.hex_height
+        field = board.new_field(x, y)
         field.land_id = -1
-        if (x == 1 and y == 1) or (x == board.x_max - 2 and y == 1) or (x == board.x_max - 2 and y == board.y_max - 2) or (x == 1 and y == board.y_max - 2):
+        if board.is_capital_location(x, y):
             field.type = "land"
         else:
-            if self._rand(10) <= 1:
+            draw = self._rand(10) if terrain_draws is None else next(terrain_draws)
+            if draw <= 1:
                 field.type = "land"
             else:
                 field.type = "water"
@@ -75,25 +144,10 @@ class HexMap:
         """
         Calculates and stores the neighbors for a given field.
         This is essential for almost all map algorithms, including land generation
-        and pathfinding, as it defines the connectivity of the map.
-        """
-        field.neighbors = [None] * 6
-        f_x = field.f_x
-        f_y = field.f_y
-        if f_x % 2 == 0:
-            field.neighbors[0] = validate_location(f_x + 1, f_y, board)
-            field.neighbors[1] = validate_location(f_x, f_y + 1, board)
-            field.neighbors[2] = validate_location(f_x - 1, f_y, board)
-            field.neighbors[3] = validate_location(f_x - 1, f_y - 1, board)
-            field.neighbors[4] = validate_location(f_x, f_y - 1, board)
-            field.neighbors[5] = validate_location(f_x + 1, f_y - 1, board)
-        else:
-            field.neighbors[0] = validate_location(f_x + 1, f_y + 1, board)
-            field.neighbors[1] = validate_location(f_x, f_y + 1, board)
-            field.neighbors[2] = validate_location(f_x - 1, f_y + 1, board)
-            field.neighbors[3] = validate_location(f_x - 1, f_y, board)
-            field.neighbors[4] = validate_location(f_x, f_y - 1, board)
-            field.neighbors[5] = validate_location(f_x + 1, f_y, board)
+        and pathfinding, as it defines the connectivity of the map. The
+        neighbor tables are computed once per board shape and shared.
+        """
+        board.link_neighbors(field)
 
     def set_land_fields(self, board):
         """
@@ -101,6 +155,16 @@ class HexMap:
         This function is a core part of the map generation process, turning
         a sparse set of land tiles into continents and islands.
         """
+        if self.terrain_engine == "bitboard":
+            expand_land(board, board.strip_columns if isinstance(board, MappedBoard) else None)
+        else:
+            self.set_land_fields_legacy(board)
+
+    def set_land_fields_legacy(self, board):
+        """
+        The original field-by-field version of `set_land_fields`, kept as the
+        reference for the "legacy" terrain engine.
+        """
         for x in range(self.board.x_max):
             for y in range(self.board.y_max):
                 field = self.get_field(x, y, board)
@@ -113,12 +177,13 @@ class HexMap:
                         if neighbor.type == "land":
                             land_fields += 1
                     if land_fields >= 1:
-                        self.get_field(x, y, board).is_land = True
+                        field.is_land = True
 
         for x in range(self.board.x_max):
             for y in range(self.board.y_max):
-                if self.get_field(x, y, board).is_land:
-                    self.get_field(x, y, board).type = "land"
+                field = self.get_field(x, y, board)
+                if field.is_land:
+                    field.type = "land"
 
         for x in range(self.board.x_max):
             for y in range(self.board.y_max):
@@ -132,7 +197,7 @@ class HexMap:
                         if neighbor.type == "water":
                             water_fields += 1
                     if water_fields == 0:
-                        self.get_field(x, y, board).type = "land"
+                        field.type = "land"
 
     def add_neighbors_to_land_group(self, field, board, land_id):
         """
@@ -152,8 +217,18 @@ class HexMap:
         """
         Identifies and groups connected land tiles into distinct landmasses (islands).
         This is a prerequisite for town generation, which places towns
-        based on the size of these land groups.
+        based on the size of these land groups. A `FlatBoard` is grouped on
+        its arrays by `group_flat_land`, with the same result.
         """
+        if isinstance(board, FlatBoard) and not isinstance(board, MappedBoard):
+            group_flat_land(board)
+        else:
+            self.group_land_fields(board)
+        if self.stats is not None:
+            self.stats.land_group_sizes.extend(len(group) for group in board.land_groups)
+
+    def group_land_fields(self, board):
+        """The field-by-field grouping of `generate_land_groups`."""
         for x in range(board.x_max):
             for y in range(board.y_max):
                 if self.get_field(x, y, board).type == "land":
@@ -163,7 +238,7 @@ class HexMap:
             for y in range(board.y_max):
                 if self.get_field(x, y, board).type == "land" and self.get_field(x, y, board).land_id < 0:
                     count_land_id = len(board.land_groups)
-                    board.land_groups.append([])
+                    board.land_groups.append(board.new_land_group())
                     board.land_groups[count_land_id].append(self.get_field(x, y, board))
                     self.get_field(x, y, board).land_id = count_land_id
                     group_size = 0
@@ -181,12 +256,13 @@ class HexMap:
         capital = 0
         for x in range(board.x_max):
             for y in range(board.y_max):
-                if (x == 1 and y == 1) or (x == board.x_max - 2 and y == 1) or (x == board.x_max - 2 and y == board.y_max - 2) or (x == 1 and y == board.y_max - 2):
-                    self.get_field(x, y, board).estate = "town"
-                    self.get_field(x, y, board).town_name = self.rand_town()
-                    board.towns.append(self.get_field(x, y, board))
-                    self.get_field(x, y, board).capital = capital
-                    board.parties_capitals[capital] = self.get_field(x, y, board)
+                if board.is_capital_location(x, y):
+                    field = self.get_field(x, y, board)
+                    field.estate = "town"
+                    field.town_name = self.rand_town()
+                    board.towns.append(field)
+                    field.capital = capital
+                    board.parties_capitals[capital] = field
                     capital += 1
 
     def generate_towns(self, board):
@@ -197,8 +273,10 @@ class HexMap:
         would alter the RNG sequence and change the entire map layout,
         causing tests to fail.
         """
+        sites = TownSites(board) if self.terrain_engine == "bitboard" else None
         for land_num in range(len(board.land_groups)):
-            town_count = int(math.floor((len(board.land_groups[land_num]) / 10) + 1))
+            group = board.land_groups[land_num]
+            town_count = int(math.floor((len(group) / 10) + 1))
             for town_num in range(town_count):
                 created = False
                 attempts = 0
@@ -206,20 +284,26 @@ class HexMap:
                     attempts += 1
                     if attempts > 10:
                         created = True
-                    town_index = self._rand(len(board.land_groups[land_num]))
-                    if board.land_groups[land_num][town_index].estate == "":
-                        ok = True
-                        for n in range(6):
-                            field = board.land_groups[land_num][town_index]
-                            neighbor = board.get_neighbor_field(field, n)
-                            if neighbor is None:
-                                continue
-                            if neighbor.type == "water" or neighbor.estate != "":
-                                ok = False
+                    town_index = self._rand(len(group))
+                    # Fetched once: on a `FlatBoard` every lookup creates a view.
+                    field = group[town_index]
+                    if field.estate == "":
+                        if sites is not None:
+                            ok = sites.is_clear(field.f_x, field.f_y)
+                        else:
+                            ok = True
+                            for n in range(6):
+                                neighbor = board.get_neighbor_field(field, n)
+                                if neighbor is None:
+                                    continue
+                                if neighbor.type == "water" or neighbor.estate != "":
+                                    ok = False
                         if ok:
-                            board.land_groups[land_num][town_index].estate = "town"
-                            board.land_groups[land_num][town_index].town_name = self.rand_town()
-                            board.towns.append(board.land_groups[land_num][town_index])
+                            if sites is not None:
+                                sites.block(field.f_x, field.f_y)
+                            field.estate = "town"
+                            field.town_name = self.rand_town()
+                            board.towns.append(field)
                             created = True
 
     def shuffle(self, arr):
@@ -237,25 +321,13 @@ class HexMap:
     def generate_ports(self, board):
         """
         Creates ports where land and water meet.
-        This method relies on the `Pathfinder` to find paths between towns.
-        It's a key part of making the map feel realistic and is necessary
-        for the final map structure.
-        """
-        port_num = 0
-        path_num = 0
-        for town in range(len(board.towns) - 1):
-            path = self.pathfinder.find_path(board, board.towns[town], board.towns[town+1], ["town"], True)
-            if path is None or len(path) > port_num:
-                path = self.pathfinder.find_path(board, board.towns[town], board.towns[town+1], ["town"], False)
-                path_num += 1
-            if path is None: continue
-            for path_index in range(1, len(path) - 1):
-                if path[path_index].type == "land" and path[path_index+1].type == "water":
-                    path[path_index].estate = "port"
-                    port_num += 1
-                if path[path_index].type == "land" and path[path_index-1].type == "water":
-                    path[path_index].estate = "port"
-                    port_num += 1
+        This method relies on the `Pathfinder` to find paths between towns,
+        through `place_ports`, which builds a `PortRouter` for the board
+        apart from the "legacy" engine and a `MappedBoard`. It's a key part
+        of making the map feel realistic and is necessary for the final map
+        structure.
+        """
+        place_ports(board, self.pathfinder, self.stats)
 
     def rand_town(self):
         """
@@ -275,33 +347,125 @@ class HexMap:
         This is the main orchestrator and must be kept. It ensures that
         each layer of the map is built upon the previous one correctly.
         """
-        for x in range(6):
-            for y in range(4):
-                self._rand(6)
-                self._rand(6)
-                self._rand(2)
-                self._rand(2)
-                self._rand(4)
+        self._run_stages(board, STAGES)
+
+    def generate_terrain(self, board):
+        """
+        Runs the terrain steps of `generate_board`: the RNG warm-up, field
+        creation, neighbors, land expansion and land grouping.
+        """
+        self._run_stages(board, STAGES[:FIRST_ESTATE_STAGE])
 
+    def generate_fields(self, board):
+        """
+        Advances the RNG past the warm-up and creates every field with
+        `add_field`, drawing the terrain one column at a time. A `MappedBoard`
+        gets each column written whole, with the same draws.
+        """
+        # The jumps below can exceed what `rand_draws` follows, so the draws
+        # are counted here and the count is set once at the end.
+        draws = self.rand_draws + WARM_UP_DRAWS
+        # The warm-up draws (6 x 4 rounds of _rand(6), _rand(6), _rand(2),
+        # _rand(2), _rand(4)) are discarded, so only the state is advanced.
+        self.random_seed = jump_state(self.random_seed, WARM_UP_DRAWS)
+
+        capitals = board.capital_locations()
         for x in range(board.x_max):
+            draw_count = board.y_max - sum(1 for location in capitals if location[0] == x)
+            terrain_draws, self.random_seed = draw_block(self.random_seed, draw_count, 10)
+            draws += draw_count
+            if isinstance(board, MappedBoard):
+                terrain = bytearray(bytes(terrain_draws).translate(DRAW_TERRAIN))
+                # Capital locations are land without a draw.
+                for y in sorted(location[1] for location in capitals if location[0] == x):
+                    terrain.insert(y, TERRAIN_CODES["land"])
+                board.add_column(x, terrain)
+                continue
+            terrain_draws = iter(terrain_draws)
             for y in range(board.y_max):
-                self.add_field(x, y, board)
+                self.add_field(x, y, board, terrain_draws)
+        self.rand_draws = draws
 
+    def generate_neighbors(self, board):
+        """Runs `find_neighbors` for every field."""
+        if isinstance(board, MappedBoard):
+            # Neighbors are computed on demand; there is nothing to link.
+            return
         for x in range(board.x_max):
             for y in range(board.y_max):
                 field = self.get_field(x, y, board)
                 self.find_neighbors(field, board)
 
-        self.set_land_fields(board)
-        self.generate_land_groups(board)
-        self.generate_party_capitals(board)
-        self.generate_towns(board)
+    def generate_estates(self, board):
+        """
+        Runs the steps of `generate_board` that follow the terrain: capitals,
+        towns, the town shuffle and ports.
+        """
+        self._run_stages(board, STAGES[FIRST_ESTATE_STAGE:])
+
+    def shuffle_towns(self, board):
+        """Runs `shuffle` on the towns of the board."""
         self.shuffle(board.towns)
-        self.generate_ports(board)
+
+    def run_stage(self, name, stage, *args):
+        """
+        Runs one generation stage and records name as the last `stage`. With
+        `stats` set the stage is timed and recorded under name; otherwise it
+        is a plain call.
+        """
+        if self.stats is None:
+            result = stage(*args)
+        else:
+            result = self.stats.run_stage(self, name, stage, *args)
+        self.stage = name
+        return result
+
+    def run_stages(self, stop=None, snapshots=None):
+        """
+        Runs the stages of `generate_board` that follow `stage`, through
+        stop (all of them by default). A map restored with `from_snapshot`
+        continues where its snapshot was taken.
+
+        Args:
+            stop (str, optional): The last stage to run, from `STAGE_NAMES`.
+            snapshots (dict, optional): Receives a `StageSnapshot` of the
+                                        map after each stage run, by name.
+        """
+        start = 0 if self.stage is None else STAGE_NAMES.index(self.stage) + 1
+        end = len(STAGE_NAMES) if stop is None else STAGE_NAMES.index(stop) + 1
+        self._run_stages(self.board, STAGES[start:end], snapshots)
+
+    def _run_stages(self, board, stages, snapshots=None):
+        """Runs a slice of `STAGES` in order, snapshotting after each stage if asked."""
+        for name, method in stages:
+            self.run_stage(name, getattr(self, method), board)
+            if snapshots is not None:
+                snapshots[name] = self.snapshot()
+
+    def snapshot(self):
+        """Returns a `StageSnapshot` of the map after its last stage."""
+        # Imported here: the snapshot module creates maps with this class.
+        from .snapshot import StageSnapshot
+        return StageSnapshot.capture(self)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **options):
+        """
+        Returns a map of this class in the state of a `StageSnapshot`, ready
+        to continue with `run_stages` or `generate_map`. options are passed
+        to the constructor, e.g. path_engine or board_backend.
+        """
+        hex_map = cls(snapshot.map_number, snapshot.x_max, snapshot.y_max, **options)
+        snapshot.apply(hex_map)
+        return hex_map
 
     def generate_map(self):
         """
         A simple wrapper that kicks off the map generation process.
         It is the public entry point for generating the map on a HexMap instance.
+        A map restored from a snapshot runs only its remaining stages.
         """
-        self.generate_board(self.board)
+        if self.stage is None:
+            self.generate_board(self.board)
+        else:
+            self.run_stages()
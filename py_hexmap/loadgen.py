@@ -0,0 +1,102 @@
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from .__main__ import parse_seeds
+from .server import latency_percentiles
+
+def _worker(host, port, paths, results, lock, revalidate):
+    """Sends each path over one keep-alive connection and records (status, seconds, bytes)."""
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    etags = {}
+    local = []
+    try:
+        for path in paths:
+            headers = {}
+            if revalidate and path in etags:
+                headers["If-None-Match"] = etags[path]
+            started = time.perf_counter()
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+            local.append((response.status, time.perf_counter() - started, len(body)))
+            etag = response.getheader("ETag")
+            if etag is not None:
+                etags[path] = etag
+    finally:
+        connection.close()
+        with lock:
+            results.extend(local)
+
+def run_load(url, map_ids, x_max=20, y_max=11, output_format="json", requests=1000, concurrency=8,
+             revalidate=False):
+    """
+    Sends requests map requests to a running map server, cycling through
+    map_ids, from concurrency threads with one keep-alive connection each.
+
+    Args:
+        url (str): The server, e.g. "http://127.0.0.1:8000".
+        revalidate (bool): Send If-None-Match with ETags already seen, as a
+                           caching client would.
+
+    Returns:
+        dict: Request count, wall time, throughput, status counts, bytes
+              received and latency percentiles in milliseconds.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or 80
+    query = "?x_max=%d&y_max=%d&format=%s" % (x_max, y_max, output_format)
+    paths = ["/map/%d%s" % (map_ids[index % len(map_ids)], query) for index in range(requests)]
+    results = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=_worker, args=(host, port, paths[start::concurrency], results, lock, revalidate))
+               for start in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for _, seconds, _ in results)
+    statuses = {}
+    for status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "bytes_received": sum(size for _, _, size in results),
+        "statuses": statuses,
+        "latency_ms": latency_percentiles(latencies),
+    }
+
+def build_parser():
+    """Returns the argument parser of the load generator."""
+    parser = argparse.ArgumentParser(prog="python -m py_hexmap.loadgen",
+                                     description="Benchmark a running py_hexmap server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server URL (default: http://127.0.0.1:8000)")
+    parser.add_argument("--seeds", type=parse_seeds, default="0-99", help='seeds and inclusive ranges (default: "0-99")')
+    parser.add_argument("-x", "--x-max", type=int, default=20, help="map width (default: 20)")
+    parser.add_argument("-y", "--y-max", type=int, default=11, help="map height (default: 11)")
+    parser.add_argument("-f", "--format", choices=("json", "binary"), default="json")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="total requests (default: 1000)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="client threads (default: 8)")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match for ETags already seen")
+    return parser
+
+def main(argv=None):
+    """Runs the load and prints the JSON report."""
+    args = build_parser().parse_args(argv)
+    report = run_load(args.url, args.seeds, args.x_max, args.y_max, args.format, args.requests,
+                      args.concurrency, args.revalidate)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
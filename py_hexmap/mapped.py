@@ -0,0 +1,234 @@
+import mmap
+import os
+import shutil
+import tempfile
+from .board import NEIGHBOR_OFFSETS, Board
+from .flat_board import FieldView, FlatBoard, FlatFields
+
+# The files of a `MappedBoard`: array name -> (typecode, item size, file
+# entries per field). land_order and land_starts hold the land groups.
+CELL_ARRAYS = {
+    "created": ("B", 1),
+    "terrain": ("B", 1),
+    "is_land": ("B", 1),
+    "land_id": ("i", 4),
+    "estate": ("B", 1),
+    "capital": ("b", 1),
+    "town_name": ("h", 2),
+    "land_order": ("i", 4),
+    "land_starts": ("i", 4),
+}
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Working memory of the column-strip stages per field of a strip: the
+# terrain bytes read, their digits and a few bitmasks.
+STRIP_BYTES_PER_FIELD = 4
+
+class MappedBoard(FlatBoard):
+    """
+    A `FlatBoard` whose cell arrays are memory-mapped files, for boards too
+    large to hold in memory.
+
+    The arrays are the same as `FlatBoard`'s, so field views, `CompactGrid`
+    and the streaming writers work unchanged, but they live in one file per
+    array in directory and are paged in by the operating system. Nothing is
+    kept per field in Python: neighbors are computed from `NEIGHBOR_OFFSETS`
+    instead of read from a shared table, and the land groups are runs of
+    the land_order file. `HexMap` writes the terrain one column at a time
+    and runs `set_land_fields` in strips of `strip_columns` columns, chosen
+    so a strip fits memory_budget.
+
+    Boards are not editable: `editor` raises TypeError.
+    """
+    def __init__(self, x_max: int, y_max: int, directory: str = None, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """
+        Creates the array files, zero-filled, for a board of the given dimensions.
+
+        Args:
+            x_max (int): The maximum X-coordinate for the map (width).
+            y_max (int): The maximum Y-coordinate for the map (height).
+            directory (str, optional): Where to create the files. A temporary
+                                       directory, removed by `close`, is used
+                                       when omitted.
+            memory_budget (int): Bytes the strip stages may use for their
+                                 working memory.
+        """
+        # FlatBoard.__init__ would allocate the arrays in memory.
+        Board.__init__(self, x_max, y_max)
+        self.owns_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix="py_hexmap_") if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.memory_budget = memory_budget
+        self.strip_columns = max(1, memory_budget // (STRIP_BYTES_PER_FIELD * max(1, y_max)))
+        self.fields = FlatFields(self)
+        self.town_name_table = []
+        self.town_name_ids = {}
+        self._files = []
+        self._maps = []
+        self._raw = {}
+        size = x_max * y_max
+        for name, (typecode, item_size) in CELL_ARRAYS.items():
+            length = item_size * (size + 1 if name == "land_starts" else size)
+            stream = open(os.path.join(self.directory, name + ".bin"), "w+b")
+            # mmap cannot map an empty file.
+            stream.truncate(max(1, length))
+            mapping = mmap.mmap(stream.fileno(), max(1, length))
+            raw = memoryview(mapping)
+            self._files.append(stream)
+            self._maps.append(mapping)
+            self._raw[name] = raw
+            setattr(self, name, raw.cast(typecode) if typecode != "B" else raw)
+        self.land_groups = MappedLandGroups(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_column(self, x, terrain):
+        """
+        Creates every field of column x at once, as `HexMap.add_field` would
+        one by one, with terrain holding the `TERRAIN_CODES` of the column.
+        """
+        y_max = self.y_max
+        start = x * y_max
+        stop = start + y_max
+        self.created[start:stop] = b"\x01" * y_max
+        self.terrain[start:stop] = terrain
+        self.estate[start:stop] = bytes(y_max)
+        # -1 in every typed array.
+        self._raw["land_id"][4 * start:4 * stop] = b"\xff" * (4 * y_max)
+        self._raw["capital"][start:stop] = b"\xff" * y_max
+        self._raw["town_name"][2 * start:2 * stop] = b"\xff" * (2 * y_max)
+
+    def get_neighbor_field(self, field, neighbor_index):
+        """
+        Retrieves a specific neighbor of a field, computed from its position.
+        """
+        y_max = self.y_max
+        x, y = divmod(field.index, y_max)
+        dx, dy = NEIGHBOR_OFFSETS[x % 2][neighbor_index]
+        x += dx
+        y += dy
+        if not (0 <= x < self.x_max and 0 <= y < y_max):
+            return None
+        index = x * y_max + y
+        if not self.created[index]:
+            return None
+        return FieldView(self, index)
+
+    def new_land_group(self):
+        """
+        Returns the next land group, to be added with `land_groups.append`.
+        """
+        return MappedLandGroup(self, len(self.land_groups))
+
+    def editor(self):
+        """Mapped boards have no `BoardEditor`; this always raises TypeError."""
+        raise TypeError("mapped boards cannot be edited")
+
+    def flush(self):
+        """Writes changed pages back to the files."""
+        for mapping in self._maps:
+            mapping.flush()
+
+    def close(self):
+        """
+        Unmaps and closes the files, and removes the directory if the board
+        created it. The board cannot be used afterwards.
+        """
+        if not self._maps:
+            return
+        for name in CELL_ARRAYS:
+            getattr(self, name).release()
+            self._raw[name].release()
+            delattr(self, name)
+        self._raw = {}
+        for mapping in self._maps:
+            mapping.close()
+        for stream in self._files:
+            stream.close()
+        self._maps = []
+        self._files = []
+        if self.owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+class MappedLandGroups:
+    """
+    The land groups of a `MappedBoard`. The fields of all groups are stored
+    one group after another in `land_order`; group k starts at
+    `land_starts[k]` and ends where group k + 1 starts.
+    """
+    __slots__ = ("board", "count", "size")
+
+    def __init__(self, board):
+        """Creates an empty list of groups on the given board."""
+        self.board = board
+        self.count = 0
+        # Fields stored in land_order so far.
+        self.size = 0
+
+    def append(self, group):
+        """Adds the group returned by `MappedBoard.new_land_group`."""
+        if group.number != self.count:
+            raise ValueError("land groups must be appended in order")
+        self.board.land_starts[self.count] = self.size
+        self.count += 1
+
+    def bounds(self, number):
+        """Returns the (start, stop) positions of a group in land_order."""
+        starts = self.board.land_starts
+        stop = starts[number + 1] if number + 1 < self.count else self.size
+        return starts[number], stop
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if number < 0:
+            number += self.count
+        if not 0 <= number < self.count:
+            raise IndexError("land group index out of range")
+        return MappedLandGroup(self.board, number)
+
+    def __iter__(self):
+        board = self.board
+        for number in range(self.count):
+            yield MappedLandGroup(board, number)
+
+class MappedLandGroup:
+    """
+    A view of one land group of a `MappedBoard`. Only the newest group can
+    grow, which is how `HexMap.generate_land_groups` fills them.
+    """
+    __slots__ = ("board", "number")
+
+    def __init__(self, board, number):
+        """Binds the view to a board and a group number."""
+        self.board = board
+        self.number = number
+
+    def append(self, field):
+        groups = self.board.land_groups
+        if self.number != groups.count - 1:
+            raise ValueError("only the newest land group can grow")
+        self.board.land_order[groups.size] = field.index
+        groups.size += 1
+
+    def __len__(self):
+        start, stop = self.board.land_groups.bounds(self.number)
+        return stop - start
+
+    def __getitem__(self, position):
+        start, stop = self.board.land_groups.bounds(self.number)
+        if position < 0:
+            position += stop - start
+        if not 0 <= position < stop - start:
+            raise IndexError("land group index out of range")
+        return FieldView(self.board, self.board.land_order[start + position])
+
+    def __iter__(self):
+        board = self.board
+        start, stop = board.land_groups.bounds(self.number)
+        for position in range(start, stop):
+            yield FieldView(board, board.land_order[position])
@@ -1,6 +1,147 @@
+import heapq
 import math
 from .board import Point2D, get_field_key
 
+# Names accepted by `Pathfinder(engine=...)`.
+PATH_ENGINES = ("heap", "legacy")
+# The neighbor numbers set in each 6-bit passability mask.
+MASK_BITS = tuple(tuple(k for k in range(6) if bits >> k & 1) for bits in range(64))
+
+def find_path_ids(start_id, end_id, y_max, steps, end_steps=None):
+    """
+    The search of `Pathfinder.find_path_heap` on field ids (`x * y_max + y`).
+
+    Every open node carries an `order` number that mirrors its position in
+    the open list of `find_path_legacy`: the open heap is keyed by
+    `(dist_cost, order)` and a second heap keyed by `order` tracks the head,
+    which inherits the selected node's order on each swap. Stale heap
+    entries are skipped lazily.
+
+    Args:
+        start_id (int): The field the search starts from.
+        end_id (int): The field it looks for.
+        y_max (int): The board height, to turn ids back into positions.
+        steps (callable): steps(field_id) returns the ids of the neighbors a
+                          path may step to from field_id, in neighbor order.
+                          The end field may always be stepped to.
+        end_steps (dict, optional): Replaces steps for the fields it holds,
+                                    e.g. `CompiledSteps.to_end` for steps
+                                    that ignore the end field.
+
+    Returns:
+        tuple: The ids of the path from start_id to end_id, or None if there
+               is none, and the number of fields the search expanded.
+    """
+    if end_steps is None:
+        end_steps = {}
+    end_x = (end_id // y_max) * 5
+    end_y = (end_id % y_max) * 10 + (end_id // y_max % 2) * 5
+
+    total_cost = {start_id: 0}
+    dist_cost = {}
+    parent = {start_id: None}
+    order = {}
+    closed = set()
+    open_heap = []
+    head_heap = []
+    next_order = 0
+
+    current_id = start_id
+    while True:
+        new_cost = total_cost[current_id] + 5
+        for neighbor_id in end_steps.get(current_id) or steps(current_id):
+            if neighbor_id in closed:
+                if total_cost[neighbor_id] > new_cost:
+                    total_cost[neighbor_id] = new_cost
+                    parent[neighbor_id] = current_id
+            elif neighbor_id not in total_cost:
+                total_cost[neighbor_id] = new_cost
+                parent[neighbor_id] = current_id
+                # `Pathfinder.get_distance` to the end field.
+                dx = (neighbor_id // y_max) * 5 - end_x
+                dy = (neighbor_id % y_max) * 10 + (neighbor_id // y_max % 2) * 5 - end_y
+                cost = 5 + math.sqrt(dx * dx + dy * dy)
+                dist_cost[neighbor_id] = cost
+                order[neighbor_id] = next_order
+                heapq.heappush(open_heap, (cost, next_order, neighbor_id))
+                heapq.heappush(head_heap, (next_order, neighbor_id))
+                next_order += 1
+        closed.add(current_id)
+
+        while open_heap and (open_heap[0][2] in closed or order[open_heap[0][2]] != open_heap[0][1]):
+            heapq.heappop(open_heap)
+        if not open_heap:
+            return None, len(closed)
+        if current_id == end_id:
+            break
+
+        _, selected_order, selected_id = heapq.heappop(open_heap)
+        while head_heap and (head_heap[0][1] in closed or order[head_heap[0][1]] != head_heap[0][0] or head_heap[0][1] == selected_id):
+            heapq.heappop(head_heap)
+        if head_heap and head_heap[0][0] < selected_order:
+            head_order, head_id = heapq.heappop(head_heap)
+            order[head_id] = selected_order
+            heapq.heappush(open_heap, (dist_cost[head_id], selected_order, head_id))
+            heapq.heappush(head_heap, (selected_order, head_id))
+        current_id = selected_id
+
+    ids = []
+    node_id = current_id
+    while node_id is not None:
+        ids.append(node_id)
+        node_id = parent[node_id]
+    ids.reverse()
+    return tuple(ids), len(closed)
+
+class CompiledSteps(dict):
+    """
+    The steps of `find_path_ids` on a board read into a `get_neighbor_table`,
+    as a dict of field id -> the tuple of neighbor ids the field may step to,
+    which compile(field_id) returns. Fields are compiled on first use, so
+    searches pass the dict's `__getitem__` as steps and `to_end` as
+    end_steps. Drop a field with `pop` when what it may step to changes.
+    """
+    __slots__ = ("neighbor_ids", "compile")
+
+    def __init__(self, neighbor_ids, compile):
+        """
+        Args:
+            neighbor_ids (array): The `get_neighbor_table` of the board.
+            compile (callable): compile(field_id) returns the steps of a field.
+        """
+        super().__init__()
+        self.neighbor_ids = neighbor_ids
+        self.compile = compile
+
+    @classmethod
+    def from_mask(cls, neighbor_ids, mask):
+        """
+        Returns the steps of a passability mask, where bit k of mask[field_id]
+        is set when the field may step to its neighbor k.
+        """
+        def compile(field_id):
+            base = field_id * 6
+            return tuple([neighbor_ids[base + k] for k in MASK_BITS[mask[field_id]]])
+        return cls(neighbor_ids, compile)
+
+    def __missing__(self, field_id):
+        steps = self[field_id] = self.compile(field_id)
+        return steps
+
+    def to_end(self, end_id):
+        """Returns the steps of the neighbors of end_id, which may always step to it."""
+        neighbor_ids = self.neighbor_ids
+        end_steps = {}
+        for field_id in neighbor_ids[end_id * 6:end_id * 6 + 6]:
+            if field_id >= 0:
+                steps = self[field_id]
+                if end_id not in steps:
+                    base = field_id * 6
+                    steps = [neighbor_id for neighbor_id in neighbor_ids[base:base + 6]
+                             if neighbor_id == end_id or neighbor_id in steps]
+                end_steps[field_id] = steps
+        return end_steps
+
 class Pathfinder:
     """
     Handles pathfinding between two points on the map.
@@ -8,9 +149,21 @@ class Pathfinder:
     paths between towns to determine where land meets water, a key step in
     creating realistic coastlines and harbors.
     """
-    def __init__(self):
-        """Initializes the Pathfinder."""
-        pass
+    def __init__(self, engine="heap", stats=None):
+        """
+        Initializes the Pathfinder.
+
+        Args:
+            engine (str): "heap" for the priority-queue search or "legacy" for
+                          the original list-scanning search. Both return the
+                          same paths; the switch exists so they can be compared.
+            stats (GenerationStats, optional): Counts the searches and the
+                                               nodes they expand.
+        """
+        if engine not in PATH_ENGINES:
+            raise ValueError("unknown path engine: " + str(engine))
+        self.engine = engine
+        self.stats = stats
 
     def find_path(self, board, start_field, end_field, avoid_estate, avoid_water):
         """
@@ -18,6 +171,51 @@ class Pathfinder:
         It is retained because it's a core component of `generate_ports`, which
         significantly influences the final map layout by creating port towns.
         """
+        if self.engine == "legacy":
+            return self.find_path_legacy(board, start_field, end_field, avoid_estate, avoid_water)
+        return self.find_path_heap(board, start_field, end_field, avoid_estate, avoid_water)
+
+    def find_path_heap(self, board, start_field, end_field, avoid_estate, avoid_water):
+        """
+        Priority-queue version of `find_path_legacy` that returns identical
+        paths, through `find_path_ids`. The legacy search keeps its open set
+        in a list, takes the first tile with the lowest `dist_cost` and swaps
+        it with the head of the list before popping the head, so ties are
+        broken by list position; `find_path_ids` mirrors those positions.
+        """
+        if start_field is None or end_field is None:
+            return None
+
+        if start_field.type == "water":
+            avoid_water = False
+
+        y_max = board.y_max
+        end_id = end_field.f_x * y_max + end_field.f_y
+
+        def steps(field_id):
+            current = board.get_field(field_id // y_max, field_id % y_max)
+            ids = []
+            for neighbor_num in range(6):
+                neighbor = board.get_neighbor_field(current, neighbor_num)
+                if neighbor is None:
+                    continue
+                neighbor_id = neighbor.f_x * y_max + neighbor.f_y
+                if neighbor_id == end_id or self.can_walk(current, neighbor, avoid_estate, avoid_water):
+                    ids.append(neighbor_id)
+            return ids
+
+        ids, expanded = find_path_ids(start_field.f_x * y_max + start_field.f_y, end_id, y_max, steps)
+        if self.stats is not None:
+            self.stats.record_search(expanded, ids is not None)
+        if ids is None:
+            return None
+        return [board.get_field(node_id // y_max, node_id % y_max) for node_id in ids]
+
+    def find_path_legacy(self, board, start_field, end_field, avoid_estate, avoid_water):
+        """
+        The original list-based A* search, kept as the reference for the
+        "legacy" engine. It scans the whole open list on every step.
+        """
         if start_field is None or end_field is None:
             return None
 
@@ -66,6 +264,8 @@ class Pathfinder:
                 tiles[0] = tiles[tile_for_swap]
                 tiles[tile_for_swap] = temp
 
+        if self.stats is not None:
+            self.stats.record_search(len(path), len(tiles) > 0)
         if len(tiles) == 0:
             return None
 
@@ -142,6 +342,8 @@ class Tile:
     It's essential for the `Pathfinder` class to store costs and parent pointers
     as it explores the map.
     """
+    __slots__ = ("field", "parent", "dist_cost", "total_cost")
+
     def __init__(self):
         """Initializes a Tile for pathfinding."""
         self.field = None
@@ -0,0 +1,298 @@
+from .board import get_neighbor_table
+from .flat_board import ESTATE_CODES, TERRAIN_CODES, FieldView, FlatBoard
+from .mapped import MappedBoard
+from .pathfinding import CompiledSteps, find_path_ids
+
+def _flags(code):
+    """Returns a `bytes.translate` table mapping code to 1 and every other byte to 0."""
+    return bytes(256)[:code] + b"\x01" + bytes(256)[code + 1:]
+
+def place_ports(board, pathfinder, stats=None, routes=None):
+    """
+    Places the ports of `HexMap.generate_ports`: each pair of consecutive
+    towns is routed and a port goes on every land field of the path next to
+    water. Apart from the "legacy" engine the searches go through a
+    `PortRouter`; a `MappedBoard`, whose fields the router's tables would
+    all hold, searches with the `Pathfinder`, which finds the same paths.
+
+    Args:
+        board (Board): A board after `generate_towns` and `shuffle`.
+        pathfinder (Pathfinder): Its engine picks the search.
+        stats (GenerationStats, optional): Counts ports, fallbacks and searches.
+        routes (list, optional): Receives (start town, end town, path or None)
+                                 for every pair routed.
+    """
+    port_num = 0
+    path_num = 0
+    if pathfinder.engine == "legacy" or isinstance(board, MappedBoard):
+        router = None
+    else:
+        router = PortRouter(board, stats=stats)
+
+    def find_path(start_field, end_field, avoid_water, max_length):
+        # A router may return None for a path longer than max_length, which
+        # is discarded anyway.
+        if router is None:
+            return pathfinder.find_path(board, start_field, end_field, ["town"], avoid_water)
+        return router.find_path(start_field, end_field, avoid_water, max_length)
+
+    for town in range(len(board.towns) - 1):
+        path = find_path(board.towns[town], board.towns[town+1], True, port_num)
+        if path is None or len(path) > port_num:
+            path = find_path(board.towns[town], board.towns[town+1], False, None)
+            path_num += 1
+        if routes is not None:
+            routes.append((board.towns[town], board.towns[town+1], path))
+        if path is None: continue
+        for path_index in range(1, len(path) - 1):
+            if path[path_index].type == "land" and path[path_index+1].type == "water":
+                path[path_index].estate = "port"
+                port_num += 1
+            if path[path_index].type == "land" and path[path_index-1].type == "water":
+                path[path_index].estate = "port"
+                port_num += 1
+            if router is not None and path[path_index].estate == "port":
+                router.add_port(path[path_index])
+    if stats is not None:
+        stats.port_fallbacks += path_num
+        stats.ports_placed += port_num
+
+def find_port_routes(board, pathfinder):
+    """
+    Returns the routes of `place_ports` on a board it has finished, as
+    (start town, end town, path or None). The ports are lifted and placed
+    again by the same searches, so the board ends as it was.
+    """
+    for x in range(board.x_max):
+        for y in range(board.y_max):
+            field = board.get_field(x, y)
+            if field is not None and field.estate == "port":
+                field.estate = ""
+    routes = []
+    place_ports(board, pathfinder, routes=routes)
+    return routes
+
+class PortRouter:
+    """
+    The path searches of `HexMap.generate_ports`, compiled once per board and
+    shared by every pair of consecutive towns.
+
+    Searches avoid towns (`avoid_estate=["town"]`) and return exactly the paths
+    of `Pathfinder.find_path`. The board is kept as flat terrain and estate
+    arrays over the shared neighbor table, so a search touches no field
+    objects until it builds its result. Two kinds of searches are skipped
+    without changing what `generate_ports` does with their result:
+
+    - searches that cannot reach the end town. Fields are grouped into
+      components once (non-town fields, and land regions and water bodies
+      for the water-avoiding mode); a search discovers the end exactly when
+      a component it can enter touches the end. Water bodies can be entered
+      from a land region only through its ports, so placed ports are added
+      with `add_port`, which drops only the cached closures they extend.
+    - water-avoiding searches whose result would be longer than the caller
+      allows. A path is at least one field longer than the hex distance
+      between its ends.
+    """
+    def __init__(self, board, stats=None):
+        """
+        Args:
+            board (Board): A board after `generate_towns`, of either backend.
+            stats (GenerationStats, optional): Counts searches, skipped ones
+                                               and expanded nodes.
+        """
+        x_max = board.x_max
+        y_max = board.y_max
+        size = x_max * y_max
+        self.y_max = y_max
+        self.stats = stats
+        self.neighbor_ids = get_neighbor_table(x_max, y_max)
+        if isinstance(board, FlatBoard):
+            # The arrays are read as they are, without a view per field.
+            self.fields = [FieldView(board, index) for index in range(size)]
+            self.water = board.terrain.translate(_flags(TERRAIN_CODES["water"]))
+            self.town = board.estate.translate(_flags(ESTATE_CODES["town"]))
+            self.port = board.estate.translate(_flags(ESTATE_CODES["port"]))
+        else:
+            self.fields = [board.get_field(index // y_max, index % y_max) for index in range(size)]
+            self.water = bytearray(size)
+            self.town = bytearray(size)
+            self.port = bytearray(size)
+            for index, field in enumerate(self.fields):
+                self.water[index] = field.type == "water"
+                self.town[index] = field.estate == "town"
+                self.port[index] = field.estate == "port"
+        # The `find_path_ids` steps of searches that may cross water and of
+        # searches that avoid it.
+        self.steps = (CompiledSteps(self.neighbor_ids, self._open_steps),
+                      CompiledSteps(self.neighbor_ids, self._walk_steps))
+
+        # Components of non-town fields for searches that may cross water, and
+        # of land regions and water bodies for searches that avoid it.
+        self.open_labels, _ = self._label_components(False)
+        self.walk_labels, is_body = self._label_components(True)
+        self.reachable_regions = [set() for _ in is_body]
+        for index in range(size):
+            if self.water[index] and not self.town[index]:
+                self.reachable_regions[self.walk_labels[index]].update(
+                    self.walk_labels[neighbor] for neighbor in self._neighbors(index)
+                    if not self.water[neighbor] and not self.town[neighbor])
+        for index in range(size):
+            if self.port[index]:
+                self._link_port(index)
+        self.closures = {}
+
+    def _neighbors(self, index):
+        """Yields the on-board neighbor ids of a field id."""
+        base = index * 6
+        for neighbor in self.neighbor_ids[base:base + 6]:
+            if neighbor >= 0:
+                yield neighbor
+
+    def _open_steps(self, index):
+        """Returns the neighbors a search that may cross water can step to from a field."""
+        town = self.town
+        return tuple([neighbor for neighbor in self.neighbor_ids[index * 6:index * 6 + 6]
+                      if neighbor >= 0 and not town[neighbor]])
+
+    def _walk_steps(self, index):
+        """
+        Returns the neighbors a water-avoiding search can step to from a
+        field: land that is not a port cannot step into water.
+        """
+        town = self.town
+        if self.water[index] or self.port[index]:
+            return self._open_steps(index)
+        water = self.water
+        return tuple([neighbor for neighbor in self.neighbor_ids[index * 6:index * 6 + 6]
+                      if neighbor >= 0 and not town[neighbor] and not water[neighbor]])
+
+    def _label_components(self, split_by_terrain):
+        """
+        Labels the connected components of non-town fields, optionally only
+        joining neighbors of the same terrain. Returns the label of every field
+        (-1 for towns) and, per label, whether the component is water.
+        """
+        table = self.neighbor_ids
+        water = self.water
+        town = self.town
+        labels = [-1] * len(self.fields)
+        is_body = []
+        for start in range(len(self.fields)):
+            if town[start] or labels[start] >= 0:
+                continue
+            label = len(is_body)
+            terrain = water[start]
+            is_body.append(bool(terrain))
+            labels[start] = label
+            queue = [start]
+            for index in queue:
+                for neighbor in table[index * 6:index * 6 + 6]:
+                    if (neighbor >= 0 and labels[neighbor] < 0 and not town[neighbor]
+                            and not (split_by_terrain and water[neighbor] != terrain)):
+                        labels[neighbor] = label
+                        queue.append(neighbor)
+        return labels, is_body
+
+    def _link_port(self, index):
+        """
+        Connects the land region of a port to the water bodies next to it and
+        returns True if that added a connection.
+        """
+        region = self.walk_labels[index]
+        bodies = {self.walk_labels[neighbor] for neighbor in self._neighbors(index)
+                  if self.water[neighbor] and not self.town[neighbor]}
+        if bodies <= self.reachable_regions[region]:
+            return False
+        self.reachable_regions[region] |= bodies
+        return True
+
+    def add_port(self, field):
+        """Records that a land field which is not a town has become a port."""
+        index = field.f_x * self.y_max + field.f_y
+        if self.port[index]:
+            return
+        self.port[index] = 1
+        # A port may step into the water.
+        self.steps[1].pop(index, None)
+        region = self.walk_labels[index]
+        if self._link_port(index):
+            self.closures = {seeds: closure for seeds, closure in self.closures.items() if region not in closure}
+
+    def _closure(self, seeds):
+        """Returns the land regions and water bodies a water-avoiding search can enter from seeds."""
+        closure = self.closures.get(seeds)
+        if closure is None:
+            closure = set(seeds)
+            queue = list(seeds)
+            for label in queue:
+                for reached in self.reachable_regions[label]:
+                    if reached not in closure:
+                        closure.add(reached)
+                        queue.append(reached)
+            self.closures[seeds] = closure
+        return closure
+
+    def min_path_length(self, start_field, end_field):
+        """
+        Returns a lower bound on the length of any path between two fields:
+        their hex distance plus one. Offset coordinates become axial ones
+        through r = y - x // 2.
+        """
+        dq = end_field.f_x - start_field.f_x
+        dr = (end_field.f_y - end_field.f_x // 2) - (start_field.f_y - start_field.f_x // 2)
+        return (abs(dq) + abs(dr) + abs(dq + dr)) // 2 + 1
+
+    def can_reach(self, start_field, end_field, avoid_water):
+        """
+        Returns False if a town-avoiding search from start_field can never
+        discover end_field, in which case `Pathfinder.find_path` returns None.
+        """
+        start_id = start_field.f_x * self.y_max + start_field.f_y
+        end_id = end_field.f_x * self.y_max + end_field.f_y
+        if self.water[start_id]:
+            avoid_water = False
+        labels = self.walk_labels if avoid_water else self.open_labels
+        blocks_water = avoid_water and not self.port[start_id]
+        seeds = set()
+        for neighbor in self._neighbors(start_id):
+            if neighbor == end_id:
+                return True
+            if not self.town[neighbor] and not (blocks_water and self.water[neighbor]):
+                seeds.add(labels[neighbor])
+        targets = {labels[neighbor] for neighbor in self._neighbors(end_id) if not self.town[neighbor]}
+        if avoid_water:
+            seeds = self._closure(frozenset(seeds))
+        return not seeds.isdisjoint(targets)
+
+    def find_path(self, start_field, end_field, avoid_water, max_length=None):
+        """
+        Returns `Pathfinder.find_path(board, start_field, end_field, ["town"],
+        avoid_water)` as a list of fields, or None if there is no path. With
+        max_length, a water-avoiding search that cannot produce a path of at
+        most that many fields is skipped and returns None as well.
+        """
+        if ((avoid_water and max_length is not None and self.min_path_length(start_field, end_field) > max_length)
+                or not self.can_reach(start_field, end_field, avoid_water)):
+            if self.stats is not None:
+                self.stats.searches_skipped += 1
+                self.stats.record_search(0, False)
+            return None
+        return self._search(start_field, end_field, avoid_water)
+
+    def _search(self, start_field, end_field, avoid_water):
+        """
+        `Pathfinder.find_path_heap` through `find_path_ids`, with `can_walk`
+        reduced to the compiled steps of the search mode.
+        """
+        y_max = self.y_max
+        start_id = start_field.f_x * y_max + start_field.f_y
+        end_id = end_field.f_x * y_max + end_field.f_y
+        mode = 1 if avoid_water and not self.water[start_id] else 0
+        steps = self.steps[mode]
+        ids, expanded = find_path_ids(start_id, end_id, y_max, steps.__getitem__, steps.to_end(end_id))
+        if self.stats is not None:
+            self.stats.record_search(expanded, ids is not None)
+        if ids is None:
+            return None
+        fields = self.fields
+        return [fields[node_id] for node_id in ids]
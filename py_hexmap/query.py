@@ -0,0 +1,327 @@
+import heapq
+from array import array
+from collections import OrderedDict
+from .board import get_neighbor_table
+from .pathfinding import CompiledSteps, find_path_ids
+
+def hex_distance(a, b):
+    """
+    Returns the number of steps between two fields on an empty board.
+    Offset coordinates become axial ones through r = y - x // 2.
+    """
+    dq = b.f_x - a.f_x
+    dr = (b.f_y - b.f_x // 2) - (a.f_y - a.f_x // 2)
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+class PathQueryEngine:
+    """
+    Answers many path and distance queries on one board.
+
+    The board is compiled once into flat arrays over the shared neighbor
+    table: for each mode (avoid_water False and True) one byte per field
+    whose bits mark the neighbors `Pathfinder.can_walk` lets the field step
+    to. Searches then touch no field objects until they build a path.
+
+    Two kinds of path searches are offered:
+
+    - exact (the default) returns the paths of `Pathfinder.find_path`,
+      including its tie-breaking, so results match `generate_ports`.
+    - `exact=False` runs A* with the hex distance, which never overestimates,
+      and returns a shortest path; the legacy search is greedy and does not
+      guarantee one. Batches of these queries that share a start field are
+      answered from one breadth-first search.
+
+    As in `Pathfinder.find_path`, a search may always step onto its end
+    field, and a search that starts on water may cross water.
+
+    Results are cached until the board changes. Edits made through the
+    board's `BoardEditor` bump `board.revision`, which is checked on every
+    query; call `invalidate` after changing fields directly.
+
+    Attributes:
+        searches (int): Path searches and distance maps computed.
+        cache_hits (int): Queries answered from the cache.
+    """
+    def __init__(self, board, avoid_estate=("town",), cache_size=4096):
+        """
+        Args:
+            board (Board): A generated board of either backend.
+            avoid_estate (iterable[str]): Estates no path may pass through.
+            cache_size (int): Results kept; the least recently used go first.
+        """
+        self.board = board
+        self.avoid_estate = tuple(avoid_estate)
+        self.cache_size = cache_size
+        self.y_max = board.y_max
+        self.neighbor_ids = get_neighbor_table(board.x_max, board.y_max)
+        self.searches = 0
+        self.cache_hits = 0
+        self._cache = OrderedDict()
+        self._compile()
+
+    def _compile(self):
+        """Reads the board into the per-mode passability masks."""
+        board = self.board
+        y_max = self.y_max
+        size = board.x_max * y_max
+        table = self.neighbor_ids
+        self.revision = board.revision
+        self.fields = [board.get_field(index // y_max, index % y_max) for index in range(size)]
+        self.water = bytearray(size)
+        blocked = bytearray(size)
+        port = bytearray(size)
+        for index, field in enumerate(self.fields):
+            self.water[index] = field.type == "water"
+            blocked[index] = field.estate in self.avoid_estate
+            port[index] = field.estate == "port"
+        water = self.water
+        open_mask = bytearray(size)
+        walk_mask = bytearray(size)
+        for index in range(size):
+            # Land that is not a port is the only field that cannot step into water.
+            shore = not water[index] and not port[index]
+            open_bits = walk_bits = 0
+            for k in range(6):
+                neighbor = table[index * 6 + k]
+                if neighbor < 0 or blocked[neighbor]:
+                    continue
+                open_bits |= 1 << k
+                if not (shore and water[neighbor]):
+                    walk_bits |= 1 << k
+            open_mask[index] = open_bits
+            walk_mask[index] = walk_bits
+        self.masks = (open_mask, walk_mask)
+        self.steps = (CompiledSteps.from_mask(table, open_mask), CompiledSteps.from_mask(table, walk_mask))
+        self._cache.clear()
+
+    def invalidate(self):
+        """Recompiles the board and drops every cached result."""
+        self._compile()
+
+    def _check(self):
+        if self.board.revision != self.revision:
+            self._compile()
+
+    def _index(self, field):
+        return field.f_x * self.y_max + field.f_y
+
+    def _mode(self, start_id, avoid_water):
+        """Returns the mode, 0 for open and 1 for walk, a search from start_id uses."""
+        return 1 if avoid_water and not self.water[start_id] else 0
+
+    def _mask(self, start_id, avoid_water):
+        """Returns the mask a search from start_id uses."""
+        return self.masks[self._mode(start_id, avoid_water)]
+
+    def _cached(self, key, compute):
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return result
+        self.searches += 1
+        result = compute()
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def find_path(self, start_field, end_field, avoid_water, exact=True):
+        """
+        Returns the path from start_field to end_field as a list of fields,
+        or None if there is none. With exact, this is what
+        `Pathfinder.find_path(board, start_field, end_field, avoid_estate,
+        avoid_water)` returns.
+        """
+        if start_field is None or end_field is None:
+            return None
+        self._check()
+        start_id = self._index(start_field)
+        end_id = self._index(end_field)
+        key = ("path", start_id, end_id, bool(avoid_water), exact)
+        search = self._legacy_search if exact else self._shortest_search
+        ids = self._cached(key, lambda: search(start_id, end_id, self._mode(start_id, avoid_water)) or ())
+        if not ids:
+            return None
+        fields = self.fields
+        return [fields[node_id] for node_id in ids]
+
+    def find_paths(self, pairs, avoid_water, exact=True):
+        """
+        Answers a batch of (start_field, end_field) queries and returns their
+        paths in order. Without exact, queries that share a start field are
+        answered from one breadth-first search of that field.
+        """
+        pairs = list(pairs)
+        if exact:
+            return [self.find_path(start, end, avoid_water) for start, end in pairs]
+        self._check()
+        shared = {}
+        for start, end in pairs:
+            if start is not None and end is not None:
+                shared[self._index(start)] = shared.get(self._index(start), 0) + 1
+        paths = []
+        fields = self.fields
+        for start, end in pairs:
+            if start is None or end is None:
+                paths.append(None)
+            elif shared[self._index(start)] == 1:
+                paths.append(self.find_path(start, end, avoid_water, exact=False))
+            else:
+                distances, last, parents = self._search_from(start, avoid_water)
+                node_id = self._index(end)
+                if distances[node_id] < 0:
+                    paths.append(None)
+                    continue
+                ids = [node_id]
+                node_id = last[node_id]
+                while node_id >= 0:
+                    ids.append(node_id)
+                    node_id = parents[node_id]
+                paths.append([fields[node_id] for node_id in reversed(ids)])
+        return paths
+
+    def distance_map(self, source_field, avoid_water):
+        """
+        Returns the steps from source_field to every field as an array
+        indexed by `x * y_max + y`, -1 where no path exists. A field a search
+        could only end on, such as a town, gets a distance but is never
+        stepped through. The array is cached; do not modify it.
+        """
+        self._check()
+        return self._search_from(source_field, avoid_water)[0]
+
+    def distance_map_to(self, target_field, avoid_water):
+        """
+        Returns the steps from every field to target_field, i.e. the length
+        of the path a search starting on each field would find, as an array
+        like `distance_map`. Fields on water follow the rules of a search
+        that starts on water.
+        """
+        self._check()
+        target_id = self._index(target_field)
+        key = ("to", target_id, bool(avoid_water))
+        return self._cached(key, lambda: self._distances_to(target_id, avoid_water))
+
+    def _search_from(self, source_field, avoid_water):
+        """Returns the cached result of `_distances_from` for source_field."""
+        source_id = self._index(source_field)
+        key = ("from", source_id, bool(avoid_water))
+        return self._cached(key, lambda: self._distances_from(source_id, self._mask(source_id, avoid_water)))
+
+    def _distances_from(self, source_id, mask):
+        """
+        Returns (distances, last, parents): the steps to every field, the
+        field a path ending on each field comes from, and the breadth-first
+        tree of the fields a search walks through. A path's last step may
+        leave that tree (onto a town, or from land into water), so it can be
+        shorter than the tree's own distance.
+        """
+        table = self.neighbor_ids
+        walked = array("i", [-1]) * len(self.fields)
+        parents = array("i", [-1]) * len(self.fields)
+        walked[source_id] = 0
+        queue = [source_id]
+        for node_id in queue:
+            step = walked[node_id] + 1
+            bits = mask[node_id]
+            base = node_id * 6
+            for k in range(6):
+                neighbor = table[base + k]
+                if neighbor >= 0 and bits >> k & 1 and walked[neighbor] < 0:
+                    walked[neighbor] = step
+                    parents[neighbor] = node_id
+                    queue.append(neighbor)
+        distances = array("i", walked)
+        last = array("i", parents)
+        for node_id in queue:
+            step = walked[node_id] + 1
+            for neighbor in table[node_id * 6:node_id * 6 + 6]:
+                if neighbor >= 0 and (distances[neighbor] < 0 or distances[neighbor] > step):
+                    distances[neighbor] = step
+                    last[neighbor] = node_id
+        return distances, last, parents
+
+    def _distances_to(self, target_id, avoid_water):
+        table = self.neighbor_ids
+        result = None
+        # A search that starts on water may cross water, so water fields take
+        # their distance from the open mask.
+        for mode in ((1, 0) if avoid_water else (0,)):
+            mask = self.masks[mode]
+            distances = array("i", [-1]) * len(self.fields)
+            distances[target_id] = 0
+            queue = []
+            for neighbor in table[target_id * 6:target_id * 6 + 6]:
+                if neighbor >= 0:
+                    distances[neighbor] = 1
+                    queue.append(neighbor)
+            for node_id in queue:
+                step = distances[node_id] + 1
+                base = node_id * 6
+                for k in range(6):
+                    # Neighbor k of a field sees the field as its neighbor (k + 3) % 6.
+                    previous = table[base + k]
+                    if previous >= 0 and distances[previous] < 0 and mask[previous] >> ((k + 3) % 6) & 1:
+                        distances[previous] = step
+                        queue.append(previous)
+            if result is None:
+                result = distances
+            else:
+                for index, distance in enumerate(distances):
+                    if self.water[index]:
+                        result[index] = distance
+        return result
+
+    def _legacy_search(self, start_id, end_id, mode):
+        """
+        `Pathfinder.find_path_heap` on field ids, with `can_walk` reduced to
+        the compiled steps of mode. Returns the ids of the path, or None.
+        """
+        steps = self.steps[mode]
+        return find_path_ids(start_id, end_id, self.y_max, steps.__getitem__, steps.to_end(end_id))[0]
+
+    def _shortest_search(self, start_id, end_id, mode):
+        """
+        A* with the hex distance; returns the ids of a shortest path, or
+        None. Ties between equal estimates go to the deeper field, which
+        walks straight at the end instead of widening the frontier.
+        """
+        mask = self.masks[mode]
+        table = self.neighbor_ids
+        y_max = self.y_max
+        end_q = end_id // y_max
+        end_r = end_id % y_max - end_q // 2
+
+        def estimate(node_id):
+            dq = end_q - node_id // y_max
+            dr = end_r - (node_id % y_max - node_id // y_max // 2)
+            return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+        parent = {start_id: None}
+        cost = {start_id: 0}
+        open_heap = [(estimate(start_id), 0, start_id)]
+        while open_heap:
+            _, depth, node_id = heapq.heappop(open_heap)
+            if node_id == end_id:
+                ids = []
+                while node_id is not None:
+                    ids.append(node_id)
+                    node_id = parent[node_id]
+                ids.reverse()
+                return tuple(ids)
+            steps = -depth
+            if steps > cost[node_id]:
+                continue
+            steps += 1
+            bits = mask[node_id]
+            base = node_id * 6
+            for k in range(6):
+                neighbor_id = table[base + k]
+                if neighbor_id < 0 or not (bits >> k & 1 or neighbor_id == end_id):
+                    continue
+                if neighbor_id not in cost or cost[neighbor_id] > steps:
+                    cost[neighbor_id] = steps
+                    parent[neighbor_id] = node_id
+                    heapq.heappush(open_heap, (steps + estimate(neighbor_id), -steps, neighbor_id))
+        return None
@@ -0,0 +1,168 @@
+import argparse
+import functools
+import math
+import operator
+import struct
+import sys
+import zlib
+from .__main__ import parse_seeds
+from .batch import generate_map_data_batch
+from .compact import TOWN_CODE, CompactGrid
+
+# Default colors, as (r, g, b).
+PALETTE = {
+    "water": (52, 101, 164),
+    "land": (115, 160, 78),
+    "port": (237, 212, 0),
+    "town": (164, 0, 0),
+    "background": (30, 30, 30),
+}
+# Palette slots: the grid codes collapse onto these, and pixels outside every
+# hex read the background slot.
+SLOT_NAMES = ("water", "land", "port", "town", "background")
+CODE_SLOTS = bytes([0, 1, 2] + [3] * (256 - TOWN_CODE))
+BACKGROUND_SLOT = 4
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+class Rasterizer:
+    """
+    Renders maps of one board size into RGB images of one size.
+
+    The hexes are laid out with the pixel geometry of `Board.new_field`
+    (flat-topped hexes, hex_width apart by three quarters horizontally and
+    odd columns shifted down by half a hex) and scaled to fit the image.
+    The constructor fills every hex span by span into a label image that
+    holds, per pixel, the field it shows. Rendering a map is then a gather
+    of the grid's codes through the label image and one table lookup per
+    color channel, all in C, so every map of the size costs the same.
+    """
+    def __init__(self, x_max, y_max, width, height=None, hex_width=50, hex_height=40):
+        """
+        Args:
+            x_max (int): The board width in fields.
+            y_max (int): The board height in fields.
+            width (int): The image width in pixels.
+            height (int, optional): The image height; by default the one
+                                    that keeps the map's aspect ratio.
+            hex_width (int): Hex width of the board geometry.
+            hex_height (int): Hex height of the board geometry.
+        """
+        step = (hex_width // 4) * 3
+        map_width = (x_max - 1) * step + hex_width
+        map_height = y_max * hex_height + (hex_height // 2 if x_max > 1 else 0)
+        if height is None:
+            height = max(1, round(width * map_height / map_width))
+        self.x_max = x_max
+        self.y_max = y_max
+        self.width = width
+        self.height = height
+        scale = min(width / map_width, height / map_height)
+        # Centre the map in the image.
+        offset_x = (width - map_width * scale) / 2
+        offset_y = (height - map_height * scale) / 2
+        size = x_max * y_max
+        labels = [size] * (width * height)
+        half_width = hex_width * scale / 2
+        half_height = hex_height * scale / 2
+        for x in range(x_max):
+            center_x = offset_x + (x * step + hex_width // 2) * scale
+            for y in range(y_max):
+                center_y = offset_y + (y * hex_height + (hex_height if x % 2 else hex_height // 2)) * scale
+                index = x * y_max + y
+                # Pixel rows whose centres lie inside the hex.
+                top = max(0, math.ceil(center_y - half_height - 0.5))
+                bottom = min(height - 1, math.floor(center_y + half_height - 0.5))
+                for row in range(top, bottom + 1):
+                    # The half width shrinks from the middle row to half at the top and bottom edges.
+                    distance = abs(row + 0.5 - center_y)
+                    reach = half_width - distance * half_width / (2 * half_height)
+                    left = max(0, math.ceil(center_x - reach - 0.5))
+                    right = min(width - 1, math.floor(center_x + reach - 0.5))
+                    if left <= right:
+                        base = row * width
+                        labels[base + left:base + right + 1] = [index] * (right - left + 1)
+        self.labels = labels
+        self._gather = operator.itemgetter(*labels) if len(labels) > 1 else lambda codes: (codes[labels[0]],)
+
+    def render(self, grid, palette=None):
+        """
+        Returns the RGB pixels of a `CompactGrid` as a bytearray of
+        width * height * 3 bytes, row by row. palette overrides entries of
+        `PALETTE`.
+        """
+        if (grid.x_max, grid.y_max) != (self.x_max, self.y_max):
+            raise ValueError("rasterizer is for " + str(self.x_max) + "x" + str(self.y_max) + " maps")
+        slots = bytes(grid.codes).translate(CODE_SLOTS) + bytes([BACKGROUND_SLOT])
+        pixels = bytes(self._gather(slots))
+        colors = dict(PALETTE, **(palette or {}))
+        rgb = bytearray(len(pixels) * 3)
+        for channel in range(3):
+            table = bytes(colors[name][channel] for name in SLOT_NAMES) + bytes(256 - len(SLOT_NAMES))
+            rgb[channel::3] = pixels.translate(table)
+        return rgb
+
+    def render_png(self, grid, palette=None, level=6):
+        """Returns a `CompactGrid` rendered as PNG file contents."""
+        return encode_png(self.width, self.height, self.render(grid, palette), level)
+
+@functools.lru_cache(maxsize=8)
+def get_rasterizer(x_max, y_max, width, height=None, hex_width=50, hex_height=40):
+    """Returns a shared `Rasterizer` for a board size and image size."""
+    return Rasterizer(x_max, y_max, width, height, hex_width, hex_height)
+
+def render_board(board, width, height=None, palette=None):
+    """Renders a generated board as PNG file contents; see `Rasterizer`."""
+    rasterizer = get_rasterizer(board.x_max, board.y_max, width, height, board.hex_width, board.hex_height)
+    return rasterizer.render_png(CompactGrid.from_board(board), palette)
+
+def render_thumbnails(map_ids, x_max, y_max, width, height=None, workers=0, palette=None):
+    """
+    Generates maps and yields `(map_id, png_bytes)` for each, in the order
+    `generate_map_data_batch` yields them. All images share one rasterizer.
+    """
+    rasterizer = get_rasterizer(x_max, y_max, width, height)
+    for map_id, grid in generate_map_data_batch(map_ids, x_max, y_max, workers=workers, compact=True):
+        yield map_id, rasterizer.render_png(grid, palette)
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(width, height, rgb, level=6):
+    """
+    Encodes width * height RGB pixels (row by row, 3 bytes each) as an
+    8-bit truecolor PNG, with no filtering and zlib at the given level.
+    """
+    stride = width * 3
+    rows = bytearray((stride + 1) * height)
+    for row in range(height):
+        # Each row starts with its filter type, 0 (none).
+        rows[row * (stride + 1) + 1:(row + 1) * (stride + 1)] = rgb[row * stride:(row + 1) * stride]
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + _png_chunk(b"IHDR", header) + _png_chunk(b"IDAT", zlib.compress(bytes(rows), level))
+            + _png_chunk(b"IEND", b""))
+
+def build_parser():
+    """Returns the argument parser of the thumbnail renderer."""
+    parser = argparse.ArgumentParser(prog="python -m py_hexmap.render",
+                                     description="Render map thumbnails as PNG files.")
+    parser.add_argument("seeds", type=parse_seeds, help='seeds and inclusive ranges, e.g. "0-999,123456"')
+    parser.add_argument("-x", "--x-max", type=int, default=20, help="map width (default: 20)")
+    parser.add_argument("-y", "--y-max", type=int, default=11, help="map height (default: 11)")
+    parser.add_argument("--width", type=int, default=160, help="image width in pixels (default: 160)")
+    parser.add_argument("--height", type=int, default=None, help="image height (default: keep the aspect ratio)")
+    parser.add_argument("-o", "--output", default="map_{map_id}.png", help='file name pattern (default: "map_{map_id}.png")')
+    parser.add_argument("-w", "--workers", type=int, default=0, help="worker processes; 0 generates in this process (default)")
+    return parser
+
+def main(argv=None):
+    """Renders the thumbnails of the given seeds."""
+    args = build_parser().parse_args(argv)
+    for map_id, png in render_thumbnails(args.seeds, args.x_max, args.y_max, args.width, args.height,
+                                         workers=args.workers):
+        with open(args.output.format(map_id=map_id), "wb") as stream:
+            stream.write(png)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
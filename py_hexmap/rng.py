@@ -0,0 +1,80 @@
+import functools
+
+# Parameters of the linear congruential generator behind `HexMap._rand`.
+# The multiplier is coprime to the modulus, so two seeds give the same map
+# exactly when they are equal modulo LCG_MODULUS.
+LCG_MULTIPLIER = 9301
+LCG_INCREMENT = 49297
+LCG_MODULUS = 233280
+
+# Number of `_rand` calls made by the warm-up loop that starts `generate_board`
+# (6 x 4 iterations of five draws whose values are discarded).
+WARM_UP_DRAWS = 120
+
+def canonical_map_id(map_id: int) -> int:
+    """
+    Returns the smallest non-negative seed that generates the same map as map_id.
+    """
+    return map_id % LCG_MODULUS
+
+@functools.lru_cache(maxsize=256)
+def jump_coefficients(steps: int):
+    """
+    Returns (multiplier, increment) such that `steps` LCG steps from any state
+    s land on `(multiplier * s + increment) % LCG_MODULUS`. Computed by
+    squaring the affine step, so it takes O(log steps) operations.
+    """
+    multiplier, increment = 1, 0
+    step_multiplier, step_increment = LCG_MULTIPLIER, LCG_INCREMENT
+    while steps > 0:
+        if steps & 1:
+            multiplier = (multiplier * step_multiplier) % LCG_MODULUS
+            increment = (increment * step_multiplier + step_increment) % LCG_MODULUS
+        step_increment = (step_increment * step_multiplier + step_increment) % LCG_MODULUS
+        step_multiplier = (step_multiplier * step_multiplier) % LCG_MODULUS
+        steps >>= 1
+    return multiplier, increment
+
+def jump_state(state: int, steps: int) -> int:
+    """
+    Returns the `HexMap.random_seed` value after `steps` calls to `_rand`
+    starting from state, without making the calls.
+    """
+    multiplier, increment = jump_coefficients(steps)
+    return (multiplier * state + increment) % LCG_MODULUS
+
+def draw_block(state: int, count: int, n: int):
+    """
+    Makes `count` consecutive `_rand(n)` draws at once.
+
+    Args:
+        state (int): The current `HexMap.random_seed`.
+        count (int): Number of draws.
+        n (int): The exclusive upper bound of every draw.
+
+    Returns:
+        tuple: The list of drawn values, identical to calling `_rand(n)`
+               count times, and the state after the last draw.
+    """
+    values = [0] * count
+    for index in range(count):
+        state = (state * LCG_MULTIPLIER + LCG_INCREMENT) % LCG_MODULUS
+        # Same arithmetic as `_rand`; int() equals floor() for these
+        # non-negative values.
+        values[index] = int((state / LCG_MODULUS) * n)
+    return values, state
+
+def draws_between(start: int, end: int) -> int:
+    """
+    Returns how many `_rand` calls take `HexMap.random_seed` from start to
+    end, the inverse of `jump_state`, by stepping the LCG from start. The
+    generator has full period, so end is always reached, after fewer than
+    LCG_MODULUS steps; longer runs are only known modulo LCG_MODULUS.
+    """
+    state = start % LCG_MODULUS
+    end %= LCG_MODULUS
+    draws = 0
+    while state != end:
+        state = (state * LCG_MULTIPLIER + LCG_INCREMENT) % LCG_MODULUS
+        draws += 1
+    return draws
@@ -0,0 +1,259 @@
+import argparse
+import collections
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from .__main__ import parse_seeds
+from .flat_board import ESTATE_CODES, FlatBoard
+from .generator import STAGE_NAMES, HexMap
+from .mapped import MappedBoard
+from .rng import LCG_MODULUS
+
+# The position of each stage of `generate_board`.
+STAGE_ORDER = {name: position for position, name in enumerate(STAGE_NAMES)}
+
+class Constraint:
+    """
+    A requirement a map must meet. `check` is first called after the stage
+    named by stage and then after every later one, with the name of the
+    stage that just ran, until it decides: it returns True or False, or
+    None while the map so far cannot tell. A constraint still undecided
+    after the last stage fails.
+
+    The base class wraps a function test(hex_map, board) with that
+    contract. Searches with worker processes pickle their constraints, so
+    test must then be a module-level function.
+    """
+    def __init__(self, stage, test=None):
+        """
+        Args:
+            stage (str): The first stage after which the constraint is checked.
+            test (callable, optional): test(hex_map, board), used by `check`.
+        """
+        if stage not in STAGE_ORDER:
+            raise ValueError("unknown stage: " + str(stage))
+        self.stage = stage
+        self.test = test
+
+    def check(self, hex_map, board, stage):
+        return self.test(hex_map, board)
+
+class MinTowns(Constraint):
+    """
+    At least count towns, capitals included. After land grouping the most
+    towns the map can get is known: every land group tries
+    `len(group) // 10 + 1` towns and places at most one per try.
+    """
+    def __init__(self, count):
+        super().__init__("generate_land_groups")
+        self.count = count
+
+    def check(self, hex_map, board, stage):
+        if STAGE_ORDER[stage] < STAGE_ORDER["generate_towns"]:
+            most = len(board.capital_locations()) + sum(len(group) // 10 + 1 for group in board.land_groups)
+            return False if most < self.count else None
+        return len(board.towns) >= self.count
+
+class SeparateCapitals(Constraint):
+    """Every party capital on its own land group, decided by land grouping."""
+    def __init__(self):
+        super().__init__("generate_land_groups")
+
+    def check(self, hex_map, board, stage):
+        land_ids = [board.get_field(x, y).land_id for x, y in board.capital_locations()]
+        return len(set(land_ids)) == len(land_ids)
+
+class MinPorts(Constraint):
+    """At least count port fields."""
+    def __init__(self, count):
+        super().__init__("generate_ports")
+        self.count = count
+
+    def check(self, hex_map, board, stage):
+        return count_estates(board, "port") >= self.count
+
+def count_estates(board, estate):
+    """Returns the number of fields holding an estate."""
+    if isinstance(board, FlatBoard):
+        code = ESTATE_CODES[estate]
+        return sum(bytes(board.estate[start:start + board.y_max]).count(code)
+                   for start in range(0, board.x_max * board.y_max, board.y_max))
+    return sum(1 for x in range(board.x_max) for y in range(board.y_max)
+               if board.get_field(x, y).estate == estate)
+
+class SeedSearch:
+    """
+    Finds the seeds whose maps meet all of a list of constraints.
+
+    Each candidate is generated stage by stage and its constraints are
+    checked as soon as their stage has run. A candidate stops at the first
+    constraint that fails, or as soon as all have passed, so for example
+    land group constraints reject seeds before towns and ports are placed.
+    `run` spreads the seeds over worker processes and yields matches as
+    they are found. `checked` counts the evaluated seeds and `rejected`
+    counts the rejections by the stage that decided them.
+    """
+    def __init__(self, constraints, x_max, y_max, path_engine="heap", board_backend="flat",
+                 terrain_engine="bitboard"):
+        """
+        Args:
+            constraints (list[Constraint]): The requirements, all of which must hold.
+            x_max (int): The maximum X-coordinate for the map (width).
+            y_max (int): The maximum Y-coordinate for the map (height).
+            path_engine (str): See `HexMap`.
+            board_backend (str): See `HexMap`.
+            terrain_engine (str): See `HexMap`.
+        """
+        self.constraints = list(constraints)
+        self.x_max = x_max
+        self.y_max = y_max
+        self.path_engine = path_engine
+        self.board_backend = board_backend
+        self.terrain_engine = terrain_engine
+        self.checked = 0
+        self.rejected = collections.Counter()
+
+    def evaluate(self, map_id):
+        """
+        Generates map_id until its constraints are decided and returns
+        (matched, stage), the stage after which they were (None without
+        constraints). A map that cannot be generated at this size fails at
+        the stage that raised.
+        """
+        hex_map = HexMap(map_id, self.x_max, self.y_max, path_engine=self.path_engine,
+                         board_backend=self.board_backend, terrain_engine=self.terrain_engine)
+        try:
+            return self._evaluate(hex_map)
+        finally:
+            if isinstance(hex_map.board, MappedBoard):
+                hex_map.board.close()
+
+    def _evaluate(self, hex_map):
+        board = hex_map.board
+        pending = sorted(self.constraints, key=lambda constraint: STAGE_ORDER[constraint.stage])
+        if not pending:
+            return True, None
+        for name in STAGE_NAMES:
+            try:
+                hex_map.run_stages(name)
+            except IndexError:
+                return False, name
+            undecided = []
+            for constraint in pending:
+                if STAGE_ORDER[constraint.stage] > STAGE_ORDER[name]:
+                    undecided.append(constraint)
+                    continue
+                result = constraint.check(hex_map, board, name)
+                if result is None:
+                    undecided.append(constraint)
+                elif not result:
+                    return False, name
+            pending = undecided
+            if not pending:
+                return True, name
+        return False, name
+
+    def evaluate_chunk(self, map_ids):
+        """
+        Returns the matching seeds of map_ids, the rejections by stage and
+        the number of seeds checked.
+        """
+        matches = []
+        rejected = collections.Counter()
+        for map_id in map_ids:
+            matched, stage = self.evaluate(map_id)
+            if matched:
+                matches.append(map_id)
+            else:
+                rejected[stage] += 1
+        return matches, rejected, len(map_ids)
+
+    def run(self, map_ids=None, workers=None, chunk_size=256, limit=None):
+        """
+        Yields the seeds of map_ids (all canonical seeds by default) that
+        meet every constraint. Seeds are checked in chunks of chunk_size on
+        workers processes (the CPU count by default, 0 for this process)
+        and yielded as their chunk finishes, so with workers they do not
+        come in order. Stops after limit matches.
+        """
+        map_ids = list(range(LCG_MODULUS) if map_ids is None else map_ids)
+        chunks = [map_ids[start:start + chunk_size] for start in range(0, len(map_ids), chunk_size)]
+        found = 0
+        for matches, rejected, checked in self._chunk_results(chunks, workers):
+            self.checked += checked
+            self.rejected.update(rejected)
+            for map_id in matches:
+                yield map_id
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def _chunk_results(self, chunks, workers):
+        if workers == 0:
+            for chunk in chunks:
+                yield self.evaluate_chunk(chunk)
+            return
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # A few chunks per worker in flight, so stopping early leaves
+            # little work behind.
+            window = 4 * workers
+            remaining = iter(chunks)
+            running = set()
+            try:
+                while True:
+                    for chunk in remaining:
+                        running.add(executor.submit(self.evaluate_chunk, chunk))
+                        if len(running) >= window:
+                            break
+                    if not running:
+                        return
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in running:
+                    future.cancel()
+
+def build_parser():
+    """Returns the argument parser of the seed search."""
+    parser = argparse.ArgumentParser(prog="python -m py_hexmap.search",
+                                     description="Find the seeds whose maps meet the given constraints.")
+    parser.add_argument("-x", "--x-max", type=int, default=20, help="map width (default: 20)")
+    parser.add_argument("-y", "--y-max", type=int, default=11, help="map height (default: 11)")
+    parser.add_argument("--seeds", default="all", help='"all" canonical seeds or seeds and ranges (default: all)')
+    parser.add_argument("--min-towns", type=int, default=None, help="at least this many towns")
+    parser.add_argument("--min-ports", type=int, default=None, help="at least this many ports")
+    parser.add_argument("--separate-capitals", action="store_true", help="every capital on its own land group")
+    parser.add_argument("-n", "--limit", type=int, default=None, help="stop after this many seeds")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processes (default: CPU count; 0 in-process)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="seeds per task (default: 256)")
+    return parser
+
+def main(argv=None):
+    """Prints the matching seeds, one per line as found, and a summary on stderr."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        map_ids = range(LCG_MODULUS) if args.seeds == "all" else parse_seeds(args.seeds)
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+    constraints = []
+    if args.min_towns is not None:
+        constraints.append(MinTowns(args.min_towns))
+    if args.separate_capitals:
+        constraints.append(SeparateCapitals())
+    if args.min_ports is not None:
+        constraints.append(MinPorts(args.min_ports))
+    search = SeedSearch(constraints, args.x_max, args.y_max)
+    found = 0
+    for map_id in search.run(map_ids, workers=args.workers, chunk_size=args.chunk_size, limit=args.limit):
+        print(map_id, flush=True)
+        found += 1
+    stages = ", ".join("%s %d" % (name, search.rejected[name]) for name in STAGE_NAMES if search.rejected[name])
+    print("%d of %d seeds matched; rejected after %s" % (found, search.checked, stages or "no stage"),
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from .aio import AsyncMapGenerator
+from .cache import MapCache
+from .rng import canonical_map_id
+
+# Bumped whenever generation output changes, so clients drop stale ETags.
+ETAG_VERSION = 1
+CONTENT_TYPES = {"json": "application/json; charset=utf-8", "binary": "application/octet-stream"}
+# Maps never change for a given ETag, so clients may keep them for a year.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class MapService:
+    """
+    Serves `CompactGrid`s to the request threads from an `AsyncMapGenerator`
+    with a `MapCache`, generating misses on a worker pool. The generator runs
+    on an event loop of its own thread, so concurrent requests for the same
+    canonical seed and size wait for one generation.
+    """
+    def __init__(self, workers=None, cache_entries=4096, board_backend="flat", use_processes=True):
+        """
+        Args:
+            workers (int, optional): Worker count; defaults to the CPU count.
+            cache_entries (int): Maps kept in the cache.
+            board_backend (str): "dict" or "flat"; see `HexMap`.
+            use_processes (bool): Generate on processes rather than threads.
+        """
+        workers = workers or os.cpu_count() or 1
+        if use_processes:
+            # Forked workers would inherit the listening socket and keep the
+            # port open after the server exits.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.cache = MapCache(max_entries=cache_entries)
+        self.board_backend = board_backend
+        self.generator = AsyncMapGenerator(executor=self.executor, cache=self.cache, board_backend=board_backend)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="py_hexmap-service", daemon=True)
+        self._thread.start()
+
+    def get_grid(self, map_id, x_max, y_max):
+        """Returns the `CompactGrid` of a map, generating it if it is not cached."""
+        # Hits are answered here, without a round trip through the loop.
+        grid = self.cache.get_grid(map_id, x_max, y_max)
+        if grid is not None:
+            return grid
+        request = self.generator.generate_uncached_grid(map_id, x_max, y_max)
+        return asyncio.run_coroutine_threadsafe(request, self._loop).result()
+
+    def stats(self):
+        return {"generated": self.generator.generated, "coalesced": self.generator.coalesced,
+                "in_flight": self.generator.in_flight(), "cache": self.cache.stats()}
+
+    async def _shutdown(self):
+        """Cancels the generations in flight and waits until the requests waiting for them have failed."""
+        self.generator.close()
+        requests = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in requests:
+            task.cancel()
+        await asyncio.gather(*requests, return_exceptions=True)
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class ServerMetrics:
+    """
+    Request counters and a window of recent latencies, safe to update from
+    the request threads.
+    """
+    def __init__(self, window=10000):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.statuses = {}
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, status, seconds, size):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        """Returns the counters, throughput and latency percentiles (in ms) as a dict."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            uptime = time.perf_counter() - self.started
+            result = {
+                "uptime_seconds": uptime,
+                "requests": self.requests,
+                "requests_per_second": self.requests / uptime if uptime > 0 else 0.0,
+                "bytes_sent": self.bytes_sent,
+                "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            }
+        result["latency_ms"] = latency_percentiles(latencies)
+        return result
+
+def latency_percentiles(latencies):
+    """Returns p50, p90, p99 and max of sorted latencies in seconds, in milliseconds."""
+    if not latencies:
+        return {}
+    return {name: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+
+def map_etag(map_id, x_max, y_max, output_format):
+    """Returns the strong ETag of a map response; seeds with the same canonical form share it."""
+    return '"hexmap-%d-%d-%dx%d-%s"' % (ETAG_VERSION, canonical_map_id(map_id), x_max, y_max, output_format)
+
+def etag_matches(header, etag, exists=True):
+    """
+    Evaluates an If-None-Match header against an ETag. "*" matches only
+    when exists says the resource has a representation.
+    """
+    if header is None:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return (exists and "*" in candidates) or etag in candidates or ("W/" + etag) in candidates
+
+class MapRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes:
+        GET /map/<seed>?x_max=20&y_max=11&format=json|binary
+        GET /metrics
+        GET /health
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "py-hexmap"
+    # Headers and body are written separately; without TCP_NODELAY the body
+    # of a keep-alive response waits for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        try:
+            if url.path.startswith("/map/"):
+                status, headers, body = self.serve_map(url.path[len("/map/"):], parse_qs(url.query))
+            elif url.path == "/metrics":
+                status, headers, body = self.serve_json(200, {"server": self.server.metrics.snapshot(),
+                                                              "maps": self.server.service.stats()})
+            elif url.path == "/health":
+                status, headers, body = self.serve_json(200, {"status": "ok"})
+            else:
+                status, headers, body = self.serve_json(404, {"error": "not found"})
+        except Exception as error:
+            status, headers, body = self.serve_json(500, {"error": type(error).__name__})
+        # Recorded before anything goes out, so a client that has read a
+        # response always finds it counted in /metrics.
+        self.server.metrics.record(status, time.perf_counter() - started, len(body))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_json(self, status, value):
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return status, [("Content-Type", CONTENT_TYPES["json"])], body
+
+    def serve_map(self, seed_text, query):
+        """Returns the status, headers and body of a map request."""
+        try:
+            map_id = int(seed_text)
+            x_max = int(query.get("x_max", ["20"])[0])
+            y_max = int(query.get("y_max", ["11"])[0])
+        except ValueError:
+            return self.serve_json(400, {"error": "seed, x_max and y_max must be integers"})
+        output_format = query.get("format", ["json"])[0]
+        if output_format not in CONTENT_TYPES:
+            return self.serve_json(400, {"error": "format must be json or binary"})
+        if not (0 < x_max <= self.server.max_size and 0 < y_max <= self.server.max_size):
+            return self.serve_json(400, {"error": "x_max and y_max must be between 1 and " + str(self.server.max_size)})
+
+        etag = map_etag(map_id, x_max, y_max, output_format)
+        headers = [("ETag", etag), ("Cache-Control", CACHE_CONTROL)]
+        if_none_match = self.headers.get("If-None-Match")
+        # A listed ETag was served before, so the map exists; "*" waits
+        # until generation shows that it does.
+        if etag_matches(if_none_match, etag, exists=False):
+            return 304, headers, b""
+        try:
+            grid = self.server.service.get_grid(map_id, x_max, y_max)
+        except IndexError:
+            # The board needs more towns than there are town names.
+            return self.serve_json(422, {"error": "no map can be generated at this size"})
+        if etag_matches(if_none_match, etag):
+            return 304, headers, b""
+        if output_format == "binary":
+            body = grid.to_bytes()
+        else:
+            body = json.dumps(grid.to_matrix(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return 200, headers + [("Content-Type", CONTENT_TYPES[output_format])], body
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class MapServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server for maps. Request threads parse, encode and
+    answer from the cache; generation runs on the `MapService` pool.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, service=None, max_size=200, verbose=False):
+        """
+        Args:
+            address (tuple): (host, port); port 0 picks a free port.
+            service (MapService, optional): Created with defaults if omitted.
+            max_size (int): Largest x_max or y_max accepted.
+            verbose (bool): Log every request to stderr.
+        """
+        super().__init__(address, MapRequestHandler)
+        self.service = service if service is not None else MapService()
+        self.metrics = ServerMetrics()
+        self.max_size = max_size
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
+
+def build_parser():
+    """Returns the argument parser of the server."""
+    parser = argparse.ArgumentParser(prog="python -m py_hexmap.server",
+                                     description="Serve maps over HTTP as JSON or compact binary grids.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port (default: 8000)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="generation workers (default: CPU count)")
+    parser.add_argument("--threads", action="store_true", help="generate on threads instead of processes")
+    parser.add_argument("--cache-entries", type=int, default=4096, help="maps kept in memory (default: 4096)")
+    parser.add_argument("--max-size", type=int, default=200, help="largest accepted x_max or y_max (default: 200)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    return parser
+
+def main(argv=None):
+    """Runs the server until interrupted."""
+    args = build_parser().parse_args(argv)
+    service = MapService(workers=args.workers, cache_entries=args.cache_entries, use_processes=not args.threads)
+    server = MapServer((args.host, args.port), service, max_size=args.max_size, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print("serving maps on http://%s:%d/map/<seed>" % (host, port), file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
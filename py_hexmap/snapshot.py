@@ -0,0 +1,267 @@
+import json
+import struct
+import sys
+from array import array
+from .flat_board import ESTATE_CODES, ESTATE_NAMES, TERRAIN_CODES, TERRAIN_NAMES, FlatBoard, LandGroup
+
+# Serialized layout: magic and the length of a JSON header, the header, then
+# the cell arrays in `SNAPSHOT_ARRAYS` order and the land groups as int32
+# land_order (every group's flat indexes, one group after another) and
+# land_sizes. All integers are little-endian.
+SNAPSHOT_MAGIC = b"HXS1"
+SNAPSHOT_HEADER = struct.Struct("<4sI")
+# The per-field arrays of a `FlatBoard` a snapshot stores, with their typecodes.
+SNAPSHOT_ARRAYS = (
+    ("created", "B"),
+    ("terrain", "B"),
+    ("is_land", "B"),
+    ("land_id", "i"),
+    ("estate", "B"),
+    ("capital", "b"),
+    ("town_name", "h"),
+)
+
+def _to_little_endian(values, typecode):
+    """Returns the bytes of an array, bytearray or memoryview of typecode, little-endian."""
+    data = bytes(memoryview(values).cast("B"))
+    if sys.byteorder == "big" and typecode not in ("b", "B"):
+        values = array(typecode)
+        values.frombytes(data)
+        values.byteswap()
+        data = values.tobytes()
+    return data
+
+def _native_bytes(data, typecode):
+    """Returns little-endian array bytes in this machine's byte order."""
+    if sys.byteorder == "big" and typecode not in ("b", "B"):
+        return _from_little_endian(data, typecode).tobytes()
+    return data
+
+def _from_little_endian(data, typecode):
+    """Returns an array of typecode read from little-endian bytes."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big" and typecode not in ("b", "B"):
+        values.byteswap()
+    return values
+
+def _index(field, y_max):
+    return field.f_x * y_max + field.f_y
+
+class StageSnapshot:
+    """
+    The state of a `HexMap` after one of its stages: the board, the RNG
+    (`random_seed` and the `rand_draws` count) and the `town_names` pool.
+
+    Restoring a snapshot with `HexMap.from_snapshot` and running the
+    remaining stages gives the same map as an uninterrupted run, so an
+    experiment that only changes later stages can restart from the last
+    stage it leaves unchanged. The board is stored as the flat arrays of a
+    `FlatBoard` whatever the backend, and a snapshot taken on one backend
+    can be restored on another.
+    """
+    def __init__(self, x_max, y_max, map_number, stage, random_seed, rand_draws, town_names, cells,
+                 town_name_table, land_count, land_order, land_sizes, towns, capitals):
+        """
+        Args:
+            x_max (int): The maximum X-coordinate for the map (width).
+            y_max (int): The maximum Y-coordinate for the map (height).
+            map_number (int): The seed the map was created with.
+            stage (str): The last stage run, or None before the first.
+            random_seed (int): The RNG state.
+            rand_draws (int): The number of draws so far.
+            town_names (list[str]): The names `rand_town` can still pick.
+            cells (dict): Little-endian bytes of each `SNAPSHOT_ARRAYS` array.
+            town_name_table (list[str]): The names the town_name cells index.
+            land_count (int): `Board.land_count`.
+            land_order (bytes): The fields of every land group, as int32.
+            land_sizes (bytes): The size of each land group, as int32.
+            towns (list[int]): The flat indexes of `Board.towns`.
+            capitals (list[int]): `Board.parties_capitals` as indexes, -1 for None.
+        """
+        self.x_max = x_max
+        self.y_max = y_max
+        self.map_number = map_number
+        self.stage = stage
+        self.random_seed = random_seed
+        self.rand_draws = rand_draws
+        self.town_names = town_names
+        self.cells = cells
+        self.town_name_table = town_name_table
+        self.land_count = land_count
+        self.land_order = land_order
+        self.land_sizes = land_sizes
+        self.towns = towns
+        self.capitals = capitals
+
+    @classmethod
+    def capture(cls, hex_map):
+        """Takes a snapshot of a map; the map is not changed."""
+        board = hex_map.board
+        y_max = board.y_max
+        if isinstance(board, FlatBoard):
+            cells = {name: _to_little_endian(getattr(board, name), typecode) for name, typecode in SNAPSHOT_ARRAYS}
+            town_name_table = list(board.town_name_table)
+        else:
+            cells, town_name_table = cls._dict_board_cells(board)
+        land_order = array("i")
+        land_sizes = array("i")
+        for group in board.land_groups:
+            if isinstance(group, LandGroup):
+                land_order.extend(group.indexes)
+            else:
+                land_order.extend(_index(field, y_max) for field in group)
+            land_sizes.append(len(group))
+        return cls(board.x_max, y_max, board.map_number, hex_map.stage, hex_map.random_seed, hex_map.rand_draws,
+                   list(board.town_names), cells, town_name_table, board.land_count,
+                   _to_little_endian(land_order, "i"), _to_little_endian(land_sizes, "i"),
+                   [_index(town, y_max) for town in board.towns],
+                   [-1 if capital is None else _index(capital, y_max) for capital in board.parties_capitals])
+
+    @staticmethod
+    def _dict_board_cells(board):
+        """Reads the `Field` objects of a `Board` into `SNAPSHOT_ARRAYS` arrays."""
+        size = board.x_max * board.y_max
+        values = {
+            "created": bytearray(size),
+            "terrain": bytearray(size),
+            "is_land": bytearray(size),
+            "land_id": array("i", bytes(4 * size)),
+            "estate": bytearray(size),
+            "capital": array("b", bytes(size)),
+            "town_name": array("h", [-1]) * size,
+        }
+        town_name_table = []
+        town_name_ids = {}
+        for index in range(size):
+            field = board.get_field(index // board.y_max, index % board.y_max)
+            if field is None:
+                continue
+            values["created"][index] = 1
+            values["terrain"][index] = TERRAIN_CODES[field.type]
+            values["is_land"][index] = 1 if field.is_land else 0
+            values["land_id"][index] = field.land_id
+            values["estate"][index] = ESTATE_CODES[field.estate]
+            values["capital"][index] = field.capital
+            if field.town_name != "":
+                if field.town_name not in town_name_ids:
+                    town_name_ids[field.town_name] = len(town_name_table)
+                    town_name_table.append(field.town_name)
+                values["town_name"][index] = town_name_ids[field.town_name]
+        cells = {name: _to_little_endian(values[name], typecode) for name, typecode in SNAPSHOT_ARRAYS}
+        return cells, town_name_table
+
+    def apply(self, hex_map):
+        """
+        Puts a freshly created map of the snapshot's seed and size into the
+        snapshot's state. Use `HexMap.from_snapshot` instead of calling this.
+        """
+        board = hex_map.board
+        if (board.x_max, board.y_max) != (self.x_max, self.y_max):
+            raise ValueError("snapshot is of a " + str(self.x_max) + "x" + str(self.y_max) + " map")
+        y_max = self.y_max
+        hex_map.stage = self.stage
+        hex_map.random_seed = self.random_seed
+        hex_map.rand_draws = self.rand_draws
+        board.map_number = self.map_number
+        board.town_names = list(self.town_names)
+        board.land_count = self.land_count
+        if isinstance(board, FlatBoard):
+            for name, typecode in SNAPSHOT_ARRAYS:
+                memoryview(getattr(board, name)).cast("B")[:] = _native_bytes(self.cells[name], typecode)
+            board.town_name_table[:] = self.town_name_table
+            board.town_name_ids.clear()
+            board.town_name_ids.update((name, code) for code, name in enumerate(self.town_name_table))
+        else:
+            self._apply_dict_board(board)
+
+        def field_at(index):
+            return board.get_field(index // y_max, index % y_max)
+
+        land_order = _from_little_endian(self.land_order, "i")
+        start = 0
+        for size in _from_little_endian(self.land_sizes, "i"):
+            group = board.new_land_group()
+            board.land_groups.append(group)
+            if isinstance(group, LandGroup):
+                group.indexes.extend(land_order[start:start + size])
+            else:
+                for index in land_order[start:start + size]:
+                    group.append(field_at(index))
+            start += size
+        board.towns = [field_at(index) for index in self.towns]
+        board.parties_capitals = [None if index < 0 else field_at(index) for index in self.capitals]
+
+    def _apply_dict_board(self, board):
+        """Creates the `Field` objects of a `Board` from the cell arrays."""
+        values = {name: _from_little_endian(self.cells[name], typecode) for name, typecode in SNAPSHOT_ARRAYS}
+        for index in range(self.x_max * self.y_max):
+            if not values["created"][index]:
+                continue
+            field = board.new_field(index // self.y_max, index % self.y_max)
+            board.link_neighbors(field)
+            field.type = TERRAIN_NAMES[values["terrain"][index]]
+            field.is_land = values["is_land"][index] != 0
+            field.land_id = values["land_id"][index]
+            field.estate = ESTATE_NAMES[values["estate"][index]]
+            field.capital = values["capital"][index]
+            code = values["town_name"][index]
+            field.town_name = self.town_name_table[code] if code >= 0 else ""
+
+    def to_bytes(self):
+        """Returns the serialized snapshot."""
+        header = json.dumps({
+            "x_max": self.x_max,
+            "y_max": self.y_max,
+            "map_number": self.map_number,
+            "stage": self.stage,
+            "random_seed": self.random_seed,
+            "rand_draws": self.rand_draws,
+            "town_names": self.town_names,
+            "town_name_table": self.town_name_table,
+            "land_count": self.land_count,
+            "land_fields": len(self.land_order) // 4,
+            "land_groups": len(self.land_sizes) // 4,
+            "towns": self.towns,
+            "capitals": self.capitals,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(header)), header]
+        parts.extend(self.cells[name] for name, _ in SNAPSHOT_ARRAYS)
+        parts.append(self.land_order)
+        parts.append(self.land_sizes)
+        return b"".join(parts)
+
+    def __bytes__(self):
+        return self.to_bytes()
+
+    def write(self, stream):
+        """Writes the serialized snapshot to a binary stream and returns the number of bytes written."""
+        data = self.to_bytes()
+        stream.write(data)
+        return len(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reads a snapshot serialized by `to_bytes` or `write`. The arrays are
+        memoryviews into data, not copies.
+        """
+        view = memoryview(data)
+        magic, header_length = SNAPSHOT_HEADER.unpack_from(view, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a stage snapshot")
+        offset = SNAPSHOT_HEADER.size
+        header = json.loads(str(view[offset:offset + header_length], "utf-8"))
+        offset += header_length
+        size = header["x_max"] * header["y_max"]
+        cells = {}
+        for name, typecode in SNAPSHOT_ARRAYS:
+            length = size * array(typecode).itemsize
+            cells[name] = view[offset:offset + length]
+            offset += length
+        land_order = view[offset:offset + 4 * header["land_fields"]]
+        offset += 4 * header["land_fields"]
+        land_sizes = view[offset:offset + 4 * header["land_groups"]]
+        return cls(header["x_max"], header["y_max"], header["map_number"], header["stage"], header["random_seed"],
+                   header["rand_draws"], header["town_names"], cells, header["town_name_table"],
+                   header["land_count"], land_order, land_sizes, header["towns"], header["capitals"])
@@ -0,0 +1,149 @@
+import heapq
+from .query import hex_distance
+
+# Estates the index keeps, by the `kind` argument of its queries.
+KINDS = ("town", "port")
+
+class SpatialIndex:
+    """
+    Answers nearest-k and radius queries over the towns and ports of a board
+    by hex distance, and which land group a field belongs to.
+
+    Towns and ports are bucketed by axial coordinates (q = x,
+    r = y - x // 2) into square cells of cell_size by cell_size. A nearest
+    query visits cells in rings around the queried field and stops once no
+    farther ring can hold a closer estate, so it touches the neighborhood
+    of the answer instead of every town.
+
+    The index follows edits made through the board's `BoardEditor` until
+    `close` is called; call `update` for fields changed directly. Land groups are read from the
+    board's `land_id`, which the editor keeps current.
+    """
+    def __init__(self, board, cell_size=8, track_edits=True):
+        """
+        Args:
+            board (Board): A generated board of either backend.
+            cell_size (int): Side of a bucket in fields.
+            track_edits (bool): Subscribe to the board's `BoardEditor`.
+        """
+        self.board = board
+        self.cell_size = cell_size
+        self.buckets = {kind: {} for kind in KINDS}
+        self.kinds = {}
+        # Ring limit: no field lies farther than this many cells from another.
+        self.max_ring = (board.x_max + board.y_max + board.x_max // 2) // cell_size + 1
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                field = board.get_field(x, y)
+                if field.estate in KINDS:
+                    self._add(field.estate, field)
+        self.tracking = track_edits
+        if track_edits:
+            board.editor().subscribe(self.update)
+
+    def close(self):
+        """Stops following the board's edits, so the index can be discarded."""
+        if self.tracking:
+            self.board.editor().unsubscribe(self.update)
+            self.tracking = False
+
+    def _cell(self, x, y):
+        return x // self.cell_size, (y - x // 2) // self.cell_size
+
+    def _add(self, kind, field):
+        location = (field.f_x, field.f_y)
+        self.buckets[kind].setdefault(self._cell(*location), {})[location] = field
+        self.kinds[location] = kind
+
+    def update(self, field):
+        """Moves a field into or out of the index after its estate changed."""
+        location = (field.f_x, field.f_y)
+        old = self.kinds.get(location)
+        new = field.estate if field.estate in KINDS else None
+        if old == new:
+            return
+        if old is not None:
+            cell = self._cell(*location)
+            bucket = self.buckets[old][cell]
+            del bucket[location]
+            if not bucket:
+                del self.buckets[old][cell]
+            del self.kinds[location]
+        if new is not None:
+            self._add(new, field)
+
+    def count(self, kind="town"):
+        """Returns the number of indexed fields of a kind."""
+        return sum(len(bucket) for bucket in self.buckets[kind].values())
+
+    def nearest(self, field, k=1, kind="town", predicate=None):
+        """
+        Returns up to k (distance, field) pairs of the given kind closest to
+        field, nearest first, ties by position. predicate, if given, is
+        called with each candidate field and rejects it by returning False;
+        the field itself is a candidate like any other. k of 0 or less
+        gives an empty list.
+        """
+        if kind not in KINDS:
+            raise ValueError("kind must be one of " + ", ".join(KINDS))
+        if k <= 0:
+            return []
+        buckets = self.buckets[kind]
+        center_q, center_r = self._cell(field.f_x, field.f_y)
+        best = []
+        for ring in range(self.max_ring + 1):
+            for cell in self._ring(center_q, center_r, ring):
+                for (x, y), candidate in buckets.get(cell, {}).items():
+                    entry = (-hex_distance(field, candidate), -x, -y, candidate)
+                    if len(best) == k and entry[:3] <= best[0][:3]:
+                        continue
+                    if predicate is not None and not predicate(candidate):
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    else:
+                        heapq.heapreplace(best, entry)
+            # Every field in the next ring is more than ring * cell_size away.
+            if len(best) == k and -best[0][0] <= ring * self.cell_size:
+                break
+        best.sort(key=lambda entry: entry[:3], reverse=True)
+        return [(-entry[0], entry[3]) for entry in best]
+
+    def within(self, field, radius, kind="town"):
+        """Returns the (distance, field) pairs of a kind within radius of field, nearest first."""
+        if kind not in KINDS:
+            raise ValueError("kind must be one of " + ", ".join(KINDS))
+        buckets = self.buckets[kind]
+        q = field.f_x
+        r = field.f_y - field.f_x // 2
+        found = []
+        for cell_q in range((q - radius) // self.cell_size, (q + radius) // self.cell_size + 1):
+            for cell_r in range((r - radius) // self.cell_size, (r + radius) // self.cell_size + 1):
+                for (x, y), candidate in buckets.get((cell_q, cell_r), {}).items():
+                    distance = hex_distance(field, candidate)
+                    if distance <= radius:
+                        found.append((distance, x, y, candidate))
+        found.sort(key=lambda entry: entry[:3])
+        return [(entry[0], entry[3]) for entry in found]
+
+    def land_id(self, x, y):
+        """Returns the land group id of the field at (x, y), or -1 for water."""
+        return self.board.get_field(x, y).land_id
+
+    def land_group(self, x, y):
+        """Returns the land group the field at (x, y) belongs to, or None for water."""
+        land_id = self.land_id(x, y)
+        return self.board.land_groups[land_id] if land_id >= 0 else None
+
+    @staticmethod
+    def _ring(center_q, center_r, ring):
+        """Yields the cells at Chebyshev distance ring from a cell."""
+        if ring == 0:
+            yield center_q, center_r
+            return
+        for offset in range(-ring, ring + 1):
+            yield center_q + offset, center_r - ring
+            yield center_q + offset, center_r + ring
+        for offset in range(-ring + 1, ring):
+            yield center_q - ring, center_r + offset
+            yield center_q + ring, center_r + offset
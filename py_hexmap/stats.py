@@ -0,0 +1,121 @@
+import time
+
+class StageStats:
+    """
+    Measurements of one generation stage.
+
+    Attributes:
+        name (str): The stage, e.g. "generate_ports".
+        seconds (float): Wall time.
+        rand_draws (int): RNG draws made during the stage.
+        failed (bool): True if the stage raised.
+    """
+    __slots__ = ("name", "seconds", "rand_draws", "failed")
+
+    def __init__(self, name, seconds, rand_draws, failed=False):
+        self.name = name
+        self.seconds = seconds
+        self.rand_draws = rand_draws
+        self.failed = failed
+
+    def as_dict(self):
+        return {"name": self.name, "seconds": self.seconds, "rand_draws": self.rand_draws, "failed": self.failed}
+
+    def __repr__(self):
+        return "StageStats(" + self.name + ", " + format(self.seconds, ".6f") + " s, " + str(self.rand_draws) + " draws)"
+
+class GenerationStats:
+    """
+    Statistics of one map generation, collected when passed to `HexMap` as
+    `stats`. Without it, `HexMap` and `Pathfinder` skip all of this.
+
+    Attributes:
+        stages (list[StageStats]): One entry per stage run, in order.
+        nodes_expanded (int): Nodes expanded by all path searches.
+        paths_found (int): Path searches that returned a path.
+        paths_failed (int): Path searches that returned None.
+        searches_skipped (int): Searches a `PortRouter` answered without
+                                searching (they count as failed too).
+        port_fallbacks (int): Town pairs for which `generate_ports` fell back
+                              to the search that may cross water.
+        ports_placed (int): Ports counted by `generate_ports`.
+        land_group_sizes (list[int]): Field count of every land group.
+        callback (callable): Called with each `StageStats` as its stage ends.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stages = []
+        self.nodes_expanded = 0
+        self.paths_found = 0
+        self.paths_failed = 0
+        self.searches_skipped = 0
+        self.port_fallbacks = 0
+        self.ports_placed = 0
+        self.land_group_sizes = []
+
+    def run_stage(self, hex_map, name, stage, *args):
+        """Runs stage(*args) for hex_map, recording its wall time and RNG draws."""
+        draws = hex_map.rand_draws
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = stage(*args)
+            failed = False
+            return result
+        finally:
+            record = StageStats(name, time.perf_counter() - started, hex_map.rand_draws - draws, failed)
+            self.stages.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def record_search(self, nodes_expanded, found):
+        """Counts one path search."""
+        self.nodes_expanded += nodes_expanded
+        if found:
+            self.paths_found += 1
+        else:
+            self.paths_failed += 1
+
+    def stage(self, name):
+        """Returns the last `StageStats` recorded for a stage, or None."""
+        for record in reversed(self.stages):
+            if record.name == name:
+                return record
+        return None
+
+    @property
+    def total_seconds(self):
+        return sum(record.seconds for record in self.stages)
+
+    def land_group_distribution(self):
+        """
+        Summarizes `land_group_sizes`: count, min, max, mean and a histogram
+        keyed by power-of-two upper bounds (1, 2, 4, ...), each counting the
+        groups larger than the previous bound.
+        """
+        sizes = self.land_group_sizes
+        histogram = {}
+        for size in sizes:
+            bound = 1 << (size - 1).bit_length()
+            histogram[bound] = histogram.get(bound, 0) + 1
+        return {
+            "count": len(sizes),
+            "min": min(sizes, default=0),
+            "max": max(sizes, default=0),
+            "mean": sum(sizes) / len(sizes) if sizes else 0.0,
+            "histogram": dict(sorted(histogram.items())),
+        }
+
+    def as_dict(self):
+        """Returns the statistics as plain data, ready for JSON or a metrics pipeline."""
+        return {
+            "stages": [record.as_dict() for record in self.stages],
+            "total_seconds": self.total_seconds,
+            "nodes_expanded": self.nodes_expanded,
+            "paths_found": self.paths_found,
+            "paths_failed": self.paths_failed,
+            "searches_skipped": self.searches_skipped,
+            "port_fallbacks": self.port_fallbacks,
+            "ports_placed": self.ports_placed,
+            "land_groups": self.land_group_distribution(),
+        }
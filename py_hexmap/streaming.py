@@ -0,0 +1,88 @@
+import json
+from .flat_board import FlatBoard, flat_display_strings
+from .generator import HexMap
+from .utils import get_field_display_string
+
+def iter_board_columns(board, start=0, stop=None):
+    """
+    Yields the columns of `fields_to_matrix_representation` one at a time,
+    each a list of display strings indexed by y, reading straight from the
+    board. Only the column being yielded is held as strings.
+
+    Args:
+        board (Board): A generated board of either backend.
+        start (int): The first column.
+        stop (int, optional): The column to stop before; x_max by default.
+    """
+    if stop is None:
+        stop = board.x_max
+    if isinstance(board, FlatBoard):
+        for x in range(start, stop):
+            yield list(flat_display_strings(board, x * board.y_max, (x + 1) * board.y_max))
+        return
+    for x in range(start, stop):
+        yield [get_field_display_string(board.get_field(x, y)) for y in range(board.y_max)]
+
+def iter_board_chunks(board, chunk_size=64):
+    """Yields the columns of a board in lists of up to chunk_size columns."""
+    for start in range(0, board.x_max, chunk_size):
+        yield list(iter_board_columns(board, start, min(start + chunk_size, board.x_max)))
+
+def write_json_matrix(stream, columns, indent=None, separators=None, ensure_ascii=True):
+    """
+    Writes an iterable of columns to a text stream as the same JSON that
+    `json.dump(matrix, stream, ...)` writes for the whole matrix, one column
+    at a time, and returns the number of characters written.
+
+    Args:
+        stream (text stream): Where to write.
+        columns (iterable[list[str]]): The columns, e.g. from `iter_board_columns`.
+        indent (int, optional): As for `json.dump`.
+        separators (tuple, optional): As for `json.dump`; only the item
+                                      separator is used.
+        ensure_ascii (bool): As for `json.dump`.
+    """
+    if separators is None:
+        item_separator = ", " if indent is None else ","
+    else:
+        item_separator = separators[0]
+    encode = json.JSONEncoder(ensure_ascii=ensure_ascii).encode
+    if indent is None:
+        opening, closing, column_opening, column_closing = "[", "]", "[", "]"
+        column_separator = value_separator = item_separator
+    else:
+        indent = " " * indent if isinstance(indent, int) else indent
+        opening, closing = "[\n", "\n]"
+        column_opening, column_closing = indent + "[\n" + indent * 2, "\n" + indent + "]"
+        column_separator = item_separator + "\n"
+        value_separator = item_separator + "\n" + indent * 2
+    written = 0
+    first = True
+    for column in columns:
+        if first:
+            text = opening
+            first = False
+        else:
+            text = column_separator
+        if column:
+            text += column_opening + value_separator.join(encode(value) for value in column) + column_closing
+        else:
+            text += (indent if indent is not None else "") + "[]"
+        stream.write(text)
+        written += len(text)
+    text = "[]" if first else closing
+    stream.write(text)
+    return written + len(text)
+
+def write_map_json(stream, map_id: int, x_max: int, y_max: int, board_backend: str = "flat", chunk_size: int = 64,
+                   **json_options):
+    """
+    Generates a map and writes `generate_map_data` for it as JSON to a text
+    stream, chunk_size columns at a time, without building the string
+    matrix. json_options are passed to `write_json_matrix`. Returns the
+    number of characters written.
+    """
+    hex_map = HexMap(map_id, x_max, y_max, board_backend=board_backend)
+    hex_map.generate_map()
+    columns = (column for chunk in iter_board_chunks(hex_map.board, chunk_size) for column in chunk)
+    return write_json_matrix(stream, columns, **json_options)
@@ -29,3 +29,18 @@ def fields_to_matrix_representation(fields, x_max: int, y_max: int):
             key = "f" + str(x) + "x" + str(y)
             output[x][y] = get_field_display_string(fields[key])
     return output
+
+def board_to_matrix_representation(board):
+    """
+    Converts a board into the same 2D list of strings as
+    `fields_to_matrix_representation`, reading cells through `board.get_field`
+    so array-backed boards are not probed with string keys.
+
+    Args:
+        board (Board): A generated board.
+    """
+    output = [["" for _ in range(board.y_max)] for _ in range(board.x_max)]
+    for x in range(board.x_max):
+        for y in range(board.y_max):
+            output[x][y] = get_field_display_string(board.get_field(x, y))
+    return output
@@ -0,0 +1,267 @@
+import functools
+from array import array
+from .board import Board, get_neighbor_table
+from .flat_board import FlatBoard
+from .generator import HexMap
+from .rng import LCG_INCREMENT, LCG_MODULUS, LCG_MULTIPLIER, WARM_UP_DRAWS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _require_numpy():
+    """Raises ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError("the vectorized engine requires NumPy")
+
+@functools.lru_cache(maxsize=1)
+def _lcg_cycle():
+    """
+    Returns the full LCG cycle starting at state 0 and the position of every
+    state in it. The generator has full period, so every state appears once
+    and the state k steps after s is `cycle[(position[s] + k) % LCG_MODULUS]`.
+    """
+    states = []
+    state = 0
+    for _ in range(LCG_MODULUS):
+        states.append(state)
+        state = (state * LCG_MULTIPLIER + LCG_INCREMENT) % LCG_MODULUS
+    cycle = np.array(states, dtype=np.int64)
+    position = np.empty(LCG_MODULUS, dtype=np.int64)
+    position[cycle] = np.arange(LCG_MODULUS, dtype=np.int64)
+    return cycle, position
+
+@functools.lru_cache(maxsize=16)
+def _neighbor_gather_table(x_max, y_max):
+    """
+    Returns the shared neighbor table as an (n, 6) array where off-board
+    neighbors point at index n, a padding column that is always False.
+    """
+    size = x_max * y_max
+    table = np.frombuffer(get_neighbor_table(x_max, y_max), dtype=np.int32).reshape(size, 6).astype(np.int64)
+    table[table < 0] = size
+    return table
+
+def _corner_mask(board):
+    """Marks the four capital fields that `HexMap.add_field` always makes land."""
+    mask = np.zeros((board.x_max, board.y_max), dtype=bool)
+    for x, y in board.capital_locations():
+        mask[x, y] = True
+    return mask.ravel()
+
+def _gather_neighbors(mask, table):
+    """Returns the (seeds, n, 6) neighbor values of a (seeds, n) boolean array."""
+    padded = np.concatenate([mask, np.zeros((mask.shape[0], 1), dtype=bool)], axis=1)
+    return padded[:, table]
+
+class TerrainBatch:
+    """
+    The state after the terrain stages for a batch of seeds of one size, as
+    produced by `generate_terrain_batch`.
+
+    Attributes:
+        map_ids (list[int]): The seeds, in batch order.
+        land (ndarray): (seeds, x_max, y_max) bool, True for land fields.
+        is_land (ndarray): (seeds, x_max, y_max) bool, the `Field.is_land`
+                           flags set by the first pass of `set_land_fields`.
+        land_ids (ndarray): (seeds, x_max, y_max) int32, -1 for water.
+        land_groups (list): Per seed, one int array per land group holding
+                            the flat indexes (`x * y_max + y`) of its fields
+                            in the order `generate_land_groups` appends them.
+        random_seeds (list[int]): Per seed, the RNG state after the stages.
+    """
+    def __init__(self, map_ids, x_max, y_max, land, is_land, land_ids, land_groups, random_seeds):
+        self.map_ids = map_ids
+        self.x_max = x_max
+        self.y_max = y_max
+        self.land = land
+        self.is_land = is_land
+        self.land_ids = land_ids
+        self.land_groups = land_groups
+        self.random_seeds = random_seeds
+
+    def __len__(self):
+        return len(self.map_ids)
+
+    def to_hex_map(self, index, path_engine="heap", board_backend="dict"):
+        """
+        Builds the `HexMap` for one seed of the batch in the state
+        `HexMap.generate_terrain` leaves it, ready for `generate_estates`;
+        its `stage` is "generate_land_groups", so `generate_map` and
+        `snapshot` see where it stands.
+        """
+        x_max = self.x_max
+        y_max = self.y_max
+        hex_map = HexMap(self.map_ids[index], x_max, y_max, path_engine=path_engine, board_backend=board_backend)
+        board = hex_map.board
+        land = self.land[index].ravel()
+        is_land = self.is_land[index].ravel()
+        land_ids = self.land_ids[index].ravel()
+        if isinstance(board, FlatBoard):
+            size = x_max * y_max
+            board.created[:] = b"\x01" * size
+            board.terrain[:] = np.where(land, 1, 2).astype(np.uint8).tobytes()
+            board.is_land[:] = is_land.astype(np.uint8).tobytes()
+            board.land_id[:] = array("i", land_ids.astype(np.int32).tobytes())
+            board.capital[:] = array("b", [-1]) * size
+        else:
+            land_list = land.tolist()
+            is_land_list = is_land.tolist()
+            land_id_list = land_ids.tolist()
+            index_in_board = 0
+            for x in range(x_max):
+                for y in range(y_max):
+                    field = board.new_field(x, y)
+                    field.land_id = land_id_list[index_in_board]
+                    field.type = "land" if land_list[index_in_board] else "water"
+                    field.capital = -1
+                    field.estate = ""
+                    field.town_name = ""
+                    field.is_land = is_land_list[index_in_board]
+                    board.link_neighbors(field)
+                    index_in_board += 1
+        board.land_count = int(land.sum())
+        for members in self.land_groups[index]:
+            group = board.new_land_group()
+            for member in members.tolist():
+                group.append(board.get_field(member // y_max, member % y_max))
+            board.land_groups.append(group)
+        hex_map.random_seed = self.random_seeds[index]
+        hex_map.rand_draws = WARM_UP_DRAWS + x_max * y_max - len(board.capital_locations())
+        hex_map.stage = "generate_land_groups"
+        return hex_map
+
+def generate_terrain_batch(map_ids, x_max, y_max):
+    """
+    Runs the terrain stages of `HexMap.generate_terrain` (RNG warm-up,
+    `add_field`, `set_land_fields` and `generate_land_groups`) for many seeds
+    of the same size at once, as (seeds, x_max, y_max) NumPy arrays.
+
+    The results match the per-seed Python path exactly: the RNG draws come
+    from the LCG cycle table, the two `set_land_fields` passes are neighbor
+    reductions, and land groups are labelled by connected components and
+    ordered by a breadth-first search that keeps the scan and neighbor order
+    of `generate_land_groups`.
+
+    Args:
+        map_ids (list[int]): The seeds.
+        x_max (int): The maximum X-coordinate for the map (width).
+        y_max (int): The maximum Y-coordinate for the map (height).
+
+    Returns:
+        TerrainBatch: The terrain state of every seed.
+    """
+    _require_numpy()
+    map_ids = list(map_ids)
+    seeds = len(map_ids)
+    size = x_max * y_max
+    cycle, position = _lcg_cycle()
+    table = _neighbor_gather_table(x_max, y_max)
+
+    # add_field: one draw per field except the four capitals.
+    corners = _corner_mask(Board(x_max, y_max))
+    draws = int(size - corners.sum())
+    first_states = np.array([(map_id * LCG_MULTIPLIER + LCG_INCREMENT) % LCG_MODULUS for map_id in map_ids], dtype=np.int64)
+    start = position[first_states] + WARM_UP_DRAWS
+    states = cycle[(start[:, None] + np.arange(draws, dtype=np.int64)[None, :]) % LCG_MODULUS]
+    land = np.zeros((seeds, size), dtype=bool)
+    land[:, corners] = True
+    land[:, ~corners] = np.floor((states / LCG_MODULUS) * 10) <= 1
+    random_seeds = cycle[(start + draws - 1) % LCG_MODULUS].tolist()
+
+    # set_land_fields: water next to land becomes land, then water with no
+    # water neighbor. A field filled by the second pass has no water
+    # neighbors, so filling it cannot change the count of any other water
+    # field and the scan order does not matter.
+    is_land = ~land & _gather_neighbors(land, table).any(axis=2)
+    land = land | is_land
+    water = ~land
+    land = land | (water & ~_gather_neighbors(water, table).any(axis=2))
+
+    # generate_land_groups: label components by their first field in scan
+    # order, hooking the larger of two adjacent roots onto the smaller and
+    # compressing paths until no land edge joins two different roots.
+    flat_land = land.ravel()
+    cells = np.flatnonzero(flat_land)
+    base = (cells // size) * size
+    neighbors = table[cells % size]
+    u = np.repeat(cells, 6)
+    v = np.where(neighbors < size, neighbors + base[:, None], -1).ravel()
+    keep = v > u
+    u = u[keep]
+    v = v[keep]
+    keep = flat_land[v]
+    u = u[keep]
+    v = v[keep]
+    parent = np.arange(seeds * size, dtype=np.int64)
+    while True:
+        root_u = parent[u]
+        root_v = parent[v]
+        joined = root_u != root_v
+        if not joined.any():
+            break
+        parent[np.maximum(root_u[joined], root_v[joined])] = np.minimum(root_u[joined], root_v[joined])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    indexes = np.arange(size, dtype=np.int64)
+    rows = np.arange(seeds, dtype=np.int64)[:, None]
+    labels = np.where(land, parent.reshape(seeds, size) - rows * size, size)
+    roots = land & (labels == indexes[None, :])
+    group_of_root = np.cumsum(roots, axis=1) - 1
+    land_ids = np.where(land, group_of_root[rows, np.minimum(labels, size - 1)], -1).astype(np.int32)
+
+    # Breadth-first search from every root of every seed at once, one layer
+    # per step; keeping the first occurrence of each new field preserves the
+    # order in which `add_neighbors_to_land_group` appends them.
+    visited = roots.ravel().copy()
+    frontier = np.flatnonzero(roots.ravel())
+    layers = [frontier]
+    while frontier.size:
+        base = (frontier // size) * size
+        candidates = table[frontier % size]
+        candidates = np.where(candidates < size, candidates + base[:, None], -1).ravel()
+        candidates = candidates[candidates >= 0]
+        candidates = candidates[flat_land[candidates] & ~visited[candidates]]
+        _, first = np.unique(candidates, return_index=True)
+        frontier = candidates[np.sort(first)]
+        visited[frontier] = True
+        layers.append(frontier)
+    sequence = np.concatenate(layers)
+    seed_of = sequence // size
+    group_of = land_ids.ravel()[sequence].astype(np.int64)
+    sequence = sequence[np.lexsort((group_of, seed_of))]
+    seed_of = sequence // size
+    group_of = land_ids.ravel()[sequence]
+
+    land_groups = []
+    for seed_index in range(seeds):
+        lo, hi = np.searchsorted(seed_of, [seed_index, seed_index + 1])
+        members = sequence[lo:hi] - seed_index * size
+        groups = group_of[lo:hi]
+        bounds = np.flatnonzero(np.diff(groups)) + 1
+        land_groups.append(np.split(members, bounds) if members.size else [])
+
+    shape = (seeds, x_max, y_max)
+    return TerrainBatch(map_ids, x_max, y_max, land.reshape(shape), is_land.reshape(shape),
+                        land_ids.reshape(shape), land_groups, random_seeds)
+
+def generate_maps_batch(map_ids, x_max, y_max, path_engine="heap", board_backend="dict"):
+    """
+    Generates complete maps for many seeds of one size, running the terrain
+    stages with `generate_terrain_batch` and the town and port stages per
+    seed through `HexMap.generate_estates`.
+
+    Returns:
+        list[HexMap]: The generated maps, in the order of `map_ids`.
+    """
+    batch = generate_terrain_batch(map_ids, x_max, y_max)
+    hex_maps = []
+    for index in range(len(batch)):
+        hex_map = batch.to_hex_map(index, path_engine=path_engine, board_backend=board_backend)
+        hex_map.generate_estates(hex_map.board)
+        hex_maps.append(hex_map)
+    return hex_maps
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .__main__ import parse_seeds
+from .benchmark import parse_sizes
+from .compact import CompactGrid
+from .generator import STAGE_NAMES, TERRAIN_ENGINES, HexMap
+from .mapped import MappedBoard
+from .pathfinding import PATH_ENGINES
+from .rng import LCG_MODULUS
+
+# Bytes of BLAKE2b per map. Two different maps share a digest with
+# probability 2**-64, far below anything a full seed sweep can hit.
+DIGEST_SIZE = 8
+# Golden file layout: magic, x_max, y_max, map count, digest size, then the
+# map ids as uint32 in ascending order and one digest per map in that order.
+GOLDEN_MAGIC = b"HXD1"
+GOLDEN_HEADER = struct.Struct("<4sIIIB")
+
+def parse_engine(text):
+    """
+    Parses an engine spec "backend:path_engine[:terrain_engine]", e.g.
+    "flat:heap" or "dict:legacy:legacy", into a tuple of three names.
+    """
+    backend, _, rest = text.partition(":")
+    path_engine, _, terrain_engine = rest.partition(":")
+    terrain_engine = terrain_engine or "bitboard"
+    if (backend not in ("dict", "flat", "mapped") or path_engine not in PATH_ENGINES
+            or terrain_engine not in TERRAIN_ENGINES):
+        raise ValueError("engine must be dict|flat|mapped:heap|legacy[:bitboard|legacy], got " + repr(text))
+    return backend, path_engine, terrain_engine
+
+def _hex_map(map_id, x_max, y_max, engine):
+    """Creates a `HexMap` for an engine tuple; the terrain engine may be left out."""
+    terrain_engine = engine[2] if len(engine) > 2 else "bitboard"
+    return HexMap(map_id, x_max, y_max, path_engine=engine[1], board_backend=engine[0], terrain_engine=terrain_engine)
+
+def _close(hex_map):
+    """Releases the files of a `MappedBoard`."""
+    if isinstance(hex_map.board, MappedBoard):
+        hex_map.board.close()
+
+def map_digest(map_id, x_max, y_max, engine):
+    """
+    Generates one map and returns the digest of its `CompactGrid`. A map
+    that cannot be generated at this size digests the exception type, so
+    engines must fail the same way too.
+    """
+    hex_map = _hex_map(map_id, x_max, y_max, engine)
+    try:
+        hex_map.generate_map()
+        data = CompactGrid.from_board(hex_map.board).to_bytes()
+    except IndexError as error:
+        data = b"error:" + type(error).__name__.encode("ascii")
+    finally:
+        _close(hex_map)
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+def _digest_chunk(map_ids, x_max, y_max, engine):
+    """Worker entry point: the concatenated digests of a chunk of seeds."""
+    return b"".join(map_digest(map_id, x_max, y_max, engine) for map_id in map_ids)
+
+def compute_digests(map_ids, x_max, y_max, engine, workers=None, chunk_size=256):
+    """
+    Returns the digests of map_ids, in order, as one bytes object of
+    DIGEST_SIZE bytes per map. workers=0 runs in this process.
+    """
+    map_ids = list(map_ids)
+    chunks = [map_ids[start:start + chunk_size] for start in range(0, len(map_ids), chunk_size)]
+    if workers == 0:
+        return b"".join(_digest_chunk(chunk, x_max, y_max, engine) for chunk in chunks)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        return b"".join(executor.map(_digest_chunk, chunks, [x_max] * len(chunks), [y_max] * len(chunks),
+                                     [engine] * len(chunks)))
+
+def write_golden(path, x_max, y_max, map_ids, digests):
+    """Stores digests (as from `compute_digests`) of map_ids in a golden file."""
+    entries = sorted(zip(map_ids, (digests[i:i + DIGEST_SIZE] for i in range(0, len(digests), DIGEST_SIZE))))
+    with open(path, "wb") as stream:
+        stream.write(GOLDEN_HEADER.pack(GOLDEN_MAGIC, x_max, y_max, len(entries), DIGEST_SIZE))
+        stream.write(struct.pack("<%dI" % len(entries), *(map_id for map_id, _ in entries)))
+        stream.write(b"".join(digest for _, digest in entries))
+
+def read_golden(path):
+    """Returns (x_max, y_max, {map_id: digest}) from a golden file."""
+    with open(path, "rb") as stream:
+        data = stream.read()
+    magic, x_max, y_max, count, digest_size = GOLDEN_HEADER.unpack_from(data)
+    if magic != GOLDEN_MAGIC:
+        raise ValueError(path + " is not a golden digest file")
+    position = GOLDEN_HEADER.size
+    map_ids = struct.unpack_from("<%dI" % count, data, position)
+    position += 4 * count
+    digests = {map_id: data[position + i * digest_size:position + (i + 1) * digest_size]
+               for i, map_id in enumerate(map_ids)}
+    return x_max, y_max, digests
+
+def golden_path(directory, x_max, y_max):
+    return os.path.join(directory, "golden_%dx%d.hxd" % (x_max, y_max))
+
+def board_snapshot(board):
+    """
+    Returns the state every stage may change: per field (x, y) its type,
+    land id, estate, capital and town name, then the town order.
+    """
+    cells = {}
+    for x in range(board.x_max):
+        for y in range(board.y_max):
+            field = board.get_field(x, y)
+            if field is not None:
+                cells[(x, y)] = (field.type, field.land_id, field.estate, field.capital, field.town_name)
+    return cells, [(town.f_x, town.f_y) for town in board.towns]
+
+def first_difference(map_id, x_max, y_max, reference, candidate):
+    """
+    Regenerates a map with both engines stage by stage and returns where
+    they first diverge: a dict with the stage and either the first differing
+    field (with both values) or "towns" when only the town order differs.
+    Returns None if the two boards agree after every stage.
+    """
+    maps = [_hex_map(map_id, x_max, y_max, engine) for engine in (reference, candidate)]
+    try:
+        return _first_difference(maps)
+    finally:
+        for hex_map in maps:
+            _close(hex_map)
+
+def _first_difference(maps):
+    attributes = ("type", "land_id", "estate", "capital", "town_name")
+    for name in STAGE_NAMES:
+        errors = []
+        for hex_map in maps:
+            try:
+                hex_map.run_stages(name)
+                errors.append(None)
+            except IndexError as error:
+                errors.append(type(error).__name__)
+        if errors[0] != errors[1]:
+            return {"stage": name, "error": {"reference": errors[0], "candidate": errors[1]}}
+        if errors[0] is not None:
+            return None
+        expected, actual = (board_snapshot(hex_map.board) for hex_map in maps)
+        for location in sorted(set(expected[0]) | set(actual[0])):
+            a = expected[0].get(location)
+            b = actual[0].get(location)
+            if a != b:
+                if a is None or b is None:
+                    return {"stage": name, "cell": list(location), "attribute": "created",
+                            "reference": a is not None, "candidate": b is not None}
+                attribute = next(position for position in range(len(a)) if a[position] != b[position])
+                return {"stage": name, "cell": list(location), "attribute": attributes[attribute],
+                        "reference": a[attribute], "candidate": b[attribute]}
+        if expected[1] != actual[1]:
+            return {"stage": name, "towns": {"reference": expected[1], "candidate": actual[1]}}
+    return None
+
+def verify_size(x_max, y_max, map_ids, candidate, reference=("dict", "legacy", "legacy"), golden_dir=None,
+                workers=None, chunk_size=256, max_reports=10):
+    """
+    Compares the candidate engine's digests of map_ids against the golden
+    file of the size in golden_dir, creating it from the reference engine
+    for the seeds it lacks, or against a fresh reference run without
+    golden_dir. The first max_reports mismatches are traced to the stage
+    and field where they start.
+    """
+    started = time.perf_counter()
+    map_ids = sorted(set(map_ids))
+    golden = {}
+    path = golden_path(golden_dir, x_max, y_max) if golden_dir else None
+    if path and os.path.exists(path):
+        golden = read_golden(path)[2]
+    missing = [map_id for map_id in map_ids if map_id not in golden]
+    if missing:
+        digests = compute_digests(missing, x_max, y_max, reference, workers, chunk_size)
+        for position, map_id in enumerate(missing):
+            golden[map_id] = digests[position * DIGEST_SIZE:(position + 1) * DIGEST_SIZE]
+        if path:
+            write_golden(path, x_max, y_max, list(golden), b"".join(golden.values()))
+    actual = compute_digests(map_ids, x_max, y_max, candidate, workers, chunk_size)
+    mismatches = [map_id for position, map_id in enumerate(map_ids)
+                  if actual[position * DIGEST_SIZE:(position + 1) * DIGEST_SIZE] != golden[map_id]]
+    reports = []
+    for map_id in mismatches[:max_reports]:
+        report = {"map_id": map_id}
+        report.update(first_difference(map_id, x_max, y_max, reference, candidate)
+                      or {"stage": None, "note": "boards agree; the digests differ in encoding"})
+        reports.append(report)
+    return {
+        "x_max": x_max,
+        "y_max": y_max,
+        "checked": len(map_ids),
+        "reference_generated": len(missing),
+        "mismatches": len(mismatches),
+        "mismatched_seeds": mismatches[:1000],
+        "first_differences": reports,
+        "seconds": time.perf_counter() - started,
+    }
+
+def select_seeds(text, sample=None, sample_seed=0):
+    """
+    Returns the seeds to check: "all" for every canonical seed (0 to
+    LCG_MODULUS - 1) or a seed list as for `parse_seeds`, optionally cut
+    down to a random sample of the given size.
+    """
+    map_ids = list(range(LCG_MODULUS)) if text == "all" else parse_seeds(text)
+    if sample is not None and sample < len(map_ids):
+        map_ids = sorted(random.Random(sample_seed).sample(map_ids, sample))
+    return map_ids
+
+def build_parser():
+    """Returns the argument parser of the verifier."""
+    parser = argparse.ArgumentParser(
+        prog="python -m py_hexmap.verify",
+        description="Check that an engine generates the same maps as the reference, by per-map digests.")
+    parser.add_argument("--sizes", type=parse_sizes, default=[(20, 11)], help='board sizes (default: "20x11")')
+    parser.add_argument("--seeds", default="all", help='"all" canonical seeds or seeds and ranges (default: all)')
+    parser.add_argument("--sample", type=int, default=None, help="check a random sample of this many seeds")
+    parser.add_argument("--sample-seed", type=int, default=0, help="seed of the sample (default: 0)")
+    parser.add_argument("--engine", type=parse_engine, default=("flat", "heap", "bitboard"),
+                        help='engine under test, "backend:path_engine[:terrain_engine]" (default: flat:heap:bitboard)')
+    parser.add_argument("--reference", type=parse_engine, default=("dict", "legacy", "legacy"),
+                        help="engine the golden digests come from (default: dict:legacy:legacy)")
+    parser.add_argument("--golden-dir", default=None,
+                        help="directory of golden_<x>x<y>.hxd files, created or extended as needed")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processes (default: CPU count; 0 in-process)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="seeds per task (default: 256)")
+    return parser
+
+def main(argv=None):
+    """Runs the verification, prints the JSON report and returns 1 on any mismatch."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        map_ids = select_seeds(args.seeds, args.sample, args.sample_seed)
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+    results = []
+    for x_max, y_max in args.sizes:
+        result = verify_size(x_max, y_max, map_ids, args.engine, args.reference, args.golden_dir, args.workers,
+                             args.chunk_size)
+        print("%dx%d: %d seeds, %d mismatches, %.1f s" % (x_max, y_max, result["checked"], result["mismatches"],
+                                                         result["seconds"]), file=sys.stderr, flush=True)
+        results.append(result)
+    print(json.dumps({"engine": ":".join(args.engine), "reference": ":".join(args.reference), "sizes": results},
+                     indent=2))
+    return 1 if any(result["mismatches"] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import unittest
+import asyncio
+import threading
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import MapCache, generate_map_data
+from py_hexmap import aio
+from py_hexmap.aio import AsyncMapGenerator
+
+class TestAsyncMapGenerator(unittest.TestCase):
+    def test_coalescing(self):
+        async def run():
+            async with AsyncMapGenerator() as generator:
+                results = await asyncio.gather(*[generator.generate_map_data(map_id, 30, 20)
+                                                 for map_id in (10, 10, 10 + 233280, 10, 11)])
+                return results, generator.generated, generator.coalesced, generator.in_flight()
+        results, generated, coalesced, in_flight = asyncio.run(run())
+        self.assertEqual(results[:4], [generate_map_data(10, 30, 20)] * 4)
+        self.assertEqual(results[4], generate_map_data(11, 30, 20))
+        self.assertEqual((generated, coalesced, in_flight), (2, 3, 0))
+
+    def test_timeout_and_cancellation(self):
+        started = threading.Event()
+        release = threading.Event()
+        real_generate = aio._generate_grid
+
+        def slow_generate(*args):
+            started.set()
+            release.wait(5)
+            return real_generate(*args)
+
+        async def run():
+            generator = AsyncMapGenerator(max_concurrency=1, cache=MapCache())
+            try:
+                with self.assertRaises(TimeoutError):
+                    await generator.generate_map_data(10, 20, 11, timeout=0.01)
+                self.assertEqual(generator.in_flight(), 0)
+
+                first = asyncio.ensure_future(generator.generate_map_data(10, 20, 11))
+                second = asyncio.ensure_future(generator.generate_map_data(10, 20, 11))
+                await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+                first.cancel()
+                await asyncio.sleep(0)
+                self.assertEqual(generator.in_flight(), 1)
+                release.set()
+                self.assertEqual(await second, generate_map_data(10, 20, 11))
+                self.assertTrue(first.cancelled())
+                self.assertIsNotNone(generator.cache.get_grid(10, 20, 11))
+            finally:
+                release.set()
+                generator.close()
+
+        with mock.patch.object(aio, "_generate_grid", slow_generate):
+            asyncio.run(run())
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        active = [0, 0]
+        real_generate = aio._generate_grid
+
+        def counting_generate(*args):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            try:
+                return real_generate(*args)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                generator = AsyncMapGenerator(executor=executor, max_concurrency=2)
+                return await asyncio.gather(*[generator.generate_map_grid(map_id, 20, 11) for map_id in range(8)])
+
+        with mock.patch.object(aio, "_generate_grid", counting_generate):
+            grids = asyncio.run(run())
+        self.assertEqual([grid.to_matrix() for grid in grids], [generate_map_data(map_id, 20, 11) for map_id in range(8)])
+        self.assertLessEqual(active[1], 2)
+
+if __name__ == '__main__':
+    unittest.main()
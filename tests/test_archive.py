@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap, generate_map_data
+from py_hexmap import archive as archive_module
+from py_hexmap.archive import MapArchive, build_archive
+
+map_sample_list=[0,10,1000,123456,9999,99999,999999]
+
+class TestArchive(unittest.TestCase):
+    def test_build_resume_and_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "maps.hxa")
+            self.assertEqual(build_archive(path, 20, 11, map_sample_list[:4]), 4)
+            # Damage the last record; resuming rebuilds it and adds the rest.
+            with open(path, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"\xff")
+            self.assertEqual(build_archive(path, 20, 11, map_sample_list), 4)
+            with MapArchive(path) as archive:
+                self.assertEqual(archive.verify(), [])
+                self.assertNotIn(1, archive)
+                for map_id in map_sample_list:
+                    archived = archive.get(map_id + 233280, verify=True)
+                    self.assertEqual(archived.to_matrix(), generate_map_data(map_id, 20, 11))
+                    hex_map = HexMap(map_id, 20, 11)
+                    hex_map.generate_map()
+                    board = hex_map.board
+                    self.assertEqual(archived.land_ids.tolist(),
+                                     [board.get_field(x, y).land_id for x in range(20) for y in range(11)])
+                    self.assertEqual(archived.land_group_count, len(board.land_groups))
+                    del archived
+
+    def test_land_ids_are_little_endian(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "maps.hxa")
+            build_archive(path, 20, 11, [1000])
+            with MapArchive(path) as archive:
+                expected = archive.get(1000).land_ids.tolist()
+                if sys.byteorder == "little":
+                    # Claiming a big-endian host makes the reader swap bytes
+                    # this host did not need swapped; swapping back restores them.
+                    with mock.patch.object(archive_module.sys, "byteorder", "big"):
+                        swapped = archive.get(1000).land_ids
+                    swapped.byteswap()
+                    self.assertEqual(swapped.tolist(), expected)
+                self.assertIn(-1, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import generate_map_data, generate_map_data_batch
+
+map_sample_list=[0,10,1000,123456,9999,99999,999999]
+
+class TestBatch(unittest.TestCase):
+    def test_batch_matches_generate_map_data(self):
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                results = dict(generate_map_data_batch(map_sample_list, 20, 11, workers=workers, chunk_size=3))
+                self.assertEqual(sorted(results), sorted(map_sample_list))
+                for map_id in map_sample_list:
+                    self.assertEqual(results[map_id], generate_map_data(map_id, 20, 11))
+
+if __name__ == '__main__':
+    unittest.main()
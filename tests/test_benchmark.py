@@ -0,0 +1,39 @@
+import unittest
+import io
+import json
+import sys
+import os
+from contextlib import redirect_stderr
+from unittest import mock
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import benchmark
+from py_hexmap.generator import STAGE_NAMES
+
+class TestBenchmark(unittest.TestCase):
+    def test_report(self):
+        report = benchmark.run_benchmark(((20, 11), (60, 60)), repeat=1, golden=False)
+        self.assertEqual([result["cells"] for result in report["sizes"]], [220, 3600])
+        small, large = report["sizes"]
+        self.assertEqual([stage["stage"] for stage in small["stages"]], list(benchmark.STAGE_NAMES))
+        self.assertEqual(benchmark.STAGE_NAMES[:-1], STAGE_NAMES)
+        self.assertTrue(all(stage["min_seconds"] >= 0 and "peak_bytes" in stage for stage in small["stages"]))
+        self.assertGreater(small["peak_bytes"], 0)
+        # 60x60 needs more towns than there are names.
+        outcomes = {stage["stage"]: stage for stage in large["stages"]}
+        self.assertIn("IndexError", outcomes["generate_towns"]["error"])
+        self.assertTrue(outcomes["generate_ports"]["skipped"])
+        self.assertIn("set_land_fields", report["scaling"])
+        self.assertNotIn("generate_ports", report["scaling"])
+        json.dumps(report)
+
+    def test_golden_gate(self):
+        with redirect_stderr(io.StringIO()), mock.patch("sys.stdout", io.StringIO()):
+            self.assertEqual(benchmark.main(["--sizes", "20x11", "--repeat", "1", "--no-memory"]), 0)
+            with mock.patch.dict(benchmark.GOLDEN_DIGESTS[(20, 11)], {0: "0" * 64}):
+                self.assertEqual(benchmark.main(["--sizes", "20x11", "--repeat", "1", "--no-memory"]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap
+from py_hexmap.bitboard import TownSites, iter_bits, neighbor_union
+from py_hexmap.board import get_neighbor_table
+from py_hexmap.utils import board_to_matrix_representation
+
+class TestBitboard(unittest.TestCase):
+    def test_neighbor_union(self):
+        rng = random.Random(0)
+        for x_max, y_max in ((1, 1), (2, 5), (7, 3), (16, 70)):
+            table = get_neighbor_table(x_max, y_max)
+            columns = [rng.getrandbits(y_max) for _ in range(x_max)]
+            union = neighbor_union(columns, y_max)
+            for x in range(x_max):
+                for y in range(y_max):
+                    index = x * y_max + y
+                    expected = any(neighbor >= 0 and columns[neighbor // y_max] >> (neighbor % y_max) & 1
+                                   for neighbor in table[index * 6:index * 6 + 6])
+                    self.assertEqual(bool(union[x] >> y & 1), expected, (x_max, y_max, x, y))
+        self.assertEqual(list(iter_bits(0b101001)), [0, 3, 5])
+
+    def test_town_sites(self):
+        hex_map = HexMap(10, 30, 20, board_backend="flat")
+        board = hex_map.board
+        hex_map.generate_terrain(board)
+        hex_map.generate_party_capitals(board)
+        sites = TownSites(board)
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                field = board.get_field(x, y)
+                expected = all(neighbor is None or (neighbor.type != "water" and neighbor.estate == "")
+                               for neighbor in (board.get_neighbor_field(field, n) for n in range(6)))
+                self.assertEqual(sites.is_clear(x, y), expected, (x, y))
+
+    def test_same_maps(self):
+        for backend in ("dict", "flat"):
+            for map_id in (0, 10, 1000, 123456):
+                for x_max, y_max in ((20, 11), (45, 40), (7, 9)):
+                    with self.subTest(backend=backend, map_id=map_id, size=(x_max, y_max)):
+                        maps = [HexMap(map_id, x_max, y_max, board_backend=backend, terrain_engine=engine)
+                                for engine in ("legacy", "bitboard")]
+                        for hex_map in maps:
+                            hex_map.generate_map()
+                        boards = [hex_map.board for hex_map in maps]
+                        self.assertEqual(*(board_to_matrix_representation(board) for board in boards))
+                        self.assertEqual(*([(field.is_land, field.land_id) for field in board.fields.values()]
+                                           for board in boards))
+                        self.assertEqual(maps[0].random_seed, maps[1].random_seed)
+        with self.assertRaises(ValueError):
+            HexMap(0, 20, 11, terrain_engine="numpy")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import MapCache, generate_map_data
+
+class TestCache(unittest.TestCase):
+    def test_equivalent_seeds_share_an_entry(self):
+        cache = MapCache(max_entries=2)
+        first = generate_map_data(10, 20, 11, cache=cache)
+        second = generate_map_data(10 + 233280, 20, 11, cache=cache)
+        self.assertEqual(first, generate_map_data(10, 20, 11))
+        self.assertEqual(second, first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = MapCache(max_entries=2)
+        for map_id in (0, 1, 0, 2):
+            generate_map_data(map_id, 20, 11, cache=cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get(1, 20, 11))
+        self.assertIsNotNone(cache.get(0, 20, 11))
+        self.assertEqual(cache.invalidate(map_id=0), 1)
+        self.assertEqual(len(cache), 1)
+
+if __name__ == '__main__':
+    unittest.main()
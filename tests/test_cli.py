@@ -0,0 +1,61 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tempfile
+from argparse import ArgumentTypeError
+from contextlib import redirect_stderr, redirect_stdout
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, generate_map_data
+from py_hexmap.__main__ import RECORD_HEADER, main, parse_seeds
+
+class TestCli(unittest.TestCase):
+    def test_parse_seeds(self):
+        self.assertEqual(parse_seeds("0-3,10, 7"), [0, 1, 2, 3, 10, 7])
+        for text in ("1-x", "abc", "5-2"):
+            self.assertRaises(ArgumentTypeError, parse_seeds, text)
+
+    def test_bad_seeds_are_usage_errors(self):
+        errors = io.StringIO()
+        with redirect_stderr(errors), self.assertRaises(SystemExit) as raised:
+            main(["0-x"])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("invalid seed or range", errors.getvalue())
+
+    def test_stdout(self):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            main(["0-1", "-f", "binary", "--buffer-size", "64"])
+        data = stdout.buffer.getvalue()
+        self.assertFalse(stdout.closed)
+        (map_id,) = RECORD_HEADER.unpack_from(data, 0)
+        grid = CompactGrid.from_bytes(data[RECORD_HEADER.size:])
+        self.assertEqual((map_id, grid.to_matrix()), (0, generate_map_data(0, 20, 11)))
+
+    def test_export_formats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ndjson_path = os.path.join(directory, "maps.ndjson")
+            binary_path = os.path.join(directory, "maps.bin")
+            with redirect_stderr(io.StringIO()):
+                main(["0-2,1000", "-o", ndjson_path])
+                main(["0-2,1000", "-o", binary_path, "-f", "binary"])
+            with open(ndjson_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([record["map_id"] for record in records], [0, 1, 2, 1000])
+            for record in records:
+                self.assertEqual(record["map"], generate_map_data(record["map_id"], 20, 11))
+            with open(binary_path, "rb") as f:
+                data = f.read()
+            offset = 0
+            for record in records:
+                (map_id,) = RECORD_HEADER.unpack_from(data, offset)
+                grid = CompactGrid.from_bytes(data[offset + RECORD_HEADER.size:])
+                self.assertEqual((map_id, grid.to_matrix()), (record["map_id"], record["map"]))
+                offset += RECORD_HEADER.size + len(bytes(grid))
+
+if __name__ == '__main__':
+    unittest.main()
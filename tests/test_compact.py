@@ -0,0 +1,28 @@
+import unittest
+import io
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, generate_map_data, generate_map_grid
+
+map_sample_list=[0,10,1000,123456,9999,99999,999999]
+
+class TestCompact(unittest.TestCase):
+    def test_grid_round_trips(self):
+        for map_id in map_sample_list:
+            with self.subTest(map_id=map_id):
+                matrix = generate_map_data(map_id, 30, 20)
+                grid = generate_map_grid(map_id, 30, 20)
+                self.assertEqual(generate_map_grid(map_id, 30, 20, board_backend="flat"), grid)
+                self.assertEqual(grid.to_matrix(), matrix)
+                self.assertEqual(CompactGrid.from_matrix(matrix), grid)
+                stream = io.BytesIO()
+                grid.write(stream)
+                self.assertEqual(stream.getvalue(), bytes(grid))
+                self.assertEqual(CompactGrid.from_bytes(stream.getvalue()).to_matrix(), matrix)
+
+if __name__ == '__main__':
+    unittest.main()
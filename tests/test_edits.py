@@ -0,0 +1,227 @@
+import unittest
+import random
+import sys
+import os
+from unittest import mock
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap
+from py_hexmap.board import get_neighbor_table
+from py_hexmap.compact import CompactGrid
+from py_hexmap.flat_board import LandGroup
+from py_hexmap.ports import place_ports
+
+def land_components(board):
+    """Returns the land components of a board as a set of frozensets of (x, y), found from scratch."""
+    table = get_neighbor_table(board.x_max, board.y_max)
+    land = {x * board.y_max + y for x in range(board.x_max) for y in range(board.y_max)
+            if board.get_field(x, y).type == "land"}
+    components = set()
+    seen = set()
+    for start in land:
+        if start in seen:
+            continue
+        seen.add(start)
+        stack = [start]
+        component = []
+        while stack:
+            index = stack.pop()
+            component.append((index // board.y_max, index % board.y_max))
+            for neighbor in table[index * 6:index * 6 + 6]:
+                if neighbor in land and neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        components.add(frozenset(component))
+    return components
+
+class TestBoardEditor(unittest.TestCase):
+    def assert_consistent(self, board):
+        groups = set()
+        for land_id, group in enumerate(board.land_groups):
+            members = [(field.f_x, field.f_y) for field in group]
+            self.assertEqual(len(members), len(set(members)))
+            for field in group:
+                self.assertEqual(field.type, "land")
+                self.assertEqual(field.land_id, land_id)
+            if members:
+                groups.add(frozenset(members))
+        self.assertEqual(groups, land_components(board))
+        self.assertEqual(board.land_count, sum(len(group) for group in groups))
+
+        editor = board.editor()
+        for (start, end), (path, ports, _) in editor.routes.items():
+            if path is None:
+                continue
+            self.assertEqual(editor._index(path[0]), start)
+            self.assertEqual(editor._index(path[-1]), end)
+            for field in path[1:-1]:
+                self.assertNotEqual(field.estate, "town")
+        supported = set(editor.port_support)
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                field = board.get_field(x, y)
+                if field.estate == "port":
+                    self.assertEqual(field.type, "land")
+                index = x * board.y_max + y
+                if index in supported:
+                    self.assertEqual(field.estate, "port")
+        self.assertEqual([field.estate for field in board.towns], ["town"] * len(board.towns))
+        pairs = [(editor._index(a), editor._index(b)) for a, b in zip(board.towns, board.towns[1:])]
+        self.assertEqual(sorted(pairs), sorted(editor.routes))
+
+    def test_random_edits(self):
+        for backend in ("dict", "flat"):
+            for map_id in (0, 10, 1000):
+                with self.subTest(backend=backend, map_id=map_id):
+                    hex_map = HexMap(map_id, 30, 20, board_backend=backend)
+                    hex_map.generate_map()
+                    board = hex_map.board
+                    self.assert_consistent(board)
+                    rng = random.Random(map_id)
+                    for _ in range(300):
+                        x = rng.randrange(board.x_max)
+                        y = rng.randrange(board.y_max)
+                        field = board.get_field(x, y)
+                        choice = rng.random()
+                        if choice < 0.8:
+                            if field.estate == "town":
+                                continue
+                            board.set_terrain(x, y, "water" if field.type == "land" else "land")
+                        elif field.type == "land":
+                            estate = rng.choice(("", "town", "port"))
+                            board.set_estate(x, y, estate, "Edited" if estate == "town" else "")
+                    self.assert_consistent(board)
+
+    def test_split_and_join(self):
+        hex_map = HexMap(0, 20, 11, board_backend="flat")
+        hex_map.generate_map()
+        board = hex_map.board
+        # Flood a full column: every land group crossing it splits.
+        for y in range(board.y_max):
+            field = board.get_field(10, y)
+            if field.estate == "town":
+                board.set_estate(10, y, "")
+            board.set_terrain(10, y, "water")
+        self.assert_consistent(board)
+        # A land bridge across the whole board joins everything it touches.
+        for x in range(board.x_max):
+            board.set_terrain(x, 5, "land")
+        self.assert_consistent(board)
+        self.assertEqual(board.get_field(0, 5).land_id, board.get_field(board.x_max - 1, 5).land_id)
+
+    def test_towns_and_ports(self):
+        hex_map = HexMap(10, 20, 11)
+        hex_map.generate_map()
+        board = hex_map.board
+        editor = board.editor()
+        town = board.towns[1]
+        capital = town.capital
+        board.set_estate(town.f_x, town.f_y, "")
+        self.assertNotIn(town, board.towns)
+        self.assertEqual(town.town_name, "")
+        if capital != -1:
+            self.assertIsNone(board.parties_capitals[capital])
+        self.assert_consistent(board)
+
+        with self.assertRaises(ValueError):
+            board.set_terrain(board.towns[0].f_x, board.towns[0].f_y, "water")
+        with self.assertRaises(ValueError):
+            board.set_terrain(0, 0, "rock")
+        water = next(field for field in board.fields.values() if field.type == "water")
+        with self.assertRaises(ValueError):
+            board.set_estate(water.f_x, water.f_y, "port")
+
+        ports = list(editor.port_support)
+        if ports:
+            index = ports[0]
+            board.set_terrain(index // board.y_max, index % board.y_max, "water")
+            self.assertNotEqual(board.get_field(index // board.y_max, index % board.y_max).estate, "port")
+            self.assert_consistent(board)
+
+    def test_routes_found_again(self):
+        for board_backend in ("dict", "flat"):
+            with self.subTest(board_backend=board_backend):
+                hex_map = HexMap(1000, 45, 40, board_backend=board_backend)
+                hex_map.run_stages("shuffle")
+                routes = []
+                place_ports(hex_map.board, hex_map.pathfinder, routes=routes)
+                board = hex_map.board
+                grid = CompactGrid.from_board(board).to_bytes()
+                editor = board.editor()
+                self.assertEqual(CompactGrid.from_board(board).to_bytes(), grid)
+                self.assertEqual(editor.routes_searched, 0)
+                for start, end, path in routes:
+                    found = editor.routes[(editor._index(start), editor._index(end))][0]
+                    self.assertEqual(None if found is None else [editor._index(field) for field in found],
+                                     None if path is None else [editor._index(field) for field in path])
+
+    def test_removed_town_retries_only_blocked_routes(self):
+        hex_map = HexMap(0, 20, 11, board_backend="flat")
+        hex_map.generate_map()
+        board = hex_map.board
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                board.set_estate(x, y, "")
+                board.set_terrain(x, y, "land")
+        table = get_neighbor_table(board.x_max, board.y_max)
+
+        def ring(x, y):
+            index = x * board.y_max + y
+            return [divmod(neighbor, board.y_max) for neighbor in table[index * 6:index * 6 + 6]]
+
+        # A town walled in by its own ring, then a second walled-in town
+        # that a town outside cannot reach.
+        for x, y in ring(4, 5) + [(4, 5)] + ring(12, 5) + [(17, 5), (12, 5)]:
+            board.set_estate(x, y, "town")
+        editor = board.editor()
+        key = (17 * board.y_max + 5, 12 * board.y_max + 5)
+        route = editor.routes[key]
+        self.assertIsNone(route[0])
+        self.assertNotIn(4 * board.y_max + 5, editor.failed[key])
+        board.set_estate(4, 5, "")
+        self.assertIs(editor.routes[key], route)
+        board.set_estate(*ring(12, 5)[0], "")
+        self.assertIsNotNone(editor.routes[key][0])
+        self.assertEqual(editor.failed_cells, {})
+        self.assert_consistent(board)
+
+    def test_split_work_follows_smaller_piece(self):
+        hex_map = HexMap(0, 40, 40, board_backend="flat")
+        hex_map.generate_map()
+        board = hex_map.board
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                field = board.get_field(x, y)
+                if field.estate:
+                    board.set_estate(x, y, "")
+                board.set_terrain(x, y, "land")
+        # A one-field peninsula: cutting it off visits a few fields, not the board.
+        board.set_terrain(0, 1, "water")
+        board.set_terrain(1, 0, "water")
+        board.set_terrain(1, 1, "water")
+        editor = board.editor()
+        visited = editor.fields_visited
+        # Leaving the big group must not scan it: no remove, and only the
+        # one-field island is iterated when the peninsula joins it.
+        iterated = []
+        iterate = LandGroup.__iter__
+
+        def counting_iter(group):
+            iterated.append(len(group))
+            return iterate(group)
+
+        with mock.patch.object(LandGroup, "remove", side_effect=AssertionError("group scanned")), \
+                mock.patch.object(LandGroup, "__iter__", counting_iter):
+            board.set_terrain(0, 1, "land")
+            board.set_terrain(0, 1, "water")
+            # A field in the middle: its neighbors stay one piece.
+            board.set_terrain(20, 20, "water")
+            board.set_terrain(20, 20, "land")
+        self.assertEqual(iterated, [1])
+        self.assertLess(editor.fields_visited - visited, 40)
+        self.assert_consistent(board)
+
+if __name__ == '__main__':
+    unittest.main()
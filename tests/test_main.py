@@ -6,7 +6,8 @@ import os
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from py_hexmap import generate_map_data
+from py_hexmap import HexMap, generate_map_data
+from py_hexmap.utils import fields_to_matrix_representation
 
 # A list of sample map IDs used for testing purposes.
 # This ensures that the map generation logic is tested against a variety of seeds.
@@ -31,14 +32,46 @@ class TestMain(unittest.TestCase):
                 # Compare the generated map data with the expected map data
                 self.assertEqual(generated_map_data, expected_map_data)
 
+    def test_flat_board_matches(self):
+        for map_id in map_sample_list:
+            with self.subTest(map_id=map_id):
+                self.assertEqual(generate_map_data(map_id, 30, 20, board_backend="flat"),
+                                 generate_map_data(map_id, 30, 20))
+
+    def test_flat_land_groups_match(self):
+        for map_id in map_sample_list:
+            with self.subTest(map_id=map_id):
+                groups = []
+                for group_land in (lambda hex_map, board: hex_map.generate_land_groups(board),
+                                   lambda hex_map, board: hex_map.group_land_fields(board)):
+                    hex_map = HexMap(map_id, 30, 20, board_backend="flat")
+                    hex_map.run_stages("set_land_fields")
+                    group_land(hex_map, hex_map.board)
+                    groups.append((hex_map.board.land_count, [list(group.indexes) for group in hex_map.board.land_groups],
+                                   list(hex_map.board.land_id)))
+                self.assertEqual(groups[0], groups[1])
+
+    def test_path_engines_match(self):
+        for map_id in map_sample_list:
+            with self.subTest(map_id=map_id):
+                outputs = []
+                for engine in ("legacy", "heap"):
+                    hex_map = HexMap(map_id, 30, 20, path_engine=engine)
+                    hex_map.generate_map()
+                    outputs.append(fields_to_matrix_representation(hex_map.board.fields, 30, 20))
+                self.assertEqual(outputs[0], outputs[1])
+
 if __name__ == '__main__':
-    # Regenerate test data with default dimensions
-    default_x_max = 20
-    default_y_max = 11
-    for map_id in map_sample_list:
-        file_path = os.path.join(os.path.dirname(__file__), f"{map_id}.json")
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(generate_map_data(map_id, default_x_max, default_y_max), f, indent=4)
+    # Regenerate test data with default dimensions, only when asked to;
+    # otherwise the expected maps would always match whatever the code does.
+    if "--regenerate" in sys.argv:
+        sys.argv.remove("--regenerate")
+        default_x_max = 20
+        default_y_max = 11
+        for map_id in map_sample_list:
+            file_path = os.path.join(os.path.dirname(__file__), f"{map_id}.json")
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(generate_map_data(map_id, default_x_max, default_y_max), f, indent=4)
 
     # Run tests
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, HexMap
+from py_hexmap.bitboard import expand_land
+from py_hexmap.flat_board import FlatBoard
+from py_hexmap.mapped import CELL_ARRAYS, MappedBoard
+
+class TestMappedBoard(unittest.TestCase):
+    def generate(self, map_id, x_max, y_max, **kwargs):
+        hex_map = HexMap(map_id, x_max, y_max, **kwargs)
+        hex_map.generate_map()
+        if isinstance(hex_map.board, MappedBoard):
+            self.addCleanup(hex_map.board.close)
+        return hex_map
+
+    def test_same_maps_as_flat_board(self):
+        for map_id in (0, 10, 1000, 123456):
+            for x_max, y_max in ((20, 11), (45, 40), (3, 3)):
+                expected = self.generate(map_id, x_max, y_max, board_backend="flat")
+                # A tiny budget forces one-column strips.
+                for budget in (1, 10 ** 8):
+                    with self.subTest(map_id=map_id, size=(x_max, y_max), budget=budget):
+                        actual = self.generate(map_id, x_max, y_max, board_backend="mapped",
+                                               board_options={"memory_budget": budget})
+                        self.assertEqual(CompactGrid.from_board(actual.board).to_bytes(),
+                                         CompactGrid.from_board(expected.board).to_bytes())
+                        self.assertEqual(actual.rand_draws, expected.rand_draws)
+                        self.assertEqual([[field.index for field in group] for group in actual.board.land_groups],
+                                         [list(group.indexes) for group in expected.board.land_groups])
+
+    def test_expand_land_strips(self):
+        rng = random.Random(0)
+        for x_max, y_max in ((1, 4), (7, 5), (16, 9)):
+            terrain = bytes(rng.choice((1, 2, 2, 2)) for _ in range(x_max * y_max))
+            results = []
+            for strip_columns in (None, 1, 2, 3):
+                board = FlatBoard(x_max, y_max)
+                board.created[:] = b"\x01" * len(terrain)
+                board.terrain[:] = terrain
+                expand_land(board, strip_columns)
+                results.append((bytes(board.terrain), bytes(board.is_land)))
+            self.assertEqual(results, [results[0]] * 4, (x_max, y_max))
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with MappedBoard(6, 4, directory=directory, memory_budget=32) as board:
+                self.assertEqual(board.strip_columns, 2)
+                self.assertEqual(sorted(os.listdir(directory)), sorted(name + ".bin" for name in CELL_ARRAYS))
+                self.assertEqual(os.path.getsize(os.path.join(directory, "land_id.bin")), 4 * 24)
+                self.assertRaises(TypeError, board.editor)
+            # A directory given by the caller is kept.
+            self.assertTrue(os.path.exists(os.path.join(directory, "terrain.bin")))
+        board = MappedBoard(6, 4)
+        board.close()
+        self.assertFalse(os.path.exists(board.directory))
+
+    def test_land_groups(self):
+        board = self.generate(1000, 20, 11, board_backend="mapped").board
+        groups = board.land_groups
+        self.assertEqual(sum(len(group) for group in groups), board.land_count)
+        for number, group in enumerate(groups):
+            self.assertTrue(all(field.land_id == number for field in group))
+            self.assertEqual(group[-1], list(group)[-1])
+        self.assertRaises(IndexError, groups.__getitem__, len(groups))
+        self.assertRaises(ValueError, groups[0].append, groups[1][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap
+from py_hexmap.pathfinding import Pathfinder
+from py_hexmap.ports import PortRouter
+
+class TestPortRouter(unittest.TestCase):
+    def test_matches_pathfinder(self):
+        pathfinder = Pathfinder("legacy")
+        for map_id in (0, 10, 1000):
+            with self.subTest(map_id=map_id):
+                hex_map = HexMap(map_id, 30, 20)
+                board = hex_map.board
+                hex_map.generate_terrain(board)
+                hex_map.generate_party_capitals(board)
+                hex_map.generate_towns(board)
+                router = PortRouter(board)
+                fields = [board.get_field(x, y) for x in range(30) for y in range(20)]
+                rng = random.Random(map_id)
+                for step in range(300):
+                    start, end = rng.choice(board.towns), rng.choice(board.towns + fields)
+                    avoid_water = step % 2 == 0
+                    expected = pathfinder.find_path(board, start, end, ["town"], avoid_water)
+                    self.assertEqual(router.find_path(start, end, avoid_water), expected)
+                    if expected is not None:
+                        self.assertGreaterEqual(len(expected), router.min_path_length(start, end))
+                    if step % 10 == 0:
+                        field = rng.choice(fields)
+                        if field.type == "land" and field.estate == "":
+                            field.estate = "port"
+                            router.add_port(field)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap, PathQueryEngine
+from py_hexmap.board import NEIGHBOR_OFFSETS
+from py_hexmap.pathfinding import Pathfinder
+from py_hexmap.query import hex_distance
+
+def generated_board(map_id, x_max, y_max, backend="dict"):
+    hex_map = HexMap(map_id, x_max, y_max, board_backend=backend)
+    hex_map.generate_map()
+    return hex_map.board
+
+def all_fields(board):
+    return [board.get_field(x, y) for x in range(board.x_max) for y in range(board.y_max)]
+
+class TestPathQueryEngine(unittest.TestCase):
+    def test_exact_paths_match_pathfinder(self):
+        pathfinder = Pathfinder()
+        for backend in ("dict", "flat"):
+            board = generated_board(10, 30, 20, backend)
+            engine = PathQueryEngine(board)
+            fields = all_fields(board)
+            rng = random.Random(1)
+            for _ in range(150):
+                start, end = rng.choice(fields), rng.choice(fields)
+                for avoid_water in (True, False):
+                    with self.subTest(backend=backend, start=(start.f_x, start.f_y), end=(end.f_x, end.f_y),
+                                      avoid_water=avoid_water):
+                        expected = pathfinder.find_path(board, start, end, ["town"], avoid_water)
+                        self.assertEqual(engine.find_path(start, end, avoid_water), expected)
+
+    def test_distances(self):
+        board = generated_board(1000, 24, 18)
+        engine = PathQueryEngine(board)
+        pathfinder = Pathfinder()
+        fields = all_fields(board)
+        rng = random.Random(2)
+        for avoid_water in (True, False):
+            for _ in range(6):
+                source = rng.choice(fields)
+                distances = engine.distance_map(source, avoid_water)
+                towards = engine.distance_map_to(source, avoid_water)
+                for field in rng.sample(fields, 40):
+                    index = field.f_x * board.y_max + field.f_y
+                    shortest = engine.find_path(source, field, avoid_water, exact=False)
+                    self.assertEqual(distances[index], -1 if shortest is None else len(shortest) - 1)
+                    exact = pathfinder.find_path(board, source, field, ["town"], avoid_water)
+                    self.assertEqual(shortest is None, exact is None)
+                    if shortest is not None:
+                        self.assertGreaterEqual(len(shortest) - 1, hex_distance(source, field))
+                        self.assertLessEqual(len(shortest), len(exact))
+                    back = engine.find_path(field, source, avoid_water, exact=False)
+                    self.assertEqual(towards[index], -1 if back is None else len(back) - 1)
+
+    def test_batches_and_cache(self):
+        board = generated_board(0, 20, 11)
+        engine = PathQueryEngine(board)
+        start = board.towns[0]
+        pairs = [(start, town) for town in board.towns] + [(board.towns[1], board.towns[2])]
+        paths = engine.find_paths(pairs, False, exact=False)
+        for (a, b), path in zip(pairs, paths):
+            single = engine.find_path(a, b, False, exact=False)
+            self.assertEqual(path is None, single is None)
+            if path is not None:
+                self.assertEqual(len(path), len(single))
+                self.assertEqual((path[0], path[-1]), (a, b))
+                for step, following in zip(path, path[1:]):
+                    self.assertEqual(hex_distance(step, following), 1)
+                for field in path[1:-1]:
+                    self.assertNotEqual(field.estate, "town")
+        self.assertEqual(engine.find_paths(pairs, True), [engine.find_path(a, b, True) for a, b in pairs])
+        searches = engine.searches
+        engine.find_path(board.towns[0], board.towns[1], True)
+        self.assertEqual(engine.searches, searches)
+        self.assertGreater(engine.cache_hits, 0)
+
+    def test_board_edits_invalidate(self):
+        board = generated_board(0, 20, 11)
+        engine = PathQueryEngine(board)
+        a, b = board.towns[0], board.towns[1]
+        before = engine.find_path(a, b, True)
+        middle = before[len(before) // 2]
+        board.set_estate(middle.f_x, middle.f_y, "")
+        board.set_terrain(middle.f_x, middle.f_y, "water" if middle.type == "land" else "land")
+        self.assertEqual(engine.find_path(a, b, True), Pathfinder().find_path(board, a, b, ["town"], True))
+
+    def test_opposite_neighbors(self):
+        # distance_map_to relies on neighbor k seeing the field as neighbor (k + 3) % 6.
+        for parity in (0, 1):
+            for k, (dx, dy) in enumerate(NEIGHBOR_OFFSETS[parity]):
+                back = NEIGHBOR_OFFSETS[(parity + dx) % 2][(k + 3) % 6]
+                self.assertEqual((back[0] + dx, back[1] + dy), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import struct
+import sys
+import os
+import zlib
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, HexMap, generate_map_grid
+from py_hexmap.render import PALETTE, Rasterizer, encode_png, render_board, render_thumbnails
+
+def decode_png(data):
+    """Returns (width, height, rgb) of an unfiltered 8-bit RGB PNG."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    position = 8
+    chunks = {}
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks[kind] = chunks.get(kind, b"") + body
+        position += 12 + length
+    width, height, depth, color_type, _, _, _ = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    assert (depth, color_type) == (8, 2)
+    raw = zlib.decompress(chunks[b"IDAT"])
+    stride = width * 3 + 1
+    rgb = bytearray()
+    for row in range(height):
+        assert raw[row * stride] == 0
+        rgb += raw[row * stride + 1:(row + 1) * stride]
+    return width, height, bytes(rgb)
+
+class TestRender(unittest.TestCase):
+    def test_hex_centers(self):
+        hex_map = HexMap(10, 20, 11)
+        hex_map.generate_map()
+        board = hex_map.board
+        # At one pixel per board pixel, the centre of every hex shows its field.
+        rasterizer = Rasterizer(20, 11, 19 * 36 + 50, 11 * 40 + 20)
+        rgb = rasterizer.render(CompactGrid.from_board(board))
+        self.assertEqual(len(rgb), rasterizer.width * rasterizer.height * 3)
+        for x in range(board.x_max):
+            for y in range(board.y_max):
+                field = board.get_field(x, y)
+                position = (field.y * rasterizer.width + field.x) * 3
+                if field.type == "water":
+                    name = "water"
+                elif field.estate in ("town", "port"):
+                    name = field.estate
+                else:
+                    name = "land"
+                self.assertEqual(tuple(rgb[position:position + 3]), PALETTE[name], (x, y))
+        self.assertEqual(tuple(rgb[0:3]), PALETTE["background"])
+
+    def test_png(self):
+        grid = generate_map_grid(0, 20, 11)
+        rasterizer = Rasterizer(20, 11, 97)
+        self.assertEqual(rasterizer.height, round(97 * 460 / 734))
+        width, height, rgb = decode_png(rasterizer.render_png(grid, palette={"water": (1, 2, 3)}))
+        self.assertEqual((width, height), (97, rasterizer.height))
+        self.assertEqual(rgb, bytes(rasterizer.render(grid, palette={"water": (1, 2, 3)})))
+        self.assertIn(bytes((1, 2, 3)), rgb)
+        self.assertEqual(decode_png(encode_png(2, 1, b"\x01\x02\x03\x04\x05\x06")), (2, 1, b"\x01\x02\x03\x04\x05\x06"))
+        with self.assertRaises(ValueError):
+            rasterizer.render(generate_map_grid(0, 30, 20))
+
+    def test_batch(self):
+        hex_map = HexMap(5, 20, 11, board_backend="flat")
+        hex_map.generate_map()
+        thumbnails = dict(render_thumbnails(range(3, 8), 20, 11, 64, 40))
+        self.assertEqual(sorted(thumbnails), [3, 4, 5, 6, 7])
+        self.assertEqual(thumbnails[5], render_board(hex_map.board, 64, 40))
+        self.assertEqual(decode_png(thumbnails[3])[:2], (64, 40))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap
+from py_hexmap.rng import draw_block, draws_between, jump_state
+
+class TestRng(unittest.TestCase):
+    def test_jump_and_block_match_rand(self):
+        for map_id in (0, 10, 999999, -7):
+            with self.subTest(map_id=map_id):
+                hex_map = HexMap(map_id, 20, 11)
+                expected = [hex_map._rand(10) for _ in range(500)]
+                values, state = draw_block(map_id, 500, 10)
+                self.assertEqual(values, expected)
+                self.assertEqual(state, hex_map.random_seed)
+                self.assertEqual(jump_state(map_id, 500), hex_map.random_seed)
+                self.assertEqual(jump_state(map_id, 500 + 233280 * 3), hex_map.random_seed)
+
+    def test_draws_follow_the_state(self):
+        for map_id in (0, 10, 999999, -7):
+            with self.subTest(map_id=map_id):
+                hex_map = HexMap(map_id, 20, 11)
+                self.assertEqual(hex_map.rand_draws, 0)
+                for _ in range(300):
+                    hex_map._rand(10)
+                self.assertEqual(hex_map.rand_draws, 300)
+                hex_map._rand(10)
+                self.assertEqual(hex_map.rand_draws, 301)
+                self.assertEqual(draws_between(map_id, jump_state(map_id, 233279)), 233279)
+                self.assertEqual(draws_between(map_id, map_id + 233280), 0)
+
+if __name__ == '__main__':
+    unittest.main()
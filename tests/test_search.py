@@ -0,0 +1,74 @@
+import unittest
+import io
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import search
+from py_hexmap.generator import HexMap
+from py_hexmap.search import Constraint, MinPorts, MinTowns, SeedSearch, SeparateCapitals, count_estates
+
+def has_water(hex_map, board):
+    return any(board.get_field(x, y).type == "water" for x in range(board.x_max) for y in range(board.y_max))
+
+class TestSeedSearch(unittest.TestCase):
+    def full_maps(self, map_ids):
+        boards = {}
+        for map_id in map_ids:
+            hex_map = HexMap(map_id, 20, 11, board_backend="flat")
+            hex_map.generate_map()
+            boards[map_id] = hex_map.board
+        return boards
+
+    def test_matches_full_generation(self):
+        boards = self.full_maps(range(120))
+        cases = (
+            ([MinTowns(20)], lambda board: len(board.towns) >= 20),
+            ([SeparateCapitals()], lambda board: len({board.get_field(x, y).land_id
+                                                      for x, y in board.capital_locations()}) == 4),
+            ([MinPorts(4), MinTowns(15)], lambda board: count_estates(board, "port") >= 4 and len(board.towns) >= 15),
+        )
+        for constraints, expected in cases:
+            with self.subTest(constraints=[type(constraint).__name__ for constraint in constraints]):
+                found = list(SeedSearch(constraints, 20, 11).run(range(120), workers=0, chunk_size=32))
+                self.assertEqual(found, [map_id for map_id, board in boards.items() if expected(board)])
+
+    def test_early_decisions(self):
+        seed_search = SeedSearch([MinTowns(1000), MinPorts(1)], 20, 11)
+        self.assertEqual(seed_search.evaluate(0), (False, "generate_land_groups"))
+        seed_search = SeedSearch([MinTowns(1), SeparateCapitals()], 20, 11)
+        matched, stage = seed_search.evaluate(0)
+        self.assertIn(stage, ("generate_land_groups", "generate_towns"))
+        self.assertEqual(SeedSearch([], 20, 11).evaluate(0), (True, None))
+        # Maps that run out of town names fail where they do.
+        self.assertEqual(SeedSearch([MinPorts(0)], 80, 80).evaluate(0), (False, "generate_towns"))
+        self.assertRaises(ValueError, Constraint, "no_such_stage")
+
+    def test_run_counts_and_limit(self):
+        seed_search = SeedSearch([Constraint("set_land_fields", has_water), MinTowns(20)], 20, 11)
+        found = list(seed_search.run(range(60), workers=0, chunk_size=10))
+        self.assertEqual(seed_search.checked, 60)
+        self.assertEqual(sum(seed_search.rejected.values()), 60 - len(found))
+        limited = list(SeedSearch(seed_search.constraints, 20, 11).run(range(60), workers=0, chunk_size=10,
+                                                                       limit=2))
+        self.assertEqual(limited, found[:2])
+
+    def test_workers(self):
+        seed_search = SeedSearch([MinTowns(20)], 20, 11)
+        expected = list(SeedSearch([MinTowns(20)], 20, 11).run(range(40), workers=0))
+        self.assertEqual(sorted(seed_search.run(range(40), workers=2, chunk_size=8)), expected)
+        self.assertEqual(seed_search.checked, 40)
+
+    def test_cli(self):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            status = search.main(["--seeds", "0-59", "--min-towns", "20", "-w", "0", "-n", "3"])
+        self.assertEqual(status, 0)
+        expected = list(SeedSearch([MinTowns(20)], 20, 11).run(range(60), workers=0, limit=3))
+        self.assertEqual([int(line) for line in out.getvalue().split()], expected)
+
+if __name__ == '__main__':
+    unittest.main()
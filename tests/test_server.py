@@ -0,0 +1,94 @@
+import unittest
+import http.client
+import json
+import threading
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, generate_map_data
+from py_hexmap.loadgen import run_load
+from py_hexmap.server import MapServer, MapService
+
+class TestMapServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MapServer(("127.0.0.1", 0), MapService(workers=2, use_processes=False), max_size=60)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def get(self, path, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response, response.read()
+        finally:
+            connection.close()
+
+    def test_maps_and_etags(self):
+        status, response, body = self.get("/map/10?x_max=30&y_max=20")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), generate_map_data(10, 30, 20))
+        etag = response.getheader("ETag")
+        self.assertTrue(etag.startswith('"'))
+
+        status, response, _ = self.get("/map/%d?x_max=30&y_max=20" % (10 + 233280))
+        self.assertEqual(response.getheader("ETag"), etag)
+        status, _, body = self.get("/map/10?x_max=30&y_max=20", {"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+
+        status, response, body = self.get("/map/10?x_max=30&y_max=20&format=binary")
+        self.assertEqual(status, 200)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+        self.assertEqual(CompactGrid.from_bytes(body).to_matrix(), generate_map_data(10, 30, 20))
+
+    def test_errors_and_metrics(self):
+        self.assertEqual(self.get("/map/abc")[0], 400)
+        self.assertEqual(self.get("/map/1?format=xml")[0], 400)
+        self.assertEqual(self.get("/map/1?x_max=1000")[0], 400)
+        self.assertEqual(self.get("/nothing")[0], 404)
+        self.assertEqual(self.get("/map/0?x_max=60&y_max=60")[0], 422)
+        self.assertEqual(self.get("/map/0?x_max=60&y_max=60", {"If-None-Match": "*"})[0], 422)
+        status, _, body = self.get("/map/0?x_max=20&y_max=11", {"If-None-Match": "*"})
+        self.assertEqual((status, body), (304, b""))
+
+        report = run_load("http://127.0.0.1:%d" % self.port, [0, 1, 2], requests=30, concurrency=3, revalidate=True)
+        self.assertEqual(report["requests"], 30)
+        self.assertEqual(report["statuses"], {"200": 3, "304": 27})
+        status, _, body = self.get("/metrics")
+        metrics = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertGreaterEqual(metrics["server"]["requests"], 35)
+        self.assertIn("p99", metrics["server"]["latency_ms"])
+        self.assertGreaterEqual(metrics["maps"]["generated"], 3)
+
+class TestMapService(unittest.TestCase):
+    def test_coalescing(self):
+        service = MapService(workers=2, use_processes=False)
+        self.addCleanup(service.close)
+        grids = []
+        threads = [threading.Thread(target=lambda: grids.append(service.get_grid(10, 30, 20))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([grid.to_matrix() for grid in grids], [generate_map_data(10, 30, 20)] * 4)
+        stats = service.stats()
+        # Requests that arrive after the generation finished are cache hits.
+        self.assertEqual((stats["generated"], stats["coalesced"] + stats["cache"]["hits"], stats["in_flight"]),
+                         (1, 3, 0))
+        self.assertIs(service.get_grid(10 + 233280, 30, 20), service.cache.get_grid(10, 30, 20))
+        service.close()
+        service.close()
+
+if __name__ == '__main__':
+    unittest.main()
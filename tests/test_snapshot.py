@@ -0,0 +1,90 @@
+import unittest
+import io
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, HexMap, StageSnapshot
+from py_hexmap.generator import STAGE_NAMES
+
+class NoShuffleHexMap(HexMap):
+    """An experiment that changes a late stage: towns keep their order."""
+    def shuffle(self, arr):
+        pass
+
+def final_state(hex_map):
+    board = hex_map.board
+    return (CompactGrid.from_board(board).to_bytes(), hex_map.random_seed, hex_map.rand_draws,
+            [(town.f_x, town.f_y) for town in board.towns])
+
+class TestStageSnapshot(unittest.TestCase):
+    def test_resume_from_every_stage(self):
+        for map_id in (0, 1000, 123456):
+            for source, target in (("flat", "flat"), ("dict", "flat"), ("flat", "dict"), ("dict", "dict")):
+                hex_map = HexMap(map_id, 20, 11, board_backend=source)
+                snapshots = {}
+                hex_map.run_stages(snapshots=snapshots)
+                self.assertEqual(list(snapshots), list(STAGE_NAMES))
+                expected = final_state(hex_map)
+                for stage, snapshot in snapshots.items():
+                    with self.subTest(map_id=map_id, source=source, target=target, stage=stage):
+                        restored = HexMap.from_snapshot(StageSnapshot.from_bytes(snapshot.to_bytes()),
+                                                        board_backend=target)
+                        self.assertEqual(restored.stage, stage)
+                        restored.generate_map()
+                        self.assertEqual(final_state(restored), expected)
+
+    def test_run_stages_matches_generate_map(self):
+        hex_map = HexMap(99999, 45, 40)
+        hex_map.run_stages("generate_land_groups")
+        self.assertEqual(hex_map.stage, "generate_land_groups")
+        self.assertEqual(hex_map.board.towns, [])
+        hex_map.run_stages()
+        expected = HexMap(99999, 45, 40)
+        expected.generate_map()
+        self.assertEqual(expected.stage, "generate_ports")
+        self.assertEqual(final_state(hex_map), final_state(expected))
+        self.assertRaises(ValueError, hex_map.run_stages, "no_such_stage")
+
+    def test_split_runs_follow_the_stage_table(self):
+        hex_map = HexMap(1000, 20, 11)
+        hex_map.generate_terrain(hex_map.board)
+        self.assertEqual(hex_map.stage, "generate_land_groups")
+        for name in STAGE_NAMES[STAGE_NAMES.index("generate_party_capitals"):]:
+            hex_map.run_stages(name)
+            self.assertEqual(hex_map.stage, name)
+        expected = HexMap(1000, 20, 11)
+        expected.generate_map()
+        self.assertEqual(final_state(hex_map), final_state(expected))
+
+    def test_experiment_from_unchanged_stage(self):
+        base = HexMap(10, 20, 11, board_backend="flat")
+        base.run_stages("generate_towns")
+        snapshot = base.snapshot()
+        experiment = NoShuffleHexMap.from_snapshot(snapshot, board_backend="flat")
+        experiment.generate_map()
+        expected = NoShuffleHexMap(10, 20, 11, board_backend="flat")
+        expected.generate_map()
+        self.assertEqual(final_state(experiment), final_state(expected))
+        # The snapshot itself is unchanged and can be restored again.
+        self.assertEqual(HexMap.from_snapshot(snapshot, board_backend="flat").snapshot().to_bytes(), snapshot.to_bytes())
+
+    def test_serialization(self):
+        hex_map = HexMap(1000, 20, 11, board_backend="flat")
+        hex_map.run_stages("generate_party_capitals")
+        snapshot = hex_map.snapshot()
+        stream = io.BytesIO()
+        self.assertEqual(snapshot.write(stream), len(stream.getvalue()))
+        self.assertEqual(stream.getvalue(), bytes(snapshot))
+        restored = StageSnapshot.from_bytes(stream.getvalue())
+        self.assertEqual(restored.town_names, hex_map.board.town_names)
+        self.assertEqual((restored.random_seed, restored.rand_draws), (hex_map.random_seed, hex_map.rand_draws))
+        self.assertEqual(restored.to_bytes(), snapshot.to_bytes())
+        self.assertRaises(ValueError, StageSnapshot.from_bytes, b"XXXX" + bytes(8))
+        other_size = HexMap(1000, 21, 11)
+        self.assertRaises(ValueError, snapshot.apply, other_size)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap, SpatialIndex
+from py_hexmap.query import hex_distance
+
+def brute_force(board, field, kind):
+    found = []
+    for x in range(board.x_max):
+        for y in range(board.y_max):
+            candidate = board.get_field(x, y)
+            if candidate.estate == kind:
+                found.append((hex_distance(field, candidate), x, y))
+    found.sort()
+    return found
+
+def locations(result):
+    return [(distance, field.f_x, field.f_y) for distance, field in result]
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_queries_match_brute_force(self):
+        for backend in ("dict", "flat"):
+            hex_map = HexMap(10, 45, 40, board_backend=backend)
+            hex_map.generate_map()
+            board = hex_map.board
+            for cell_size in (1, 4, 8):
+                index = SpatialIndex(board, cell_size=cell_size, track_edits=False)
+                rng = random.Random(cell_size)
+                for _ in range(40):
+                    field = board.get_field(rng.randrange(board.x_max), rng.randrange(board.y_max))
+                    for kind in ("town", "port"):
+                        with self.subTest(backend=backend, cell_size=cell_size, kind=kind):
+                            expected = brute_force(board, field, kind)
+                            k = rng.randint(1, 6)
+                            self.assertEqual(locations(index.nearest(field, k, kind)), expected[:k])
+                            radius = rng.randint(0, 12)
+                            self.assertEqual(locations(index.within(field, radius, kind)),
+                                             [entry for entry in expected if entry[0] <= radius])
+
+    def test_predicate(self):
+        hex_map = HexMap(0, 30, 20)
+        hex_map.generate_map()
+        board = hex_map.board
+        index = SpatialIndex(board, track_edits=False)
+        field = board.get_field(15, 10)
+        capitals = index.nearest(field, 10, predicate=lambda town: town.capital != -1)
+        self.assertEqual(len(capitals), len(board.capital_locations()))
+        self.assertTrue(all(town.capital != -1 for _, town in capitals))
+        self.assertEqual(index.nearest(field, 0), [])
+        self.assertEqual(index.nearest(field, -1, "port"), [])
+
+    def test_follows_edits(self):
+        hex_map = HexMap(0, 30, 20)
+        hex_map.generate_map()
+        board = hex_map.board
+        index = SpatialIndex(board)
+        towns = index.count("town")
+        town = board.towns[2]
+        board.set_estate(town.f_x, town.f_y, "")
+        self.assertEqual(index.count("town"), towns - 1)
+        land = next(field for field in board.fields.values() if field.type == "land" and field.estate == "")
+        board.set_estate(land.f_x, land.f_y, "town", "Newtown")
+        self.assertEqual(index.nearest(land)[0], (0, land))
+        for kind in ("town", "port"):
+            self.assertEqual(locations(index.nearest(land, 100, kind)), brute_force(board, land, kind)[:100])
+
+        board.set_terrain(land.f_x, land.f_y, "land")
+        self.assertIs(index.land_group(land.f_x, land.f_y), board.land_groups[land.land_id])
+        water = next(field for field in board.fields.values() if field.type == "water")
+        self.assertEqual(index.land_id(water.f_x, water.f_y), -1)
+        self.assertIsNone(index.land_group(water.f_x, water.f_y))
+
+        index.close()
+        self.assertEqual(board.editor().listeners, [])
+        board.set_estate(land.f_x, land.f_y, "")
+        self.assertEqual(index.nearest(land)[0], (0, land))
+        index.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import json
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import GenerationStats, HexMap, generate_map_data
+from py_hexmap.rng import jump_state
+from py_hexmap.utils import board_to_matrix_representation
+
+class TestGenerationStats(unittest.TestCase):
+    def test_stats(self):
+        for engine in ("legacy", "heap"):
+            with self.subTest(engine=engine):
+                seen = []
+                stats = GenerationStats(callback=seen.append)
+                hex_map = HexMap(10, 30, 20, path_engine=engine, stats=stats)
+                hex_map.generate_map()
+                self.assertEqual(board_to_matrix_representation(hex_map.board), generate_map_data(10, 30, 20))
+                self.assertEqual(seen, stats.stages)
+                self.assertEqual([record.name for record in stats.stages],
+                                 ["add_field", "find_neighbors", "set_land_fields", "generate_land_groups",
+                                  "generate_party_capitals", "generate_towns", "shuffle", "generate_ports"])
+                draws = sum(record.rand_draws for record in stats.stages)
+                self.assertEqual(draws, hex_map.rand_draws)
+                self.assertEqual(jump_state(10, draws), hex_map.random_seed)
+                self.assertEqual(sum(stats.land_group_sizes), hex_map.board.land_count)
+                self.assertGreater(stats.nodes_expanded, 0)
+                self.assertEqual(stats.paths_found + stats.paths_failed, len(hex_map.board.towns) - 1 + stats.port_fallbacks)
+                summary = json.loads(json.dumps(stats.as_dict()))
+                self.assertEqual(summary["land_groups"]["count"], len(hex_map.board.land_groups))
+
+    def test_failed_stage(self):
+        stats = GenerationStats()
+        with self.assertRaises(IndexError):
+            HexMap(0, 60, 60, stats=stats).generate_map()
+        self.assertEqual(stats.stages[-1].name, "generate_towns")
+        self.assertTrue(stats.stages[-1].failed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import io
+import json
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import CompactGrid, HexMap, generate_map_data, iter_board_columns, write_map_json
+from py_hexmap.streaming import iter_board_chunks, write_json_matrix
+
+class TestStreaming(unittest.TestCase):
+    def test_columns(self):
+        expected = generate_map_data(10, 30, 20)
+        for backend in ("dict", "flat"):
+            with self.subTest(backend=backend):
+                hex_map = HexMap(10, 30, 20, board_backend=backend)
+                hex_map.generate_map()
+                self.assertEqual(list(iter_board_columns(hex_map.board)), expected)
+                chunks = list(iter_board_chunks(hex_map.board, 7))
+                self.assertEqual([len(chunk) for chunk in chunks], [7, 7, 7, 7, 2])
+                self.assertEqual([column for chunk in chunks for column in chunk], expected)
+                self.assertEqual(list(CompactGrid.from_board(hex_map.board).iter_columns()), expected)
+
+    def test_json_matches_json_dump(self):
+        matrix = generate_map_data(10, 20, 11)
+        for options in ({}, {"indent": 4}, {"separators": (",", ":"), "ensure_ascii": False}):
+            for value in (matrix, [], [[], ["land"]]):
+                with self.subTest(options=options, value=value is matrix):
+                    stream = io.StringIO()
+                    written = write_json_matrix(stream, iter(value), **options)
+                    self.assertEqual(stream.getvalue(), json.dumps(value, **options))
+                    self.assertEqual(written, len(stream.getvalue()))
+        stream = io.StringIO()
+        write_map_json(stream, 10, 20, 11, chunk_size=3, indent=4)
+        self.assertEqual(stream.getvalue(), json.dumps(matrix, indent=4))
+
+if __name__ == '__main__':
+    unittest.main()
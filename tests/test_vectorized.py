@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import HexMap, generate_map_data
+from py_hexmap.utils import board_to_matrix_representation
+from py_hexmap import vectorized
+
+map_sample_list=[0,10,1000,123456,9999,99999,999999]
+
+@unittest.skipIf(vectorized.np is None, "NumPy is not installed")
+class TestVectorized(unittest.TestCase):
+    def test_terrain_matches_python_path(self):
+        batch = vectorized.generate_terrain_batch(map_sample_list, 30, 20)
+        for index, map_id in enumerate(map_sample_list):
+            with self.subTest(map_id=map_id):
+                expected = HexMap(map_id, 30, 20)
+                expected.generate_terrain(expected.board)
+                actual = batch.to_hex_map(index)
+                self.assertEqual(actual.random_seed, expected.random_seed)
+                self.assertEqual(board_to_matrix_representation(actual.board),
+                                 board_to_matrix_representation(expected.board))
+                self.assertEqual([[(f.f_x, f.f_y) for f in group] for group in actual.board.land_groups],
+                                 [[(f.f_x, f.f_y) for f in group] for group in expected.board.land_groups])
+
+    def test_maps_match_generate_map_data(self):
+        hex_maps = vectorized.generate_maps_batch(map_sample_list, 20, 11, board_backend="flat")
+        for map_id, hex_map in zip(map_sample_list, hex_maps):
+            with self.subTest(map_id=map_id):
+                self.assertEqual(board_to_matrix_representation(hex_map.board), generate_map_data(map_id, 20, 11))
+
+    def test_generate_map_resumes_batch_maps(self):
+        batch = vectorized.generate_terrain_batch(map_sample_list, 20, 11)
+        for index, map_id in enumerate(map_sample_list):
+            with self.subTest(map_id=map_id):
+                hex_map = batch.to_hex_map(index)
+                self.assertEqual(hex_map.stage, "generate_land_groups")
+                self.assertEqual(hex_map.snapshot().stage, "generate_land_groups")
+                hex_map.generate_map()
+                expected = HexMap(map_id, 20, 11)
+                expected.generate_map()
+                self.assertEqual(len(hex_map.board.towns), len(expected.board.towns))
+                self.assertEqual(board_to_matrix_representation(hex_map.board), generate_map_data(map_id, 20, 11))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stderr
+from unittest import mock
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from py_hexmap import verify
+from py_hexmap.flat_board import FlatBoard
+from py_hexmap.generator import HexMap
+
+class BrokenHexMap(HexMap):
+    """Flips one field after set_land_fields for odd seeds on the flat backend."""
+    def __init__(self, map_id, *args, **kwargs):
+        super().__init__(map_id, *args, **kwargs)
+        self.odd = map_id % 2 == 1
+
+    def set_land_fields(self, board):
+        super().set_land_fields(board)
+        if isinstance(board, FlatBoard) and self.odd:
+            board.get_field(5, 5).type = "water" if board.get_field(5, 5).type == "land" else "land"
+
+class TestVerify(unittest.TestCase):
+    def test_golden_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = verify.golden_path(directory, 20, 11)
+            digests = verify.compute_digests([7, 3, 5], 20, 11, ("dict", "heap"), workers=0)
+            verify.write_golden(path, 20, 11, [7, 3, 5], digests)
+            x_max, y_max, golden = verify.read_golden(path)
+            self.assertEqual((x_max, y_max), (20, 11))
+            self.assertEqual(sorted(golden), [3, 5, 7])
+            self.assertEqual(golden[7], digests[:verify.DIGEST_SIZE])
+            self.assertEqual(os.path.getsize(path), verify.GOLDEN_HEADER.size + 3 * (4 + verify.DIGEST_SIZE))
+
+    def test_engines_agree(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = verify.verify_size(20, 11, range(12), ("flat", "heap"), golden_dir=directory, workers=0)
+            self.assertEqual((result["checked"], result["reference_generated"], result["mismatches"]), (12, 12, 0))
+            # The second run reads the reference digests back and only adds the new seeds.
+            result = verify.verify_size(20, 11, range(16), ("dict", "heap"), golden_dir=directory, workers=2,
+                                        chunk_size=5)
+            self.assertEqual((result["reference_generated"], result["mismatches"]), (4, 0))
+        # Maps too large to generate must fail identically.
+        result = verify.verify_size(60, 60, [0], ("flat", "heap"), reference=("dict", "heap"), workers=0)
+        self.assertEqual(result["mismatches"], 0)
+
+    def test_mismatch_report(self):
+        with mock.patch.object(verify, "HexMap", BrokenHexMap):
+            result = verify.verify_size(20, 11, range(6), ("flat", "heap"), reference=("dict", "heap"), workers=0)
+        self.assertEqual(result["mismatched_seeds"], [1, 3, 5])
+        first = result["first_differences"][0]
+        self.assertEqual((first["map_id"], first["stage"], first["cell"], first["attribute"]),
+                         (1, "set_land_fields", [5, 5], "type"))
+        self.assertNotEqual(first["reference"], first["candidate"])
+
+    def test_main(self):
+        output = io.StringIO()
+        with redirect_stderr(io.StringIO()), mock.patch("sys.stdout", output):
+            self.assertEqual(verify.main(["--seeds", "0-99", "--sample", "5", "--reference", "dict:heap",
+                                          "--engine", "flat:heap", "-w", "0"]), 0)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["sizes"][0]["checked"], 5)
+        self.assertEqual(len(verify.select_seeds("all")), 233280)
+
+if __name__ == '__main__':
+    unittest.main()